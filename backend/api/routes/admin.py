@@ -1,9 +1,13 @@
 # backend/api/routes/admin.py
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Optional
 from pydantic import BaseModel
 from core.security import get_current_admin_user
-from models.user import User
+from core.http_cache import Conditional, conditional_get
+from core.projection import Fields, fields_query, project
+from core.principal_cache import principal_cache
+from models.order import Order, ProductDetail
+from models.user import User, UserListing
 
 router = APIRouter(
     prefix="/api/admin",  # 🔥 CAMBIADO: Agregamos /api al prefijo
@@ -18,17 +22,26 @@ class ProductUpdate(BaseModel):
 class UserUpdate(BaseModel):
     status: str
 
+class ProductBatchUpdate(BaseModel):
+    status: str
+    # Sin ids se usan los filtros de la query (?status=pending&vendor_id=...)
+    ids: Optional[List[int]] = None
+
+class UserBatchUpdate(BaseModel):
+    status: str
+    emails: Optional[List[str]] = None
+
 class PlatformConfig(BaseModel):
     discount: float
     shipping_policy: str
 
 # --- PRODUCTOS ---
 @router.get("/products")
-async def get_all_products():
-    from db.json_handler import read_json
+async def get_all_products(fields: Fields = Depends(fields_query(ProductDetail))):
+    from db.json_handler import run_in_db_executor
+    from services.catalog_service import get_catalog_service
     try:
-        data = read_json("productos.json")
-        products = data.get("productos", [])
+        products = await run_in_db_executor(get_catalog_service().all, fields)
         return {"products": products}
     except Exception as e:
         print(f"Error loading products: {e}")
@@ -36,42 +49,66 @@ async def get_all_products():
 
 @router.patch("/products/{product_id}")
 async def update_product_status(product_id: int, update: ProductUpdate):
-    from db.json_handler import read_json, write_json
+    from db.json_handler import run_in_db_executor
+    from services.catalog_service import get_catalog_service, ProductNotFoundError
     try:
-        data = read_json("productos.json")
-        products = data.get("productos", [])
-        
-        product = next((p for p in products if p.get("id") == product_id), None)
-        if not product:
-            raise HTTPException(status_code=404, detail="Producto no encontrado")
-        
-        product["status"] = update.status
-        data["productos"] = products
-        write_json("productos.json", data)
-        
+        product = await run_in_db_executor(
+            get_catalog_service().update, product_id, {"status": update.status}
+        )
         return {"message": "Producto actualizado", "product": product}
+    except ProductNotFoundError:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@router.patch("/products:batch")
+async def update_products_status_batch(
+    update: ProductBatchUpdate,
+    status: Optional[str] = None,
+    vendor_id: Optional[str] = None,
+    categoria: Optional[str] = None,
+    marca: Optional[str] = None,
+):
+    """
+    Cambia el estado de varios productos en una sola escritura: los de `ids`
+    o, si no se envían, los que cumplen los filtros de la query, p. ej.
+    PATCH /api/admin/products:batch?status=pending&vendor_id=x {"status": "active"}
+    """
+    from db.json_handler import run_in_db_executor
+    from services.catalog_service import get_catalog_service
+    filters = {
+        field: value
+        for field, value in (("status", status), ("vendor_id", vendor_id), ("categoria", categoria), ("marca", marca))
+        if value is not None
+    }
+    if update.ids is None and not filters:
+        raise HTTPException(status_code=400, detail="Indica ids o al menos un filtro")
+    try:
+        results = await run_in_db_executor(
+            get_catalog_service().update_many, {"status": update.status}, update.ids, **filters
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    return {
+        "message": "Productos actualizados",
+        "updated": sum(1 for product in results.values() if product is not None),
+        "results": [
+            {"id": product_id, "result": "updated" if product is not None else "not_found"}
+            for product_id, product in results.items()
+        ]
+    }
+
 @router.delete("/products/{product_id}")
 async def delete_product(product_id: int):
-    from db.json_handler import read_json, write_json
+    from db.json_handler import run_in_db_executor
+    from services.catalog_service import get_catalog_service, ProductNotFoundError
     try:
-        data = read_json("productos.json")
-        products = data.get("productos", [])
-        
-        original_length = len(products)
-        products = [p for p in products if p.get("id") != product_id]
-        
-        if len(products) == original_length:
-            raise HTTPException(status_code=404, detail="Producto no encontrado")
-        
-        data["productos"] = products
-        write_json("productos.json", data)
-        
+        await run_in_db_executor(get_catalog_service().delete, product_id)
         return {"message": "Producto eliminado"}
+    except ProductNotFoundError:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
     except HTTPException:
         raise
     except Exception as e:
@@ -79,55 +116,91 @@ async def delete_product(product_id: int):
 
 # --- USUARIOS ---
 @router.get("/users")
-async def get_all_users():
-    from db.json_handler import read_json
+async def get_all_users(
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    role: Optional[str] = None,
+    tipo: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: Fields = Depends(fields_query(UserListing)),
+):
+    """
+    Usuarios por email, paginados por cursor y filtrados con los índices
+    del directorio (role, tipo, status). Nunca incluye contraseñas.
+    """
+    from db.json_handler import run_in_db_executor
+    from services.user_directory import get_user_directory
     try:
-        users_dict = read_json("users.json")
-        users_list = [
-            {**user, "status": user.get("status", "active")} 
-            for user in users_dict.values()
-        ]
-        # Remover contraseñas
-        safe_users = [
-            {k: v for k, v in user.items() if k != "hashed_password"} 
-            for user in users_list
-        ]
-        return {"users": safe_users}
+        page = await run_in_db_executor(
+            get_user_directory().query,
+            limit=limit, cursor=cursor, role=role, tipo=tipo, status=status, fields=fields,
+        )
+        return {"users": page["items"], "total": page["total"], "next_cursor": page["next_cursor"]}
     except Exception as e:
         print(f"Error loading users: {e}")
-        return {"users": []}
+        return {"users": [], "total": 0, "next_cursor": None}
 
 @router.patch("/users/{user_email}")
 async def update_user_status(user_email: str, update: UserUpdate):
-    from db.json_handler import read_json, write_json
+    from db.json_handler import run_in_db_executor
+    from services.user_directory import get_user_directory, UserNotFoundError
     try:
-        users = read_json("users.json")
-        
-        if user_email not in users:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        
-        users[user_email]["status"] = update.status
-        write_json("users.json", users)
-        
+        await run_in_db_executor(get_user_directory().update, user_email, {"status": update.status})
         return {"message": "Usuario actualizado"}
+    except UserNotFoundError:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@router.patch("/users:batch")
+async def update_users_status_batch(
+    update: UserBatchUpdate,
+    status: Optional[str] = None,
+    role: Optional[str] = None,
+    tipo: Optional[str] = None,
+):
+    """
+    Cambia el estado de varios usuarios en una sola escritura: los de
+    `emails` o, si no se envían, los que cumplen los filtros de la query
+    (un usuario sin status cuenta como "active").
+    """
+    from db.json_handler import run_in_db_executor
+    from services.user_directory import get_user_directory
+    filters = {
+        field: value
+        for field, value in (("status", status), ("role", role), ("tipo", tipo))
+        if value is not None
+    }
+    if update.emails is None and not filters:
+        raise HTTPException(status_code=400, detail="Indica emails o al menos un filtro")
+
+    try:
+        updated = await run_in_db_executor(
+            get_user_directory().update_many, {"status": update.status}, update.emails, **filters
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    results = [
+        {"email": email, "result": "updated" if user is not None else "not_found"}
+        for email, user in updated.items()
+    ]
+    return {
+        "message": "Usuarios actualizados",
+        "updated": sum(1 for r in results if r["result"] == "updated"),
+        "results": results
+    }
+
 @router.delete("/users/{user_email}")
 async def delete_user(user_email: str):
-    from db.json_handler import read_json, write_json
+    from db.json_handler import run_in_db_executor
+    from services.user_directory import get_user_directory, UserNotFoundError
     try:
-        users = read_json("users.json")
-        
-        if user_email not in users:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        
-        del users[user_email]
-        write_json("users.json", users)
-        
+        await run_in_db_executor(get_user_directory().delete, user_email)
         return {"message": "Usuario eliminado"}
+    except UserNotFoundError:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
     except HTTPException:
         raise
     except Exception as e:
@@ -135,30 +208,39 @@ async def delete_user(user_email: str):
 
 # --- PAGOS ---
 @router.get("/payments")
-async def get_payment_history():
-    from db.json_handler import read_json
+async def get_payment_history(fields: Fields = Depends(fields_query(Order))):
+    from db.json_handler import aload_orders
     try:
-        orders = read_json("orders.json")
+        orders = await aload_orders()
+        if fields is not None:
+            orders = [project(order, fields) for order in orders]
         return {"payments": orders}
     except Exception as e:
         print(f"Error loading payments: {e}")
         return {"payments": []}
 
+# --- ESTADÍSTICAS ---
+@router.get("/stats/auth-cache")
+async def get_auth_cache_stats():
+    """Aciertos, fallos y tamaño de la caché de usuarios autenticados de este worker."""
+    return principal_cache.stats()
+
 # --- CONFIGURACIÓN ---
 @router.get("/config")
-async def get_platform_config():
-    from db.json_handler import read_json
+async def get_platform_config(conditional: Conditional = Depends(conditional_get("admin_config"))):
+    from db.json_handler import aread_json
     try:
-        config = read_json("platform_config.json")
-        return config
+        config = await aread_json("platform_config.json")
     except:
-        return {"discount": 0, "shipping_policy": ""}
+        config = {"discount": 0, "shipping_policy": ""}
+    # ETag por contenido: si la configuración no cambió, 304 sin cuerpo
+    return conditional.respond(config)
 
 @router.post("/config")
 async def update_platform_config(config: PlatformConfig):
-    from db.json_handler import write_json
+    from db.json_handler import awrite_json
     try:
-        write_json("platform_config.json", config.dict())
+        await awrite_json("platform_config.json", config.dict())
         return {"message": "Configuración actualizada", "config": config}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
\ No newline at end of file
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from core.security import create_access_token
-from db.json_handler import load_users, save_users
-from core.security import get_password_hash, verify_password
+from core.security import create_access_token, create_session_tokens, decode_refresh_token
+from core.security import password_hasher
+from core.revocation import revocation_list
+from core.rate_limit import enforce_rate_limit
+from db.json_handler import run_in_db_executor
+from services.user_directory import (
+    EmailAlreadyRegisteredError,
+    UserNotFoundError,
+    get_user_directory,
+    normalize_email,
+)
 from models.user import User, UserCreate
 from models.token import Token
-from typing import Literal
+from typing import Literal, Optional
 from datetime import timedelta
 from jose import JWTError, jwt
 from core.config import settings
@@ -17,33 +25,46 @@ class TokenWithUser(BaseModel):
     access_token: str
     token_type: str
     user: User
+    # Para renovar el access token en /refresh sin volver a pedir la contraseña
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 @router.post("/register", response_model=TokenWithUser, status_code=status.HTTP_201_CREATED)
-def register_user(form_data: UserCreate):
+async def register_user(form_data: UserCreate, request: Request):
     """Registra un nuevo usuario y devuelve el token + datos del usuario."""
-    users = load_users()
-    email = form_data.email.lower().strip()
+    directory = get_user_directory()
+    email = normalize_email(form_data.email)
+    await enforce_rate_limit("register", request, email)
     
-    if email in users:
+    if await run_in_db_executor(directory.exists, email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El email ya está registrado.",
         )
 
     # Preparamos los datos del nuevo usuario para la base de datos
+    # (el hash se calcula en el pool de hashing, fuera del bloqueo del archivo)
+    hashed_password = await password_hasher.hash(form_data.password)
     user_to_save = {
         "nombre": form_data.nombre,
         "email": email,
         "tipo": form_data.tipo,
-        "hashed_password": get_password_hash(form_data.password)
     }
 
-    # Guardamos en el archivo JSON
-    users[email] = user_to_save
-    save_users(users)
+    # El directorio vuelve a comprobar bajo el bloqueo por si otro registro
+    # con el mismo email entró mientras tanto; el hash va a credentials.json
+    try:
+        await run_in_db_executor(directory.register, user_to_save, hashed_password)
+    except EmailAlreadyRegisteredError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El email ya está registrado.",
+        )
 
     # Crear token de acceso
-    access_token = create_access_token(data={"sub": email})
+    tokens = create_session_tokens(user_to_save)
     
     # Preparar datos del usuario para la respuesta (sin la contraseña)
 
@@ -55,49 +76,78 @@ def register_user(form_data: UserCreate):
     
     # Devolvemos la respuesta correcta
     return TokenWithUser(
-        access_token=access_token,
+        access_token=tokens["access_token"],
+        refresh_token=tokens["refresh_token"],
         token_type="bearer",
         user=user_for_response
     )
 
 
 @router.post("/login", response_model=TokenWithUser)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     """Inicia sesión y devuelve el token + datos del usuario."""
-    users = load_users()
-    
-    # ------------------ ESTE BLOQUE DEBE ESTAR ALINEADO ASÍ ------------------
-    user_data = None
-    for user_record in users.values():
-        if user_record['email'] == form_data.username.lower():
-            user_data = user_record
-            break
-    # -------------------------------------------------------------------------
+    await enforce_rate_limit("login", request, form_data.username)
+    # Perfil y hash por email, sin recorrer ni cargar a los demás usuarios
+    directory = get_user_directory()
+    user_data = await run_in_db_executor(directory.get, form_data.username)
+    hashed_password = (
+        await run_in_db_executor(directory.password_hash, form_data.username) if user_data else None
+    )
+    valid, new_hash = await password_hasher.verify(form_data.password, hashed_password)
             
-    if not user_data or not verify_password(form_data.password, user_data.get("hashed_password")):
+    if not user_data or not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos.",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    if new_hash:
+        # El hash usa otro coste que PASSWORD_HASH_ROUNDS: se guarda el nuevo
+        try:
+            await run_in_db_executor(directory.set_password, user_data["email"], new_hash, revoke=False)
+        except Exception as e:
+            print(f"⚠️  No se pudo actualizar el hash de {user_data['email']}: {e}")
     
-    token_data = {
-        "sub": user_data["email"],
-        "role": user_data.get("role", "customer")
-    }
-    access_token = create_access_token(data=token_data)
+    tokens = create_session_tokens(user_data)
     
     user_response = User(**user_data)
     
     return TokenWithUser(
-        access_token=access_token,
+        access_token=tokens["access_token"],
+        refresh_token=tokens["refresh_token"],
         token_type="bearer",
         user=user_response
     )
 
 
+@router.post("/refresh", response_model=TokenWithUser)
+async def refresh_access_token(payload: RefreshRequest):
+    """
+    Cambia un refresh token por un par nuevo (access + refresh) con los datos
+    actuales del usuario, sin hashear la contraseña. El refresh token usado
+    queda revocado: cada uno sirve una sola vez.
+    """
+    claims = decode_refresh_token(payload.refresh_token)
+    user_data = await run_in_db_executor(get_user_directory().get, claims["sub"])
+    if user_data is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token inválido o revocado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await run_in_db_executor(revocation_list.revoke_token, claims["jti"], claims.get("exp"))
+    tokens = create_session_tokens(user_data)
+    return TokenWithUser(
+        access_token=tokens["access_token"],
+        refresh_token=tokens["refresh_token"],
+        token_type="bearer",
+        user=User(**user_data)
+    )
+
+
 @router.post("/forgot")
-def forgot_password(payload: dict):
+async def forgot_password(payload: dict, request: Request):
     """Simula el envío de un correo con un token de reseteo.
 
     Si el email existe, devuelve un token de reseteo (simulación).
@@ -105,9 +155,9 @@ def forgot_password(payload: dict):
     email = (payload.get("email") or "").lower().strip()
     if not email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email requerido")
+    await enforce_rate_limit("forgot", request, email)
 
-    users = load_users()
-    if email not in users:
+    if not await run_in_db_executor(get_user_directory().exists, email):
         # ✅ CAMBIADO: Devolvemos el mismo mensaje pero SIN token si no existe
         return {"msg": "Si el email existe, recibirás instrucciones para resetear tu contraseña."}
 
@@ -125,7 +175,7 @@ def forgot_password(payload: dict):
 
 
 @router.post("/reset")
-def reset_password(payload: dict):
+async def reset_password(payload: dict):
     """Recibe token y nueva contraseña y actualiza el usuario si el token es válido."""
     token = payload.get("token")
     new_password = payload.get("new_password")
@@ -143,13 +193,15 @@ def reset_password(payload: dict):
     if scope != "password_reset" or not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido para reseteo")
 
-    users = load_users()
-    user = users.get(email)
-    if user is None:
+    directory = get_user_directory()
+    if not await run_in_db_executor(directory.exists, email):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
 
-    # Actualizar contraseña
-    users[email]["hashed_password"] = get_password_hash(new_password)
-    save_users(users)
+    # Actualizar contraseña (el hash se calcula en el pool de hashing)
+    hashed_password = await password_hasher.hash(new_password)
+    try:
+        await run_in_db_executor(directory.set_password, email, hashed_password)
+    except UserNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
 
     return {"msg": "Contraseña actualizada correctamente."}
\ No newline at end of file
@@ -1,30 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
 from models.cart import CartItem, CartItemCreate, CartItemUpdate, CartResponse
+from models.order import CheckoutResult, Order, OrderItem
 from models.user import User
 from core.security import get_current_user
 from db.json_handler import (
     get_user_cart, 
-    save_user_cart, 
+    get_user_cart_summary,
+    edit_user_cart, 
     clear_user_cart,
-    load_products
+    append_order,
+    read_json
 )
+from services.catalog_service import ProductNotFoundError, get_catalog_service
+from services.inventory_service import InsufficientStockError, ReservationNotFoundError, get_inventory_service
 
 router = APIRouter()
 
 def _find_product_by_id(product_id: int):
-    """Busca un producto por ID en la lista de productos."""
-    productos = load_products()
-    for producto in productos:
-        if producto.get("id") == product_id:
-            return producto
-    return None
-
-def _generate_cart_item_id(cart_items: List[dict]) -> int:
-    """Genera un ID único para un item del carrito."""
-    if not cart_items:
-        return 1
-    return max(item.get("id", 0) for item in cart_items) + 1
+    """Busca un producto por ID en el catálogo (índice en memoria)."""
+    return get_catalog_service().get(product_id)
 
 # ========================================
 # ✅ RUTAS CORREGIDAS (sin /cart porque ya está en el prefijo)
@@ -51,35 +46,11 @@ def add_to_cart(
             detail="Producto no encontrado"
         )
     
-    cart_items = get_user_cart(current_user.email)
-    
-    # Buscar si el producto ya existe
-    existing_item = None
-    for item in cart_items:
-        if item.get("producto_id") == item_data.producto_id:
-            existing_item = item
-            break
-    
-    if existing_item:
-        # Actualizar cantidad
-        existing_item["cantidad"] += item_data.cantidad
-        save_user_cart(current_user.email, cart_items)
-        return CartItem(**existing_item)
+    with edit_user_cart(current_user.email) as cart:
+        # Si el producto ya está en el carrito solo se suma la cantidad
+        item = cart.add(producto, item_data.cantidad)
     
-    # Crear nuevo item
-    new_item = {
-        "id": _generate_cart_item_id(cart_items),
-        "producto_id": producto["id"],
-        "nombre": producto["nombre"],
-        "precio": producto["precio"],
-        "cantidad": item_data.cantidad,
-        "imagen": producto.get("imagen", "")
-    }
-    
-    cart_items.append(new_item)
-    save_user_cart(current_user.email, cart_items)
-    
-    return CartItem(**new_item)
+    return CartItem(**item)
 
 # PUT /api/cart/{item_id} (actualizar cantidad)
 @router.put("/{item_id}", response_model=CartItem)
@@ -89,33 +60,22 @@ def update_cart_item(
     current_user: User = Depends(get_current_user)
 ):
     """Actualiza la cantidad de un item del carrito."""
-    cart_items = get_user_cart(current_user.email)
+    with edit_user_cart(current_user.email) as cart:
+        # Si la cantidad es 0 o negativa, se elimina el item
+        item_to_update = cart.set_quantity(item_id, item_data.cantidad)
+        
+        if not item_to_update:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item no encontrado en el carrito"
+            )
     
-    item_to_update = None
-    for item in cart_items:
-        if item.get("id") == item_id:
-            item_to_update = item
-            break
-    
-    if not item_to_update:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Item no encontrado en el carrito"
-        )
-    
-    # Si la cantidad es 0 o negativa, eliminar el item
     if item_data.cantidad <= 0:
-        cart_items = [item for item in cart_items if item.get("id") != item_id]
-        save_user_cart(current_user.email, cart_items)
         raise HTTPException(
             status_code=status.HTTP_204_NO_CONTENT,
             detail="Item eliminado del carrito"
         )
     
-    # Actualizar cantidad
-    item_to_update["cantidad"] = item_data.cantidad
-    save_user_cart(current_user.email, cart_items)
-    
     return CartItem(**item_to_update)
 
 # DELETE /api/cart/{item_id} (eliminar item específico)
@@ -125,18 +85,13 @@ def delete_cart_item(
     current_user: User = Depends(get_current_user)
 ):
     """Elimina un item del carrito."""
-    cart_items = get_user_cart(current_user.email)
+    with edit_user_cart(current_user.email) as cart:
+        if not cart.remove(item_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item no encontrado en el carrito"
+            )
     
-    original_length = len(cart_items)
-    cart_items = [item for item in cart_items if item.get("id") != item_id]
-    
-    if len(cart_items) == original_length:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Item no encontrado en el carrito"
-        )
-    
-    save_user_cart(current_user.email, cart_items)
     return None
 
 # DELETE /api/cart (vaciar carrito completo)
@@ -146,18 +101,107 @@ def clear_cart(current_user: User = Depends(get_current_user)):
     clear_user_cart(current_user.email)
     return None
 
+# POST /api/cart/checkout (carrito -> orden en una sola llamada)
+@router.post("/checkout", response_model=CheckoutResult, status_code=status.HTTP_201_CREATED)
+def checkout(current_user: User = Depends(get_current_user)):
+    """
+    Convierte el carrito en una orden: precios actuales del catálogo,
+    descuento general (%) e impuesto (tax_rate) de platform_config.json,
+    reserva del stock, registro de la orden y retirada del carrito de lo
+    comprado.
+
+    La edición del carrito solo cubre leerlo, ponerle precio y reservar: la
+    orden se guarda fuera de ella (en SQLite ambas escrituras comparten la
+    conexión del hilo y no se pueden anidar). Si guardar la orden falla, las
+    unidades vuelven al inventario y el carrito queda como estaba.
+    """
+    catalog = get_catalog_service()
+    inventory = get_inventory_service()
+    config = read_json("platform_config.json")
+    discount = float(config.get("discount") or 0) / 100
+    tax_rate = float(config.get("tax_rate") or 0)
+
+    with edit_user_cart(current_user.email) as cart:
+        if not len(cart):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El carrito está vacío"
+            )
+
+        # Precios del catálogo, no los guardados en el carrito
+        bought = {item["id"]: item["cantidad"] for item in cart.items()}
+        lines = []
+        quantities = {}
+        subtotal = 0.0
+        for item in cart.items():
+            producto = catalog.get(item["producto_id"])
+            if producto is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"El producto '{item.get('nombre')}' ya no está disponible"
+                )
+            precio = float(producto.get("precio") or 0)
+            subtotal += precio * item["cantidad"]
+            lines.append(OrderItem(
+                id=producto["id"],
+                nombre=producto["nombre"],
+                cantidad=item["cantidad"],
+                precio_final=round(precio * (1 - discount), 2)
+            ))
+            quantities[producto["id"]] = quantities.get(producto["id"], 0) + item["cantidad"]
+
+        descuento = round(subtotal * discount, 2)
+        impuestos = round((subtotal - descuento) * tax_rate, 2)
+        total = round(subtotal - descuento + impuestos, 2)
+
+        try:
+            reservation = inventory.reserve(quantities, owner=current_user.email)
+        except InsufficientStockError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        except ProductNotFoundError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Producto {e.args[0]} no encontrado")
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    order = Order(cliente_email=current_user.email, items=lines, total=total)
+    # La venta se confirma antes de guardar la orden: una reserva que
+    # expiró no deja una orden registrada sin stock descontado
+    try:
+        inventory.commit(reservation.id)
+    except ReservationNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="La reserva de stock expiró, vuelve a intentarlo"
+        )
+    try:
+        append_order(order.dict())
+    except Exception:
+        inventory.revert(reservation)
+        raise
+
+    # Se quita lo comprado; lo que se haya añadido entretanto se queda
+    with edit_user_cart(current_user.email) as cart:
+        for item_id, cantidad in bought.items():
+            current = cart.get(item_id)
+            if current is not None:
+                cart.set_quantity(item_id, current["cantidad"] - cantidad)
+
+    return CheckoutResult(
+        order=order,
+        subtotal=round(subtotal, 2),
+        descuento=descuento,
+        impuestos=impuestos,
+        total=total
+    )
+
 # GET /api/cart/summary (resumen con total)
 @router.get("/summary", response_model=CartResponse)
 def get_cart_summary(current_user: User = Depends(get_current_user)):
-    """Obtiene el resumen del carrito con el total."""
-    cart_items = get_user_cart(current_user.email)
-    
-    total = sum(
-        item.get("precio", 0) * item.get("cantidad", 0) 
-        for item in cart_items
-    )
+    """Obtiene el resumen del carrito con el total (mantenido en cada cambio)."""
+    summary = get_user_cart_summary(current_user.email)
     
     return CartResponse(
-        items=[CartItem(**item) for item in cart_items],
-        total=total
+        items=[CartItem(**item) for item in summary["items"]],
+        total=summary["total"],
+        count=summary["count"]
     )
\ No newline at end of file
@@ -1,21 +1,15 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from models.order import OrderCreate, Order
 from core.security import get_current_user
 from models.user import User as UserModel
-from db.json_handler import load_orders, save_orders
+from db.json_handler import append_order
+from services.catalog_service import ProductNotFoundError
+from services.inventory_service import InsufficientStockError, ReservationNotFoundError, get_inventory_service
 
 router = APIRouter()
 
 @router.post("/orders", response_model=Order, status_code=status.HTTP_201_CREATED)
 def create_new_order(order_data: OrderCreate, current_user: UserModel = Depends(get_current_user)):
-    orders = load_orders()
-    
-    # --- FIX CLAVE AQUÍ ---
-    # Verificamos si 'orders' es una lista. Si no lo es (porque el JSON es {}),
-    # la convertimos en una lista vacía para que .append() funcione.
-    if not isinstance(orders, list):
-        orders = []
-
     # Creamos la nueva orden. Tu modelo en `order.py` ya se encarga de
     # generar el id, la fecha y el estado automáticamente. ¡Muy bien hecho!
     new_order = Order(
@@ -24,8 +18,32 @@ def create_new_order(order_data: OrderCreate, current_user: UserModel = Depends(
         total=order_data.total
     )
 
-    # Ahora 'orders' es garantizadamente una lista, por lo que .append() funcionará.
-    orders.append(new_order.dict())
-    save_orders(orders) # Guardamos la lista completa de nuevo en el JSON.
+    # Las unidades se apartan y se confirman antes de registrar la orden:
+    # dos compras simultáneas no pueden vender el mismo stock, y una reserva
+    # que expiró no deja una orden guardada sin stock descontado
+    quantities = {}
+    for item in order_data.items:
+        quantities[item.id] = quantities.get(item.id, 0) + item.cantidad
+    inventory = get_inventory_service()
+    try:
+        reservation = inventory.reserve(quantities, owner=current_user.email)
+    except InsufficientStockError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ProductNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Producto {e.args[0]} no encontrado")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        inventory.commit(reservation.id)
+    except ReservationNotFoundError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="La reserva de stock expiró, vuelve a intentarlo")
+
+    try:
+        # Solo se añade la orden nueva: no se lee ni reescribe el historial
+        append_order(new_order.dict())
+    except Exception:
+        inventory.revert(reservation)
+        raise
     
     return new_order
\ No newline at end of file
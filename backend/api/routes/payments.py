@@ -5,6 +5,7 @@ from typing import List, Dict, Any, Literal
 from services.payment_service import PaymentService, get_payment_service
 from core.config import settings
 from core.security import get_current_user
+from core.http_cache import Conditional, conditional_get
 from models.user import User
 
 router = APIRouter()
@@ -24,7 +25,7 @@ class RefundSimulateRequest(BaseModel):
     amount: int = None  # en la unidad mínima (centavos), opcional
 
 @router.get("/config")
-def get_payment_config():
+def get_payment_config(conditional: Conditional = Depends(conditional_get("payments_config"))):
     """Devuelve las claves publicables para configurar el frontend"""
     # Evitar exponer accidentalmente la clave secreta si fue colocada por error
     publishable = settings.STRIPE_PUBLISHABLE_KEY or ""
@@ -33,14 +34,14 @@ def get_payment_config():
         print("WARNING: STRIPE_PUBLISHABLE_KEY parece ser una clave secreta (empieza por sk_). No la expondremos al frontend.")
         publishable = ""
 
-    return {
+    return conditional.respond({
         "stripe": {
             "publishableKey": publishable
         },
         "paypal": {
             "clientId": settings.PAYPAL_CLIENT_ID
         }
-    }
+    })
 
 @router.get("/gateways")
 def get_available_gateways(
@@ -1,10 +1,142 @@
-from fastapi import APIRouter
-from db.json_handler import load_products
-from typing import List
-from models.order import Product
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import TypeAdapter
+from core.http_cache import Conditional, conditional_get, encode_json, version_etag
+from core.projection import Fields, fields_query
+from services.catalog_service import get_catalog_service
+from services.response_cache import get_response_cache
+from services.search_index import get_search_index, tokenize
+from typing import List, Literal, Optional
+from models.order import Product, ProductChanges, ProductPage, ProductSearchResult
 
 router = APIRouter()
 
+_PRODUCT_LIST = TypeAdapter(List[Product])
+
 @router.get("/products", response_model=List[Product])
-def get_all_products():
-    return load_products()
+def get_all_products(
+    fields: Fields = Depends(fields_query(Product)),
+    conditional: Conditional = Depends(conditional_get("products")),
+):
+    """
+    Catálogo completo como lista (el formato de siempre). Para listados
+    grandes usar /products/page, paginado y con filtros.
+    Con fields=nombre,precio los items solo llevan esos campos.
+    """
+    catalog = get_catalog_service()
+    cache = get_response_cache()
+    key = (("all", True), ("fields", fields))
+    version = catalog.version
+    cached = conditional.not_modified(version_etag("catalog", version, key), catalog.last_modified)
+    if cached is not None:
+        return cached
+    body = cache.get(version, key)
+    if body is None:
+        products = catalog.all(fields)
+        if fields is None:
+            body = _PRODUCT_LIST.dump_json(_PRODUCT_LIST.validate_python(products))
+        else:
+            body = encode_json(products)
+        cache.put(version, key, body)
+    return conditional.respond(body, etag=version_etag("catalog", version, key), last_modified=catalog.last_modified)
+
+@router.get("/products/page", response_model=ProductPage)
+def get_products_page(
+    limit: int = Query(24, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    sort: Literal["name", "name_desc", "price_asc", "price_desc", "newest"] = "name",
+    categoria: Optional[str] = None,
+    marca: Optional[str] = None,
+    status: Optional[str] = None,
+    destacado: Optional[bool] = None,
+    min_precio: Optional[float] = Query(None, ge=0),
+    max_precio: Optional[float] = Query(None, ge=0),
+    fields: Fields = Depends(fields_query(Product)),
+    conditional: Conditional = Depends(conditional_get("products")),
+):
+    """
+    Catálogo paginado por cursor, con filtros, orden y facetas (GET
+    /products sigue devolviendo la lista completa). Para la página
+    siguiente se repite la consulta con cursor=next_cursor.
+    Con fields=nombre,precio los items solo llevan esos campos.
+
+    La respuesta codificada se cachea por versión del catálogo: mientras
+    nadie modifique productos se sirven los mismos bytes sin validar ni
+    serializar de nuevo. El ETag sale de esa misma versión, así que un
+    cliente con la página al día recibe un 304 sin que se consulte nada.
+    """
+    catalog = get_catalog_service()
+    cache = get_response_cache()
+    params = dict(
+        limit=limit, cursor=cursor, sort=sort,
+        categoria=categoria, marca=marca, status=status, destacado=destacado,
+        min_precio=min_precio, max_precio=max_precio, fields=fields,
+    )
+    key = tuple(params.items())
+    version = catalog.version
+    cached = conditional.not_modified(version_etag("catalog", version, key), catalog.last_modified)
+    if cached is not None:
+        return cached
+    body = cache.get(version, key)
+    if body is None:
+        try:
+            page = catalog.query(**params)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        version = page.pop("version")
+        if fields is None:
+            body = ProductPage.model_validate(page).model_dump_json().encode("utf-8")
+        else:
+            # Proyección: los items ya vienen recortados desde el catálogo
+            body = encode_json(page)
+        cache.put(version, key, body)
+    # Last-Modified se lee después de los datos: nunca es anterior a ellos
+    return conditional.respond(body, etag=version_etag("catalog", version, key), last_modified=catalog.last_modified)
+
+@router.get("/products/changes", response_model=ProductChanges)
+def get_product_changes(
+    since: int = Query(..., ge=0, description="version de la última sincronización"),
+    conditional: Conditional = Depends(conditional_get("products")),
+):
+    """
+    Sincronización incremental del catálogo para cachés de cliente: productos
+    creados o modificados desde la versión `since` (upserts) e ids borrados
+    (deletes). El cliente guarda `version` para la siguiente llamada.
+
+    Si `since` es demasiado antigua para el diario de cambios la respuesta
+    trae full=true y el catálogo completo en upserts.
+    """
+    catalog = get_catalog_service()
+    cached = conditional.not_modified(version_etag("changes", catalog.version, since), catalog.last_modified)
+    if cached is not None:
+        return cached
+    delta = catalog.changes(since)
+    body = ProductChanges.model_validate(delta).model_dump_json().encode("utf-8")
+    return conditional.respond(
+        body, etag=version_etag("changes", delta["version"], since), last_modified=catalog.last_modified
+    )
+
+@router.get("/products/search", response_model=ProductSearchResult)
+def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    mode: Literal["full", "prefix"] = "full",
+    limit: int = Query(20, ge=1, le=50),
+    status: Optional[str] = None,
+):
+    """
+    Búsqueda de texto en nombre, descripción, marca y categoría, sin
+    distinguir mayúsculas ni tildes ("grafica" encuentra "Gráfica").
+    mode=prefix es para typeahead: la última palabra puede estar incompleta.
+    """
+    catalog = get_catalog_service()
+    index = get_search_index()
+    # Trae los cambios de otros workers (el índice recibe el evento)
+    catalog.refresh()
+    allowed = catalog.ids("status", status) if status else None
+    hits, total = index.search(q, limit=limit, prefix=mode == "prefix", allowed=allowed)
+    items = [p for p in (catalog.get(product_id) for product_id, _ in hits) if p is not None]
+    suggestions = []
+    if mode == "prefix":
+        terms = tokenize(q)
+        if terms:
+            suggestions = index.suggest(terms[-1])
+    return {"items": items, "total": total, "suggestions": suggestions}
@@ -1,10 +1,16 @@
 # backend/api/routes/vendor.py
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ValidationError
 from core.security import get_current_user
+from core.http_cache import Conditional, conditional_get, version_etag
+from core.projection import Fields, fields_query
+from models.order import ProductDetail
 from models.user import User
-from db.json_handler import read_json, write_json
+from db.json_handler import read_json, update_order, run_in_db_executor
+from services.catalog_service import get_catalog_service, ProductNotFoundError
+from services.product_transfer import MEDIA_TYPES, export_lines, read_records
 from datetime import datetime
 
 # ==========================================
@@ -34,6 +40,11 @@ class ProductUpdate(BaseModel):
 class OrderStatusUpdate(BaseModel):
     status: str
 
+# Importación masiva: filas como máximo por archivo
+MAX_IMPORT_ROWS = 5000
+# Columnas de la exportación (las de ProductCreate se pueden volver a importar)
+EXPORT_COLUMNS = ("id", *ProductCreate.model_fields, "status", "created_at", "updated_at")
+
 # ==========================================
 # MIDDLEWARE DE AUTENTICACIÓN
 # ==========================================
@@ -63,19 +74,28 @@ router = APIRouter(
 # ==========================================
 
 @router.get("/products")
-def get_my_products(current_user: User = Depends(get_current_vendor_user)):
-    """Obtiene todos los productos del vendedor autenticado"""
+def get_my_products(
+    current_user: User = Depends(get_current_vendor_user),
+    fields: Fields = Depends(fields_query(ProductDetail)),
+    conditional: Conditional = Depends(conditional_get("vendor_products")),
+):
+    """Obtiene todos los productos del vendedor autenticado (?fields= para recortarlos)"""
     try:
-        data = read_json("productos.json")
-        products = data.get("productos", [])
-        
-        # Filtrar solo los productos de este vendedor
-        my_products = [
-            p for p in products 
-            if p.get("vendor_id") == current_user.email
-        ]
+        catalog = get_catalog_service()
+        # ETag por versión del catálogo y vendedor: si no cambió, 304 sin buscar
+        etag = version_etag("vendor", catalog.version, current_user.email, fields)
+        cached = conditional.not_modified(etag, catalog.last_modified)
+        if cached is not None:
+            return cached
+
+        # Índice por vendedor: solo se recorren sus productos
+        my_products = catalog.find(fields, vendor_id=current_user.email)
         
-        return {"products": my_products, "total": len(my_products)}
+        return conditional.respond(
+            {"products": my_products, "total": len(my_products)},
+            etag=etag,
+            last_modified=catalog.last_modified,
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al cargar productos: {str(e)}")
 
@@ -84,33 +104,8 @@ def get_my_products(current_user: User = Depends(get_current_vendor_user)):
 def create_product(product: ProductCreate, current_user: User = Depends(get_current_vendor_user)):
     """Crea un nuevo producto (requiere aprobación del admin)"""
     try:
-        data = read_json("productos.json")
-        products = data.get("productos", [])
-        
-        # Generar ID único
-        new_id = max([p.get("id", 0) for p in products], default=0) + 1
-        
-        # Crear el nuevo producto
-        new_product = {
-            "id": new_id,
-            "nombre": product.nombre,
-            "descripcion": product.descripcion,
-            "precio": product.precio,
-            "categoria": product.categoria,
-            "marca": product.marca,
-            "stock": product.stock,
-            "imagen": product.imagen,
-            "destacado": product.destacado,
-            "vendor_id": current_user.email,
-            "vendor_name": current_user.nombre,
-            "status": "pending",  # Requiere aprobación
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
-        
-        products.append(new_product)
-        data["productos"] = products
-        write_json("productos.json", data)
+        # Crear el nuevo producto (el servicio genera el ID único)
+        new_product = get_catalog_service().create(_new_product_fields(product, current_user))
         
         return {
             "message": "Producto creado exitosamente (pendiente de aprobación)",
@@ -120,6 +115,87 @@ def create_product(product: ProductCreate, current_user: User = Depends(get_curr
         raise HTTPException(status_code=500, detail=f"Error al crear producto: {str(e)}")
 
 
+def _new_product_fields(product: ProductCreate, current_user: User) -> dict:
+    """Campos de un producto nuevo del vendedor (sin id: lo asigna el catálogo)."""
+    now = datetime.now().isoformat()
+    return {
+        "nombre": product.nombre,
+        "descripcion": product.descripcion,
+        "precio": product.precio,
+        "categoria": product.categoria,
+        "marca": product.marca,
+        "stock": product.stock,
+        "imagen": product.imagen,
+        "destacado": product.destacado,
+        "vendor_id": current_user.email,
+        "vendor_name": current_user.nombre,
+        "status": "pending",  # Requiere aprobación
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+@router.post("/products/import")
+async def import_products(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "ndjson",
+    current_user: User = Depends(get_current_vendor_user)
+):
+    """
+    Alta masiva de productos desde un CSV (con cabecera) o NDJSON enviado como
+    cuerpo de la petición. Cada fila se valida con ProductCreate según llega;
+    las válidas se guardan juntas en una sola escritura y las demás se
+    devuelven en `errors` con su número de fila.
+    """
+    new_products = []
+    errors = []
+    try:
+        async for row, record, error in read_records(request.stream(), format):
+            if row > MAX_IMPORT_ROWS:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Máximo {MAX_IMPORT_ROWS} productos por importación"
+                )
+            if error is None:
+                try:
+                    product = ProductCreate.model_validate(record)
+                    new_products.append(_new_product_fields(product, current_user))
+                    continue
+                except ValidationError as e:
+                    error = "; ".join(
+                        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+                    )
+            errors.append({"row": row, "error": error})
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar en UTF-8")
+
+    try:
+        created = await run_in_db_executor(get_catalog_service().create_many, new_products)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al importar productos: {str(e)}")
+
+    return {
+        "message": f"{len(created)} productos importados (pendientes de aprobación)",
+        "created": len(created),
+        "ids": [p["id"] for p in created],
+        "errors": errors
+    }
+
+
+@router.get("/products/export")
+def export_products(
+    format: Literal["csv", "ndjson"] = "csv",
+    current_user: User = Depends(get_current_vendor_user)
+):
+    """Descarga los productos del vendedor en CSV o NDJSON, generado por partes"""
+    products = get_catalog_service().iter_by("vendor_id", current_user.email)
+    return StreamingResponse(
+        export_lines(products, format, EXPORT_COLUMNS),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="productos.{format}"'}
+    )
+
+
 @router.put("/products/{product_id}")
 def update_product(
     product_id: int,
@@ -127,33 +203,23 @@ def update_product(
     current_user: User = Depends(get_current_vendor_user)  # ✅ CORREGIDO
 ):
     """Actualiza un producto propio del vendedor"""
-    try:
-        data = read_json("productos.json")
-        products = data.get("productos", [])
-        
-        # Buscar el producto
-        product = next((p for p in products if p["id"] == product_id), None)
-        if not product:
-            raise HTTPException(status_code=404, detail="Producto no encontrado")
-        
+    def check_owner(product):
         # Verificar que el producto pertenece al vendedor
         if product.get("vendor_id") != current_user.email:
             raise HTTPException(
                 status_code=403, 
                 detail="No tienes permiso para editar este producto"
             )
-        
+    
+    try:
         # Actualizar solo los campos proporcionados
         update_data = product_update.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            product[key] = value
-        
-        product["updated_at"] = datetime.now().isoformat()
-        
-        data["productos"] = products
-        write_json("productos.json", data)
+        update_data["updated_at"] = datetime.now().isoformat()
+        product = get_catalog_service().update(product_id, update_data, check=check_owner)
         
         return {"message": "Producto actualizado", "product": product}
+    except ProductNotFoundError:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
     except HTTPException:
         raise
     except Exception as e:
@@ -166,28 +232,20 @@ def delete_product(
     current_user: User = Depends(get_current_vendor_user)  # ✅ CORREGIDO
 ):
     """Elimina un producto propio del vendedor"""
-    try:
-        data = read_json("productos.json")
-        products = data.get("productos", [])
-        
-        # Buscar el producto
-        product = next((p for p in products if p["id"] == product_id), None)
-        if not product:
-            raise HTTPException(status_code=404, detail="Producto no encontrado")
-        
+    def check_owner(product):
         # Verificar que el producto pertenece al vendedor
         if product.get("vendor_id") != current_user.email:
             raise HTTPException(
                 status_code=403,
                 detail="No tienes permiso para eliminar este producto"
             )
-        
-        # Eliminar el producto
-        products = [p for p in products if p["id"] != product_id]
-        data["productos"] = products
-        write_json("productos.json", data)
+    
+    try:
+        get_catalog_service().delete(product_id, check=check_owner)
         
         return {"message": "Producto eliminado exitosamente"}
+    except ProductNotFoundError:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
     except HTTPException:
         raise
     except Exception as e:
@@ -203,14 +261,9 @@ def get_my_orders(current_user: User = Depends(get_current_vendor_user)):  # ✅
     """Obtiene las órdenes que contienen productos del vendedor"""
     try:
         orders = read_json("orders.json")
-        data = read_json("productos.json")
-        products = data.get("productos", [])
         
-        # IDs de productos del vendedor
-        my_product_ids = [
-            p["id"] for p in products 
-            if p.get("vendor_id") == current_user.email
-        ]
+        # IDs de productos del vendedor (conjunto: pertenencia O(1))
+        my_product_ids = get_catalog_service().ids("vendor_id", current_user.email)
         
         # Filtrar órdenes que contienen productos del vendedor
         my_orders = []
@@ -239,19 +292,14 @@ def update_order_status(
 ):
     """Actualiza el estado de una orden (ej: marcar como enviado)"""
     try:
-        orders = read_json("orders.json")
-        
-        # Buscar la orden
-        order = next((o for o in orders if o.get("id") == order_id), None)
+        # Actualizar estado (búsqueda por id indexada, sin recorrer las órdenes)
+        order = update_order(order_id, {
+            "estado": update.status,
+            "updated_at": datetime.now().isoformat()
+        })
         if not order:
             raise HTTPException(status_code=404, detail="Orden no encontrada")
         
-        # Actualizar estado
-        order["estado"] = update.status
-        order["updated_at"] = datetime.now().isoformat()
-        
-        write_json("orders.json", orders)
-        
         return {"message": "Orden actualizada", "order": order}
     except HTTPException:
         raise
@@ -267,17 +315,12 @@ def update_order_status(
 def get_vendor_stats(current_user: User = Depends(get_current_vendor_user)):  # ✅ CORREGIDO
     """Obtiene estadísticas de ventas del vendedor"""
     try:
-        data = read_json("productos.json")
-        products = data.get("productos", [])
         orders = read_json("orders.json")
         
         # Productos del vendedor
-        my_products = [
-            p for p in products 
-            if p.get("vendor_id") == current_user.email
-        ]
+        my_products = get_catalog_service().find(vendor_id=current_user.email)
         
-        my_product_ids = [p["id"] for p in my_products]
+        my_product_ids = {p["id"] for p in my_products}
         
         # Calcular estadísticas
         total_sales = 0
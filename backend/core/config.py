@@ -16,6 +16,73 @@ class Settings(BaseSettings):
     PAYPAL_CLIENT_SECRET: str = ""
     PAYPAL_MODE: str = "sandbox"
 
+    # Persistencia (db/json_handler.py)
+    # "always": fsync en cada commit | "batch": agrupa escrituras durante
+    # DB_GROUP_COMMIT_WINDOW_MS y hace un solo fsync | "none": sin fsync
+    DB_DURABILITY: str = "always"
+    DB_GROUP_COMMIT_WINDOW_MS: int = 5
+    # Formato de los archivos del motor JSON (ver db/formats.py):
+    # json | json-compact | orjson | msgpack | marshal
+    DB_FORMAT: str = "json"
+    # Formato por archivo, p. ej. "productos.json=orjson,users.json=msgpack"
+    DB_FORMATS_STR: str = ""
+    # Motor de almacenamiento: "json" (archivos en db/) | "sqlite"
+    # Para pasar a SQLite: python -m db.migrate y luego STORAGE_ENGINE=sqlite
+    STORAGE_ENGINE: str = "json"
+    SQLITE_PATH: str = ""  # vacío = db/merify.sqlite3
+    # Motor JSON: cada cuánto se eliminan los shards de carritos vacíos (0 = nunca)
+    CART_COMPACT_INTERVAL_SECONDS: int = 300
+    # Motor JSON: archivos con snapshot en la caché de lectura y con escritor
+    # en memoria (LRU); cada carrito es un archivo, así que crece con los usuarios
+    DB_CACHE_MAX_ENTRIES: int = 10_000
+    # Motor JSON: tamaño máximo de cada segmento del ledger de órdenes
+    ORDER_SEGMENT_MAX_BYTES: int = 8 * 1024 * 1024
+    # Hilos para el acceso a disco desde rutas async (aread_json, ...)
+    DB_IO_WORKERS: int = 8
+    # Versiones del catálogo que recuerda el diario de cambios
+    # (/api/products/changes); más atrás se envía el catálogo completo
+    CATALOG_JOURNAL_SIZE: int = 500
+
+    # Inventario (services/inventory_service.py): duración de una reserva,
+    # cada cuánto se guardan las ventas en productos.json y franjas de bloqueo
+    INVENTORY_RESERVATION_TTL_SECONDS: int = 900
+    INVENTORY_FLUSH_INTERVAL_SECONDS: float = 2.0
+    INVENTORY_LOCK_STRIPES: int = 64
+
+    # Modo sin estado (core/security.py): el usuario sale de los claims del
+    # access token, que dura poco y se renueva con el refresh token; las
+    # revocaciones (borrados, estado, contraseña) van a core/revocation.py
+    AUTH_STATELESS: bool = False
+    AUTH_STATELESS_TOKEN_MINUTES: int = 5
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+
+    # Contraseñas (core/hashing.py): rondas de sha256_crypt (al cambiarlas,
+    # cada hash se actualiza en el siguiente login del usuario) y procesos
+    # dedicados a hashear (0 = un hilo del propio proceso)
+    PASSWORD_HASH_ROUNDS: int = 535000
+    PASSWORD_HASH_WORKERS: int = 2
+
+    # Límite de intentos de login/registro/olvido (core/rate_limit.py):
+    # "memory" (por worker) | "sqlite" (compartido entre workers);
+    # reglas "ruta.ip|ruta.email=capacidad/segundos" separadas por ";"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SQLITE_PATH: str = ""  # vacío = db/ratelimit.sqlite3
+    RATE_LIMITS_STR: str = ""
+    # Claves activas como máximo en el backend "memory"; al llegar al tope
+    # las claves nuevas esperan (no se descarta ningún bucket con deuda)
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    # Tomar la IP de X-Forwarded-For (solo detrás de un proxy de confianza)
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+
+    # Caché de usuarios autenticados (core/principal_cache.py)
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 4096
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+
+    # Cache-Control por política de las rutas de lectura (core/http_cache.py),
+    # separadas por ";": "products=public, max-age=30;admin_config=no-store"
+    HTTP_CACHE_CONTROL_STR: str = ""
+
     class Config:
         env_file = ".env"
 
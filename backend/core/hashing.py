@@ -0,0 +1,94 @@
+# backend/core/hashing.py
+"""
+Hash y verificación de contraseñas en un pool de procesos propio.
+
+sha256_crypt es puro cálculo: hecho en el pool de hilos de FastAPI, una
+ola de logins deja sin hilos (y sin GIL) al resto de rutas. Aquí corre en
+PASSWORD_HASH_WORKERS procesos aparte y las rutas solo esperan el resultado,
+así que el coste de los hashes queda acotado a esos núcleos.
+
+Este módulo no importa la configuración: los procesos del pool se arrancan
+con "spawn" e importan solo lo necesario para hashear.
+"""
+
+import asyncio
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+
+@lru_cache(maxsize=8)
+def password_context(rounds: int) -> CryptContext:
+    """
+    Contexto sha256_crypt con coste `rounds`. min y max iguales al coste
+    hacen que needs_update marque cualquier hash con otro número de rondas,
+    así al cambiar PASSWORD_HASH_ROUNDS se rehashean en el siguiente login.
+    """
+    return CryptContext(
+        schemes=["sha256_crypt"],
+        deprecated="auto",
+        sha256_crypt__default_rounds=rounds,
+        sha256_crypt__min_rounds=rounds,
+        sha256_crypt__max_rounds=rounds,
+    )
+
+# --- Funciones que corren en los procesos del pool ---
+def hash_password(password: str, rounds: int) -> str:
+    return password_context(rounds).hash(password)
+
+def verify_and_update(password: str, hashed_password: Optional[str], rounds: int) -> Tuple[bool, Optional[str]]:
+    """(la contraseña es correcta, hash nuevo si el guardado usa otro coste)."""
+    if not hashed_password:
+        return False, None
+    try:
+        return password_context(rounds).verify_and_update(password, hashed_password)
+    except ValueError:
+        # Hash con un formato desconocido o dañado
+        return False, None
+
+class PasswordHasher:
+    """
+    Pool acotado para hashear y verificar contraseñas desde rutas async.
+    Con workers=0 se usa un hilo en el propio proceso (p. ej. entornos sin
+    multiprocessing).
+    """
+
+    def __init__(self, rounds: int, workers: int):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.workers > 0:
+                        # spawn: un fork de un proceso con hilos puede heredar locks tomados
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="password-hash")
+                    atexit.register(self.shutdown)
+        return self._executor
+
+    async def hash(self, password: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """(correcta, hash nuevo o None): si hay hash nuevo hay que guardarlo."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), verify_and_update, password, hashed_password, self.rounds
+        )
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
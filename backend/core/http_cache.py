@@ -0,0 +1,164 @@
+# backend/core/http_cache.py
+"""
+Peticiones condicionales HTTP (ETag / If-None-Match / Last-Modified) para
+las rutas de lectura.
+
+Cada ruta declara la dependencia `conditional_get("<política>")` y responde
+a través del objeto que recibe:
+
+    @router.get("/algo")
+    def get_algo(conditional: Conditional = Depends(conditional_get("algo"))):
+        cached = conditional.not_modified(version_etag("algo", version))
+        if cached is not None:
+            return cached          # 304 sin calcular el cuerpo
+        return conditional.respond(datos, etag=version_etag("algo", version))
+
+Si la ruta conoce una versión de los datos (p. ej. la del catálogo) puede
+comprobar el ETag antes de hacer ningún trabajo; si no, `respond` calcula un
+ETag fuerte con el hash del cuerpo y al menos se ahorra el ancho de banda.
+
+Cache-Control se elige por política: POLICIES tiene los valores por defecto
+y HTTP_CACHE_CONTROL_STR en core/config.py los sobrescribe.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from core.config import settings
+
+# Cache-Control por defecto de cada política. "no-cache" deja guardar la
+# respuesta pero obliga a revalidarla (y la revalidación es un 304 barato).
+POLICIES: Dict[str, str] = {
+    "products": "public, no-cache",
+    "payments_config": "public, max-age=300",
+    "admin_config": "private, no-cache",
+    "vendor_products": "private, no-cache",
+}
+DEFAULT_POLICY = "no-cache"
+
+def _configured_policies() -> Dict[str, str]:
+    """
+    HTTP_CACHE_CONTROL_STR = "products=public, max-age=30;admin_config=no-store".
+    Las entradas van separadas por ";" porque Cache-Control ya usa comas.
+    """
+    policies = {}
+    for entry in settings.HTTP_CACHE_CONTROL_STR.split(";"):
+        if "=" in entry:
+            name, value = entry.split("=", 1)
+            policies[name.strip()] = value.strip()
+    return policies
+
+def cache_control_for(policy: str) -> str:
+    """Valor de Cache-Control de una política (configurado o por defecto)."""
+    return _configured_policies().get(policy, POLICIES.get(policy, DEFAULT_POLICY))
+
+# --- ETags ---
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+def content_etag(body: bytes) -> str:
+    """ETag fuerte a partir del contenido exacto de la respuesta."""
+    return f'"{_digest(body)}"'
+
+def version_etag(namespace: str, version: Any, *key: Any) -> str:
+    """
+    ETag fuerte a partir de la versión de los datos y de lo que distingue a
+    la respuesta dentro de esa versión (parámetros, usuario...). `key` debe
+    tener un repr estable entre procesos (tuplas de str, números, None).
+    """
+    suffix = f"-{_digest(repr(key).encode('utf-8'))}" if key else ""
+    return f'"{namespace}-v{version}{suffix}"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match usa comparación débil: W/"x" coincide con "x"
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def _http_date(timestamp: float) -> str:
+    return format_datetime(datetime.fromtimestamp(int(timestamp), timezone.utc), usegmt=True)
+
+def _parse_http_date(value: str) -> Optional[float]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def encode_json(content: Any) -> bytes:
+    """JSON compacto en UTF-8 (el mismo formato que model_dump_json)."""
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class Conditional:
+    """
+    Validadores de una petición GET concreta. Lo crea la dependencia
+    `conditional_get`; las rutas no lo instancian.
+    """
+
+    def __init__(self, request: Request, cache_control: str):
+        self.if_none_match = request.headers.get("if-none-match")
+        self.if_modified_since = request.headers.get("if-modified-since")
+        self.cache_control = cache_control
+
+    def _headers(self, etag: str, last_modified: Optional[float]) -> Dict[str, str]:
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if last_modified is not None:
+            headers["Last-Modified"] = _http_date(last_modified)
+        return headers
+
+    def is_fresh(self, etag: str, last_modified: Optional[float] = None) -> bool:
+        """True si la copia del cliente sigue valiendo (RFC 9110, 13.2.2)."""
+        if self.if_none_match is not None:
+            # Si viene If-None-Match se ignora If-Modified-Since
+            return _etag_matches(self.if_none_match, etag)
+        if self.if_modified_since is not None and last_modified is not None:
+            since = _parse_http_date(self.if_modified_since)
+            # Last-Modified tiene resolución de segundos
+            return since is not None and int(last_modified) <= since
+        return False
+
+    def not_modified(self, etag: str, last_modified: Optional[float] = None) -> Optional[Response]:
+        """Respuesta 304 si el cliente ya tiene esta versión; None si hay que responder."""
+        if not self.is_fresh(etag, last_modified):
+            return None
+        return Response(status_code=304, headers=self._headers(etag, last_modified))
+
+    def respond(
+        self,
+        content: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[float] = None,
+        media_type: str = "application/json",
+    ) -> Response:
+        """
+        Respuesta 200 con ETag, Cache-Control y Last-Modified, o 304 si el
+        cliente ya la tiene. `content` puede ser bytes ya codificados o
+        cualquier valor serializable a JSON. Sin `etag` se usa el hash del
+        cuerpo.
+        """
+        body = content if isinstance(content, bytes) else encode_json(content)
+        if etag is None:
+            etag = content_etag(body)
+        cached = self.not_modified(etag, last_modified)
+        if cached is not None:
+            return cached
+        return Response(content=body, media_type=media_type, headers=self._headers(etag, last_modified))
+
+def conditional_get(policy: str):
+    """Dependencia de FastAPI: validadores de la petición + Cache-Control de `policy`."""
+    def dependency(request: Request) -> Conditional:
+        return Conditional(request, cache_control_for(policy))
+    return dependency
@@ -0,0 +1,163 @@
+# backend/core/principal_cache.py
+"""
+Caché de usuarios autenticados para get_current_user.
+
+Cada token ya validado guarda el User que le corresponde, así una petición
+con un token conocido no decodifica el JWT ni busca al usuario. La entrada
+dura AUTH_PRINCIPAL_CACHE_TTL_SECONDS, nunca más allá del `exp` del token,
+en una LRU de AUTH_PRINCIPAL_CACHE_SIZE tokens.
+
+Se invalida por email cuando el usuario cambia en este proceso (estado,
+borrado, contraseña). Si users.json cambia en el motor (p. ej. escribió
+otro worker) y el motor sabe dar una firma barata del archivo, se vuelven
+a leer los perfiles de los emails en caché y solo se olvidan los que ya
+no coinciden. Las revocaciones no necesitan vigilarse aquí:
+get_current_user consulta la lista de revocación en cada acierto con los
+claims guardados.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+from core.config import settings
+from db.engines import get_engine
+from db.json_handler import USERS_FILE
+from models.user import User
+
+class _Entry:
+    __slots__ = ("user", "claims", "expires_at")
+
+    def __init__(self, user: User, claims: Dict[str, Any], expires_at: float):
+        self.user = user
+        self.claims = claims
+        self.expires_at = expires_at
+
+class PrincipalCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_email: Dict[str, Set[str]] = {}
+        self._files_token: Any = None
+        # Sube con cada invalidación: un put() con datos leídos antes se descarta
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def _drop(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._by_email.get(entry.user.email)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_email[entry.user.email]
+
+    def _check_files(self):
+        # Si la firma de users.json cambió, se comparan los usuarios en caché
+        # con su perfil actual. Un motor sin firma (None) no invalida.
+        files_token = get_engine().change_token(USERS_FILE.name)
+        if files_token is None or files_token == self._files_token:
+            return
+        with self._lock:
+            if files_token == self._files_token:
+                return
+            self._files_token = files_token
+            # Un put() con un perfil leído antes del cambio se descarta
+            self._generation += 1
+            emails = list(self._by_email)
+        if not emails:
+            return
+        from services.user_directory import get_user_directory
+        directory = get_user_directory()
+        profiles = {email: directory.get(email) for email in emails}
+        with self._lock:
+            dropped = 0
+            for email, profile in profiles.items():
+                current = User(**profile) if profile is not None else None
+                for token in list(self._by_email.get(email, ())):
+                    if self._entries[token].user != current:
+                        self._drop(token)
+                        dropped += 1
+            if dropped:
+                self._stats["invalidations"] += 1
+
+    @property
+    def generation(self) -> int:
+        """Tomarla antes de leer al usuario y pasarla a put()."""
+        return self._generation
+
+    def get(self, token: str) -> Optional[Tuple[User, Dict[str, Any]]]:
+        """(usuario, claims del token) si está en caché y sin caducar."""
+        self._check_files()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry.expires_at <= now:
+                self._drop(token)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(token)
+            self._stats["hits"] += 1
+            return entry.user, entry.claims
+
+    def put(self, token: str, user: User, claims: Dict[str, Any], generation: int):
+        """
+        Guarda el usuario de un token válido con sus claims; el `exp` de los
+        claims limita su duración. Si hubo una invalidación desde
+        `generation` no se guarda.
+        """
+        expires_at = time.time() + self.ttl
+        if claims.get("exp") is not None:
+            expires_at = min(expires_at, float(claims["exp"]))
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._drop(token)
+            self._entries[token] = _Entry(user, claims, expires_at)
+            self._by_email.setdefault(user.email, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, email: str):
+        """Olvida todos los tokens de un usuario (cambió o se borró)."""
+        with self._lock:
+            tokens = self._by_email.pop(email, set())
+            for token in tokens:
+                self._entries.pop(token, None)
+            if tokens:
+                self._stats["invalidations"] += 1
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_email.clear()
+            self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+principal_cache = PrincipalCache(
+    max_entries=max(1, settings.AUTH_PRINCIPAL_CACHE_SIZE),
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+def invalidate_principal(email: str):
+    """Llamar tras modificar o borrar un usuario en users.json."""
+    principal_cache.invalidate(email)
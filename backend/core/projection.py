@@ -0,0 +1,78 @@
+# backend/core/projection.py
+"""
+Proyección de campos (?fields=) para los listados.
+
+    @router.get("/algo")
+    def listar(fields: Fields = Depends(fields_query(Modelo))):
+        return {"items": [project(item, fields) for item in items]}
+
+Los nombres pedidos se validan contra los campos del modelo Pydantic del
+recurso (un campo desconocido es un 400), así que una proyección nunca puede
+sacar datos que la respuesta completa no muestra, como hashed_password. Sin
+`fields` se devuelve todo.
+
+Los valores proyectados pasan por el tipo del campo en el modelo, igual que
+en la respuesta completa (un precio guardado como 600000 sale como 600000.0).
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Type
+from fastapi import HTTPException, Query
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+class FieldSet(tuple):
+    """Campos pedidos (una tupla) y el modelo contra el que se validaron."""
+
+    def __new__(cls, fields: Tuple[str, ...], model: Optional[Type[BaseModel]] = None):
+        field_set = super().__new__(cls, fields)
+        field_set.model = model
+        return field_set
+
+# None = sin proyección (todos los campos)
+Fields = Optional[Tuple[str, ...]]
+
+@lru_cache(maxsize=256)
+def _adapter(model: Type[BaseModel], field: str) -> TypeAdapter:
+    return TypeAdapter(model.model_fields[field].annotation)
+
+def _coerce(model: Type[BaseModel], field: str, value: Any) -> Any:
+    """`value` convertido al tipo del campo y serializado como en la respuesta completa."""
+    adapter = _adapter(model, field)
+    try:
+        return adapter.dump_python(adapter.validate_python(value), mode="json")
+    except ValidationError:
+        # Dato guardado que no encaja con el modelo: se devuelve tal cual
+        return value
+
+def parse_fields(raw: Optional[str], model: Type[BaseModel]) -> Fields:
+    """"nombre,precio" -> ("nombre", "precio"), validado contra `model`."""
+    if raw is None or not raw.strip():
+        return None
+    requested = tuple(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in model.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos no válidos: {', '.join(unknown)}. Disponibles: {', '.join(model.model_fields)}",
+        )
+    return FieldSet(requested, model)
+
+def fields_query(model: Type[BaseModel]):
+    """Dependencia de FastAPI: parámetro ?fields= validado contra `model`."""
+    def dependency(
+        fields: Optional[str] = Query(None, description="Campos a devolver separados por comas"),
+    ) -> Fields:
+        return parse_fields(fields, model)
+    return dependency
+
+def project(item: Dict[str, Any], fields: Fields) -> Dict[str, Any]:
+    """
+    Copia de `item` con solo los campos pedidos (los que falten se omiten),
+    con los tipos del modelo si `fields` viene de parse_fields.
+    """
+    if fields is None:
+        return dict(item)
+    model = getattr(fields, "model", None)
+    if model is None:
+        return {f: item[f] for f in fields if f in item}
+    return {f: _coerce(model, f, item[f]) for f in fields if f in item}
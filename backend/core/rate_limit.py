@@ -0,0 +1,241 @@
+# backend/core/rate_limit.py
+"""
+Límite de peticiones para las rutas de autenticación (login, registro,
+olvido de contraseña), que hashean contraseñas y son las que más CPU
+cuestan por petición.
+
+Cada regla es un token bucket "capacidad/periodo": se permiten ráfagas de
+`capacidad` intentos y se recupera un intento cada periodo/capacidad
+segundos. Cada ruta tiene una regla por IP y otra por email de destino, y
+la petición debe pasar las dos. Al agotarse se responde 429 con
+Retry-After.
+
+Cada clave activa guarda dos números (intentos disponibles y última
+actualización); una clave que ya recuperó todos sus intentos equivale a no
+tenerla y se borra (a más tardar un periodo después de su último
+intento). Backends (RATE_LIMIT_BACKEND):
+
+- "memory": en el proceso. Con varios workers de uvicorn cada uno cuenta
+  por su cuenta (el límite efectivo se multiplica por el número de workers).
+- "sqlite": un archivo SQLite compartido (RATE_LIMIT_SQLITE_PATH), así el
+  límite vale para todos los workers de la máquina.
+
+Las reglas por defecto están en RULES y RATE_LIMITS_STR las sobrescribe:
+"login.ip=20/60;login.email=5/60" (0/60 desactiva una regla).
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from core.config import settings
+
+# regla -> (capacidad, periodo en segundos)
+RULES: Dict[str, Tuple[int, float]] = {
+    "login.ip": (20, 60),
+    "login.email": (5, 60),
+    "register.ip": (10, 3600),
+    "register.email": (3, 3600),
+    "forgot.ip": (10, 3600),
+    "forgot.email": (3, 3600),
+}
+
+def _configured_rules() -> Dict[str, Tuple[int, float]]:
+    rules = dict(RULES)
+    for entry in settings.RATE_LIMITS_STR.split(";"):
+        if "=" not in entry or "/" not in entry:
+            continue
+        name, value = entry.split("=", 1)
+        capacity, period = value.split("/", 1)
+        try:
+            rules[name.strip()] = (int(capacity), float(period))
+        except ValueError:
+            print(f"⚠️  Regla de RATE_LIMITS_STR inválida: {entry!r}")
+    return rules
+
+class MemoryBackend:
+    """
+    Buckets en el proceso, con una cola de expiración por periodo. Nunca se
+    descarta un bucket al que le falten intentos por recuperar (sería
+    quitarle el límite a esa clave): con max_keys claves activas, las
+    nuevas esperan a que expire alguna.
+    """
+
+    blocking = False
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # periodo -> clave -> [intentos disponibles, última actualización].
+        # Cada cola va por orden de uso y un bucket está lleno a más tardar
+        # un periodo después de su último intento, así que la cabeza de cada
+        # cola es siempre la primera en expirar
+        self._queues: Dict[float, "OrderedDict[str, List[float]]"] = {}
+        self._size = 0
+
+    def hit(self, key: str, capacity: int, period: float, now: float) -> float:
+        rate = capacity / period
+        with self._lock:
+            self._expire(now)
+            queue = self._queues.get(period)
+            bucket = queue.pop(key, None) if queue is not None else None
+            if bucket is None:
+                if self._size >= self.max_keys:
+                    return self._next_expiry(now)
+                self._size += 1
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate
+            self._queues.setdefault(period, OrderedDict())[key] = [tokens, now]
+            return retry_after
+
+    def _expire(self, now: float):
+        for period, queue in list(self._queues.items()):
+            while queue:
+                key, bucket = next(iter(queue.items()))
+                if bucket[1] + period > now:
+                    break
+                del queue[key]
+                self._size -= 1
+            if not queue:
+                del self._queues[period]
+
+    def _next_expiry(self, now: float) -> float:
+        """Segundos hasta que expire la primera clave (con la tabla llena)."""
+        return min(next(iter(queue.values()))[1] + period - now for period, queue in self._queues.items())
+
+    def __len__(self) -> int:
+        return self._size
+
+class SQLiteBackend:
+    """Buckets en una tabla SQLite compartida por los workers (BEGIN IMMEDIATE por intento)."""
+
+    blocking = True
+    # Cada cuántos intentos se borran las claves que ya se llenaron
+    EXPIRE_EVERY = 1000
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_full_at ON buckets(full_at)")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, capacity: int, period: float, now: float) -> float:
+        rate = capacity / period
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, "
+                "updated = excluded.updated, full_at = excluded.full_at",
+                (key, tokens, now, now + (capacity - tokens) / rate),
+            )
+            self._hits += 1
+            if self._hits % self.EXPIRE_EVERY == 0:
+                conn.execute("DELETE FROM buckets WHERE full_at <= ?", (now,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return retry_after
+
+def _create_backend():
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return MemoryBackend(max(1, settings.RATE_LIMIT_MAX_KEYS))
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        from db.engines import DB_DIR
+        path = Path(settings.RATE_LIMIT_SQLITE_PATH or "ratelimit.sqlite3")
+        return SQLiteBackend(path if path.is_absolute() else DB_DIR / path)
+    raise ValueError(
+        f"Backend de límites '{settings.RATE_LIMIT_BACKEND}' no soportado. Disponibles: memory, sqlite"
+    )
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+        self.rules = _configured_rules()
+
+    def hit(self, route: str, ip: Optional[str], email: Optional[str]) -> float:
+        """
+        Cuenta un intento contra las reglas de la ruta; devuelve 0 si se
+        permite o los segundos que faltan para el siguiente intento.
+        """
+        now = time.time()
+        retry_after = 0.0
+        for scope, value in (("ip", ip), ("email", email)):
+            rule = self.rules.get(f"{route}.{scope}")
+            if not value or rule is None or rule[0] <= 0 or rule[1] <= 0:
+                continue
+            key = f"{route}:{scope}:{value}"
+            retry_after = max(retry_after, self.backend.hit(key, rule[0], rule[1], now))
+        return retry_after
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(_create_backend())
+    return _limiter
+
+def client_ip(request: Request) -> Optional[str]:
+    """IP del cliente; detrás de un proxy de confianza, la primera de X-Forwarded-For."""
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+async def enforce_rate_limit(route: str, request: Request, email: Optional[str] = None):
+    """
+    Lanza 429 (con Retry-After) si la IP o el email superan el límite de la
+    ruta. Llamar antes de hashear nada.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    limiter = get_rate_limiter()
+    email = email.strip().lower() if email else None
+    if limiter.backend.blocking:
+        from db.json_handler import run_in_db_executor
+        retry_after = await run_in_db_executor(limiter.hit, route, client_ip(request), email)
+    else:
+        retry_after = limiter.hit(route, client_ip(request), email)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiados intentos. Inténtalo de nuevo más tarde.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
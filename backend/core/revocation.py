@@ -0,0 +1,90 @@
+# backend/core/revocation.py
+"""
+Lista de revocación de tokens JWT para el modo sin estado (AUTH_STATELESS).
+
+Un token con sus claims firmados no consulta al usuario, así que hay que
+poder anularlo antes de que expire. Se guardan dos cosas en el documento
+revocations.json del motor:
+
+- subjects: {email: momento}: todo token de ese usuario emitido antes (su
+  "iat") queda anulado. Lo alimentan los borrados, los cambios de estado y
+  los reseteos de contraseña (services/user_directory.py).
+- tokens: {jti: exp}: tokens sueltos anulados, p. ej. un refresh token ya
+  usado (los refresh tokens rotan en cada uso).
+
+Cada entrada se olvida cuando ya no puede quedar un token al que afecte
+(REFRESH_TOKEN_EXPIRE_DAYS para los usuarios, el exp para los jti), así que
+el conjunto se mantiene pequeño y cabe en memoria en cada worker. Los demás
+workers lo recargan cuando cambia el token barato del documento.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+from core.config import settings
+from db.engines import get_engine
+from db.json_handler import transaction
+
+REVOCATIONS_FILE = "revocations.json"
+
+class RevocationList:
+    def __init__(self, retention: float):
+        # Segundos que se recuerda la revocación de un usuario (vida máxima de un token)
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._token: Any = None
+        self._subjects: Dict[str, float] = {}
+        self._tokens: Dict[str, float] = {}
+
+    def _sync(self):
+        engine = get_engine()
+        token = engine.change_token(REVOCATIONS_FILE)
+        with self._lock:
+            if self._loaded and token is not None and token == self._token:
+                return
+        data = engine.load(REVOCATIONS_FILE, {})
+        with self._lock:
+            self._subjects = dict(data.get("subjects", {}))
+            self._tokens = dict(data.get("tokens", {}))
+            self._token = token
+            self._loaded = True
+
+    def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        """El token de estos claims (ya verificados) fue anulado."""
+        self._sync()
+        jti, iat = claims.get("jti"), claims.get("iat")
+        with self._lock:
+            if jti is not None and jti in self._tokens:
+                return True
+            revoked_at = self._subjects.get(claims.get("sub"))
+        # Un token sin iat no se puede situar antes o después: se anula
+        return revoked_at is not None and (iat is None or float(iat) < revoked_at)
+
+    def _write(self, mutate: Callable[[Dict[str, Any]], None]):
+        now = time.time()
+        with transaction(REVOCATIONS_FILE) as data:
+            mutate(data)
+            data["subjects"] = {
+                s: t for s, t in data.get("subjects", {}).items() if t > now - self.retention
+            }
+            data["tokens"] = {j: exp for j, exp in data.get("tokens", {}).items() if exp > now}
+            subjects, tokens = dict(data["subjects"]), dict(data["tokens"])
+        with self._lock:
+            # La firma del documento ya cambió: la siguiente lectura recarga
+            self._subjects, self._tokens = subjects, tokens
+
+    def revoke_subjects(self, emails: Iterable[str]):
+        """Anula todos los tokens emitidos hasta ahora para esos usuarios."""
+        emails = list(emails)
+        if not emails:
+            return
+        now = time.time()
+        self._write(lambda data: data.setdefault("subjects", {}).update(dict.fromkeys(emails, now)))
+
+    def revoke_token(self, jti: str, exp: Optional[float]):
+        """Anula un token concreto hasta su expiración."""
+        expires = float(exp) if exp is not None else time.time() + self.retention
+        self._write(lambda data: data.setdefault("tokens", {}).__setitem__(jti, expires))
+
+revocation_list = RevocationList(retention=settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400)
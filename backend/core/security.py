@@ -1,19 +1,25 @@
 # backend/core/security.py (CORREGIDO Y COMPLETO)
 
+import time
+import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Dict, Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from core.config import settings
 from models.user import User
 from models.token import TokenData
-from db.json_handler import load_users
+from core.principal_cache import principal_cache
+from core.hashing import PasswordHasher, password_context
+from core.revocation import revocation_list
 
 # --- Hashing de Contraseña ---
 # Usar "sha256_crypt" es correcto para evitar el límite de 72 bytes de bcrypt.
-pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
+# El coste es PASSWORD_HASH_ROUNDS; las rutas usan password_hasher (pool de
+# procesos, ver core/hashing.py) y las funciones síncronas quedan para scripts.
+pwd_context = password_context(settings.PASSWORD_HASH_ROUNDS)
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_ROUNDS, max(0, settings.PASSWORD_HASH_WORKERS))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
@@ -28,7 +34,10 @@ def get_password_hash(password: str) -> str:
 
 # --- Creación de Token JWT ---
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Crea un nuevo token de acceso JWT."""
+    """
+    Crea un nuevo token de acceso JWT. Lleva un "jti" propio y el "iat" con
+    milisegundos, que es lo que usa la lista de revocación (core/revocation.py).
+    """
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -36,43 +45,138 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+    to_encode.setdefault("iat", round(time.time(), 3))
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def create_session_tokens(user: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Access token + refresh token de un usuario al iniciar sesión.
+
+    El access token lleva los claims del perfil (sub, role, nombre, tipo):
+    con AUTH_STATELESS get_current_user construye el usuario con ellos, sin
+    leerlo, y dura AUTH_STATELESS_TOKEN_MINUTES. El refresh token solo sirve
+    en /api/auth/refresh para pedir otro par sin volver a hashear la
+    contraseña.
+    """
+    claims = {
+        "sub": user["email"],
+        "role": user.get("role", "customer"),
+        "nombre": user.get("nombre", ""),
+        "tipo": user.get("tipo", "cliente"),
+        "typ": "access",
+    }
+    minutes = settings.AUTH_STATELESS_TOKEN_MINUTES if settings.AUTH_STATELESS else settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    return {
+        "access_token": create_access_token(claims, timedelta(minutes=minutes)),
+        "refresh_token": create_access_token(
+            {"sub": user["email"], "typ": "refresh"},
+            timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        ),
+    }
+
+def decode_refresh_token(token: str) -> Dict[str, Any]:
+    """Claims de un refresh token válido y no revocado; 401 si no lo es."""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        payload = {}
+    if (
+        payload.get("typ") != "refresh"
+        or not payload.get("sub")
+        or not payload.get("jti")
+        or revocation_list.is_revoked(payload)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token inválido o revocado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
 
 # --- Dependencias de Seguridad para Rutas ---
 def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """
     Dependencia que decodifica el token para obtener el usuario actual.
     Lanza una excepción 401 si el token es inválido o el usuario no existe.
+    Los tokens ya validados se resuelven desde core/principal_cache.py.
+
+    Con AUTH_STATELESS, un access token con los claims del perfil se
+    resuelve con ellos (firma + lista de revocación), sin leer al usuario.
     """
+    if settings.AUTH_STATELESS:
+        user = _user_from_claims(token)
+        if user is not None:
+            return user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cached = principal_cache.get(token)
+    if cached is not None:
+        user, claims = cached
+        # La revocación puede venir de otro worker: se comprueba también en los aciertos
+        if revocation_list.is_revoked(claims):
+            principal_cache.invalidate(user.email)
+            raise credentials_exception
+        return user
+    generation = principal_cache.generation
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: Optional[str] = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("typ") == "refresh":
             raise credentials_exception
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
+    if revocation_list.is_revoked(payload):
+        raise credentials_exception
     
-    users = load_users()
-    # load_users devuelve un diccionario de diccionarios, no una lista.
-    # Así que necesitamos encontrar el usuario por su email.
-    user_data = None
-    for user_record in users.values():
-        if user_record['email'] == token_data.email:
-            user_data = user_record
-            break
+    # Perfil por email en el directorio (sin cargar contraseñas)
+    from services.user_directory import get_user_directory
+    user_data = get_user_directory().get(token_data.email)
 
     if user_data is None:
         raise credentials_exception
         
-    return User(**user_data)
+    user = User(**user_data)
+    principal_cache.put(token, user, payload, generation)
+    return user
+
+
+def _user_from_claims(token: str) -> Optional[User]:
+    """
+    Usuario construido solo con los claims firmados de un access token. None
+    si el token no los lleva (p. ej. emitido antes de este modo): entonces
+    se sigue el camino normal.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="No se pudieron validar las credenciales",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    if payload.get("typ") != "access" or not payload.get("sub") or "role" not in payload:
+        return None
+    if revocation_list.is_revoked(payload):
+        raise credentials_exception
+    try:
+        return User(
+            nombre=payload.get("nombre", ""),
+            email=payload["sub"],
+            tipo=payload.get("tipo", "cliente"),
+            role=payload["role"],
+        )
+    except ValueError:
+        raise credentials_exception
 
 
 def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
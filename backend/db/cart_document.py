@@ -0,0 +1,124 @@
+# backend/db/cart_document.py
+"""
+Formato guardado del carrito de un usuario.
+
+    {
+      "items": {"<producto_id>": {id, producto_id, nombre, precio, cantidad, imagen}},
+      "ids": {"<id del item>": producto_id},
+      "next_id": 4,
+      "total": 129900.0,
+      "count": 3
+    }
+
+Los items van por producto_id y el índice "ids" lleva del id del item a su
+producto, así que añadir, cambiar o quitar un item no recorre el carrito.
+El total y el número de unidades se mantienen en cada cambio, y el resumen
+es una lectura directa.
+
+Los carritos antiguos (una lista de items) se convierten con upgrade_cart
+al leerlos y quedan en el formato nuevo en su siguiente modificación.
+"""
+
+from typing import Any, Dict, List, Optional
+
+def _new_cart() -> Dict[str, Any]:
+    return {"items": {}, "ids": {}, "next_id": 1, "total": 0.0, "count": 0}
+
+def upgrade_cart(value: Any) -> Dict[str, Any]:
+    """Carrito en el formato actual; una lista de items (formato antiguo) se convierte."""
+    if isinstance(value, dict) and "items" in value:
+        return value
+    cart = CartDocument(_new_cart())
+    for item in value if isinstance(value, list) else []:
+        cart._insert(dict(item))
+    return cart.data
+
+class CartDocument:
+    """Operaciones O(1) sobre un carrito en el formato actual (lo modifica en el sitio)."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.data["items"])
+
+    def _account(self, precio: float, cantidad: int):
+        self.data["total"] = round(self.data["total"] + precio * cantidad, 2)
+        self.data["count"] += cantidad
+
+    def _insert(self, item: Dict[str, Any]):
+        item.setdefault("id", self.data["next_id"])
+        key = str(item["producto_id"])
+        existing = self.data["items"].get(key)
+        if existing is not None:
+            # Formato antiguo con el producto repetido: se suman las cantidades
+            existing["cantidad"] += item["cantidad"]
+            self._account(existing.get("precio", 0), item["cantidad"])
+            return
+        self.data["items"][key] = item
+        self.data["ids"][str(item["id"])] = item["producto_id"]
+        self.data["next_id"] = max(self.data["next_id"], item["id"] + 1)
+        self._account(item.get("precio", 0), item.get("cantidad", 0))
+
+    # --- Lectura ---
+    def items(self) -> List[Dict[str, Any]]:
+        return list(self.data["items"].values())
+
+    def get(self, item_id: int) -> Optional[Dict[str, Any]]:
+        producto_id = self.data["ids"].get(str(item_id))
+        return None if producto_id is None else self.data["items"].get(str(producto_id))
+
+    def summary(self) -> Dict[str, Any]:
+        return {"items": self.items(), "total": self.data["total"], "count": self.data["count"]}
+
+    # --- Cambios ---
+    def add(self, producto: Dict[str, Any], cantidad: int) -> Dict[str, Any]:
+        """Añade unidades de un producto; si ya estaba solo suma la cantidad."""
+        item = self.data["items"].get(str(producto["id"]))
+        if item is not None:
+            item["cantidad"] += cantidad
+            self._account(item["precio"], cantidad)
+            return item
+        item = {
+            "id": self.data["next_id"],
+            "producto_id": producto["id"],
+            "nombre": producto["nombre"],
+            "precio": producto["precio"],
+            "cantidad": cantidad,
+            "imagen": producto.get("imagen", "")
+        }
+        self._insert(item)
+        return item
+
+    def set_quantity(self, item_id: int, cantidad: int) -> Optional[Dict[str, Any]]:
+        """Cambia la cantidad de un item (0 o menos lo quita). None si no existe."""
+        item = self.get(item_id)
+        if item is None:
+            return None
+        if cantidad <= 0:
+            self.remove(item_id)
+            return item
+        self._account(item["precio"], cantidad - item["cantidad"])
+        item["cantidad"] = cantidad
+        return item
+
+    def remove(self, item_id: int) -> bool:
+        producto_id = self.data["ids"].pop(str(item_id), None)
+        if producto_id is None:
+            return False
+        item = self.data["items"].pop(str(producto_id))
+        self._account(item["precio"], -item["cantidad"])
+        if not self.data["items"]:
+            # Sin items el total vuelve a 0 exacto (sin restos de redondeo)
+            self.data["total"] = 0.0
+        return True
+
+    def clear(self):
+        """Vacía el carrito; los ids de item siguen creciendo."""
+        self.data.update(items={}, ids={}, total=0.0, count=0)
+
+    def replace(self, items: List[Dict[str, Any]]):
+        """Reemplaza todos los items (p. ej. save_user_cart)."""
+        self.clear()
+        for item in items:
+            self._insert(dict(item))
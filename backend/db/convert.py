@@ -0,0 +1,68 @@
+# backend/db/convert.py
+"""
+Convierte los archivos de datos del motor JSON a otro formato.
+
+Uso (desde la carpeta backend):
+    python -m db.convert                          # al formato configurado de cada archivo
+    python -m db.convert --format msgpack         # todos a msgpack
+    python -m db.convert --format json users.json # solo users.json, legible
+
+Sin --format cada archivo pasa a su formato de DB_FORMAT / DB_FORMATS_STR.
+Con --format conviene fijar el mismo valor en la configuración: si no, la
+siguiente escritura del archivo lo devuelve al formato configurado.
+
+Los shards de carritos (db/carts/) y el ledger de órdenes (db/orders/) no
+se convierten: los shards adoptan DB_FORMAT en su siguiente escritura y el
+ledger es siempre JSON por líneas.
+"""
+
+import argparse
+from pathlib import Path
+from typing import List, Optional, Tuple
+from db import formats
+from db.engines import DB_DIR
+from db.engines.json_engine import _get_lock, _load_data, _save_data
+
+def convert_file(path: Path, codec: formats.Codec) -> Tuple[str, int, int]:
+    """Reescribe un archivo con `codec`; devuelve (formato anterior, bytes antes, bytes después)."""
+    lock = _get_lock(path)
+    lock.acquire_write()
+    try:
+        before = path.read_bytes()
+        previous = formats.detect(before).name
+        data = _load_data(path, None, create=False)
+        if data is None:
+            raise formats.FormatError(f"No se pudo leer {path.name}")
+        _save_data(path, data, codec)
+        return previous, len(before), path.stat().st_size
+    finally:
+        lock.release_write()
+        lock.release_os()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Convierte db/*.json a otro formato de serialización")
+    parser.add_argument("--format", choices=formats.available_formats(), default=None,
+                        help="Formato de destino (por defecto, el configurado para cada archivo)")
+    parser.add_argument("files", nargs="*", help="Archivos de db/ a convertir (por defecto, todos)")
+    args = parser.parse_args(argv)
+
+    paths = [DB_DIR / name for name in args.files] or [
+        path for path in sorted(DB_DIR.glob("*.json")) if not path.name.startswith(".")
+    ]
+    for path in paths:
+        if not path.exists():
+            print(f"⚠️  {path.name}: no existe")
+            continue
+        codec = formats.get_codec(args.format) if args.format else formats.codec_for(path.name)
+        try:
+            previous, before, after = convert_file(path, codec)
+        except formats.FormatError as e:
+            print(f"❌ {path.name}: {e}")
+            continue
+        print(f"✅ {path.name}: {previous} → {codec.name} ({before:,} → {after:,} bytes)")
+        if codec is not formats.codec_for(path.name):
+            print(f"   ⚠️  La configuración dice {formats.codec_for(path.name).name}: "
+                  f"la próxima escritura lo volverá a convertir")
+
+if __name__ == "__main__":
+    main()
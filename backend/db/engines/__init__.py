@@ -0,0 +1,52 @@
+# backend/db/engines/__init__.py
+"""
+Motores de almacenamiento intercambiables (Strategy Pattern).
+El motor activo se elige con STORAGE_ENGINE en core/config.py.
+"""
+
+import threading
+from pathlib import Path
+from typing import Optional
+from core.config import settings
+from .base import StorageEngine, COLLECTIONS
+from .json_engine import JsonEngine
+from .sqlite_engine import SQLiteEngine
+
+# Directorio 'db' (donde viven los archivos JSON)
+DB_DIR = Path(__file__).resolve().parent.parent
+
+_engine: Optional[StorageEngine] = None
+_engine_lock = threading.Lock()
+
+def sqlite_path() -> Path:
+    """Ruta de la base SQLite; las rutas relativas se resuelven desde el directorio db."""
+    path = Path(settings.SQLITE_PATH or "merify.sqlite3")
+    return path if path.is_absolute() else DB_DIR / path
+
+def create_engine(name: str) -> StorageEngine:
+    if name == "json":
+        return JsonEngine(DB_DIR)
+    if name == "sqlite":
+        return SQLiteEngine(sqlite_path())
+    raise ValueError(f"Motor de almacenamiento '{name}' no soportado. Disponibles: json, sqlite")
+
+def get_engine() -> StorageEngine:
+    """Motor activo (singleton)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(settings.STORAGE_ENGINE)
+    return _engine
+
+def use_engine(engine: Optional[StorageEngine]) -> Optional[StorageEngine]:
+    """
+    Sustituye el motor activo y devuelve el anterior (scripts y pruebas que
+    trabajan sobre un directorio temporal). Llamar antes de usar los servicios.
+    """
+    global _engine
+    with _engine_lock:
+        previous, _engine = _engine, engine
+    return previous
+
+__all__ = ['StorageEngine', 'COLLECTIONS', 'JsonEngine', 'SQLiteEngine', 'DB_DIR', 'create_engine', 'get_engine', 'use_engine']
@@ -0,0 +1,137 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+# Forma de cada colección conocida. El resto de archivos ("platform_config.json",
+# ...) se tratan como documentos opacos.
+#   container: clave del documento que contiene la lista (None = el documento es la lista)
+#   key: campo que identifica a cada elemento de la lista
+#   keyed: el documento es un diccionario {clave: valor}
+COLLECTIONS: Dict[str, Dict[str, Any]] = {
+    "productos.json": {"container": "productos", "key": "id"},
+    "orders.json": {"container": None, "key": "id"},
+    "users.json": {"keyed": True},
+    "credentials.json": {"keyed": True},
+    "carts.json": {"keyed": True},
+}
+
+class StorageEngine(ABC):
+    """
+    Interfaz abstracta (Strategy) de los motores de almacenamiento.
+
+    Las colecciones se identifican por su nombre de archivo ("productos.json",
+    "users.json", ...) y se entregan con la misma forma que tienen en JSON,
+    así que las funciones de db/json_handler.py no dependen del motor.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @abstractmethod
+    def load(self, filename: str, default: Any) -> Any:
+        """Devuelve el documento completo (una copia que se puede modificar)."""
+        pass
+
+    @abstractmethod
+    def save(self, filename: str, data: Any):
+        """Reemplaza el documento completo."""
+        pass
+
+    @abstractmethod
+    def transaction(self, filename: str, default: Any) -> ContextManager[Any]:
+        """Lectura-modificación-escritura exclusiva del documento completo."""
+        pass
+
+    @abstractmethod
+    def read_transaction(self, filename: str, default: Any) -> ContextManager[Any]:
+        """Lectura consistente del documento completo bajo bloqueo compartido."""
+        pass
+
+    # --- Acceso por clave ---
+    # Las implementaciones por defecto trabajan sobre el documento completo;
+    # los motores con índices (SQLite) las sobrescriben.
+
+    def get_item(self, filename: str, key: Any, default: Any = None) -> Any:
+        """Elemento de una colección por su clave (email, id de producto u orden)."""
+        spec = COLLECTIONS[filename]
+        data = self.load(filename, self.empty(filename))
+        if spec.get("keyed"):
+            return data.get(key, default)
+        for item in _list_of(spec, data):
+            if item.get(spec["key"]) == key:
+                return item
+        return default
+
+    def find_items(self, filename: str, field: str, value: Any) -> List[Dict[str, Any]]:
+        """Elementos de una colección cuyo campo `field` vale `value`."""
+        spec = COLLECTIONS[filename]
+        data = self.load(filename, self.empty(filename))
+        items = data.values() if spec.get("keyed") else _list_of(spec, data)
+        return [item for item in items if isinstance(item, dict) and item.get(field) == value]
+
+    def append_item(self, filename: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Añade un elemento a una colección de tipo lista (p. ej. una orden nueva)."""
+        spec = COLLECTIONS[filename]
+        with self.transaction(filename, self.empty(filename)) as data:
+            items = data if spec["container"] is None else data.setdefault(spec["container"], [])
+            items.append(item)
+        return item
+
+    def update_item(self, filename: str, key: Any, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Aplica `changes` al elemento con esa clave; devuelve el resultado o None si no existe."""
+        spec = COLLECTIONS[filename]
+        with self.transaction(filename, self.empty(filename)) as data:
+            for item in _list_of(spec, data):
+                if item.get(spec["key"]) == key:
+                    item.update(changes)
+                    return item
+        return None
+
+    @contextmanager
+    def edit_item(
+        self,
+        filename: str,
+        key: Any,
+        default: Any,
+        upgrade: Optional[Callable[[Any], Any]] = None,
+    ) -> Iterator[Any]:
+        """
+        Lectura-modificación-escritura de un solo valor de una colección con
+        clave (p. ej. el carrito de un usuario). El valor cedido se modifica
+        en el sitio y se guarda al salir del bloque.
+
+        `upgrade(valor)` convierte el valor guardado antes de cederlo (p. ej.
+        de un formato antiguo); se cede y se guarda lo que devuelva.
+        """
+        if not COLLECTIONS[filename].get("keyed"):
+            raise ValueError(f"{filename} no es una colección con clave")
+        with self.transaction(filename, {}) as data:
+            value = data.setdefault(key, default)
+            if upgrade is not None:
+                value = data[key] = upgrade(value)
+            yield value
+
+    def change_token(self, filename: str) -> Any:
+        """
+        Valor barato de calcular que cambia cuando cambia el documento (p. ej.
+        la firma del archivo). None = el motor no lo sabe calcular y quien
+        mantenga datos en memoria debe recargarlos.
+        """
+        return None
+
+    def empty(self, filename: str) -> Any:
+        """Documento vacío de una colección."""
+        spec = COLLECTIONS.get(filename)
+        if spec is None or spec.get("keyed"):
+            return {}
+        if spec["container"] is None:
+            return []
+        return {spec["container"]: []}
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+def _list_of(spec: Dict[str, Any], data: Any) -> List[Dict[str, Any]]:
+    if spec["container"] is None:
+        return data if isinstance(data, list) else []
+    return data.get(spec["container"], []) if isinstance(data, dict) else []
@@ -0,0 +1,225 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+from core.config import settings
+from db.engines.json_engine import (
+    _cache_invalidate,
+    _forget_file,
+    _get_lock,
+    _load_data,
+    _locked_save,
+    _save_data,
+    _transaction,
+)
+
+class ShardedCartStore:
+    """
+    Carritos del motor JSON, un archivo por usuario.
+
+    El carrito de cada email vive en carts/<h[:2]>/<h>.json, con h = sha1 del
+    email, así que modificar un carrito solo lee y escribe ese archivo. Los
+    256 subdirectorios son también las franjas de bloqueo: dos usuarios del
+    mismo subdirectorio se serializan entre sí, el resto no.
+
+    La primera vez que se usa, reparte el carts.json heredado en shards y lo
+    renombra a carts.json.migrated. Un compactor en segundo plano elimina los
+    shards de carritos vacíos y los temporales que haya dejado una caída.
+    """
+
+    def __init__(self, root: Path, legacy_file: Path):
+        self.root = root
+        self.legacy_file = legacy_file
+        self._ready = False
+        self._ready_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stats = {"compactions": 0, "shards_removed": 0, "tmp_removed": 0}
+
+    # --- Rutas ---
+    def _shard_path(self, email: str) -> Path:
+        digest = hashlib.sha1(email.encode("utf-8")).hexdigest()
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def _stripe(self, shard_path: Path) -> Path:
+        return self.root / f"stripe-{shard_path.parent.name}"
+
+    def _shards(self) -> Iterator[Path]:
+        if not self.root.exists():
+            return
+        for directory in sorted(self.root.iterdir()):
+            if directory.is_dir():
+                yield from sorted(directory.glob("[!.]*.json"))
+
+    # --- Operaciones por usuario ---
+    def get(self, email: str, default: Any = None) -> Any:
+        self._ensure_ready()
+        doc = _load_data(self._shard_path(email), None, create=False)
+        return doc["items"] if doc else default
+
+    @contextmanager
+    def edit(
+        self,
+        email: str,
+        default: Any,
+        upgrade: Optional[Callable[[Any], Any]] = None,
+    ) -> Iterator[Any]:
+        """Lectura-modificación-escritura del carrito de un usuario (solo su shard)."""
+        self._ensure_ready()
+        path = self._shard_path(email)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _transaction(path, {"email": email, "items": default}, lock_path=self._stripe(path)) as doc:
+            if upgrade is not None:
+                doc["items"] = upgrade(doc["items"])
+            yield doc["items"]
+
+    # --- Colección completa (read_json/write_json sobre carts.json) ---
+    def load_all(self) -> Dict[str, Any]:
+        self._ensure_ready()
+        carts = {}
+        for path in self._shards():
+            doc = _load_data(path, None, create=False)
+            if doc:
+                carts[doc["email"]] = doc["items"]
+        return carts
+
+    def save_all(self, carts: Dict[str, Any]):
+        self._ensure_ready()
+        wanted = {self._shard_path(email): (email, items) for email, items in carts.items()}
+        for path, (email, items) in wanted.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _locked_save(path, {"email": email, "items": items}, lock_path=self._stripe(path))
+        for path in list(self._shards()):
+            if path not in wanted:
+                self._remove_shard(path, only_if_empty=False)
+
+    @contextmanager
+    def transaction_all(self) -> Iterator[Dict[str, Any]]:
+        """
+        Transacción sobre todos los carritos. Toma todas las franjas en orden,
+        así que es cara: pensada para tareas de mantenimiento, no para rutas.
+        """
+        self._ensure_ready()
+        stripes = [self.root / f"stripe-{i:02x}" for i in range(256)]
+        locks = [_get_lock(stripe) for stripe in stripes]
+        acquired = []
+        try:
+            for lock in locks:
+                lock.acquire_write()
+                acquired.append(lock)
+            carts = self.load_all()
+            yield carts
+            self._save_all_locked(carts)
+        finally:
+            for lock in reversed(acquired):
+                lock.release_write()
+                lock.release_os()
+
+    def _save_all_locked(self, carts: Dict[str, Any]):
+        wanted = {self._shard_path(email): (email, items) for email, items in carts.items()}
+        for path, (email, items) in wanted.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _save_data(path, {"email": email, "items": items})
+        for path in list(self._shards()):
+            if path not in wanted:
+                path.unlink(missing_ok=True)
+                _forget_file(path)
+
+    # --- Migración y compactación ---
+    def _ensure_ready(self):
+        if self._ready:
+            return
+        with self._ready_lock:
+            if self._ready:
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._migrate_legacy()
+            interval = settings.CART_COMPACT_INTERVAL_SECONDS
+            if interval > 0:
+                self._compactor = threading.Thread(
+                    target=self._compact_loop, args=(interval,), name="cart-compactor", daemon=True
+                )
+                self._compactor.start()
+            self._ready = True
+
+    def _migrate_legacy(self):
+        """Reparte carts.json en shards (una sola vez, protegido entre procesos)."""
+        if not self.legacy_file.exists():
+            return
+        lock = _get_lock(self.legacy_file)
+        lock.acquire_write()
+        try:
+            if not self.legacy_file.exists():
+                return  # otro worker ya migró
+            carts = _load_data(self.legacy_file, {}, create=False, strict=True)
+            for email, items in carts.items():
+                path = self._shard_path(email)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with _transaction(path, {}, lock_path=self._stripe(path)) as doc:
+                    # No se pisa un shard que ya exista (es más reciente)
+                    doc.setdefault("email", email)
+                    doc.setdefault("items", items)
+            os.replace(self.legacy_file, self.legacy_file.with_name(self.legacy_file.name + ".migrated"))
+            _cache_invalidate(self.legacy_file)
+            print(f"✅ {len(carts)} carritos migrados de {self.legacy_file.name} a {self.root.name}/")
+        finally:
+            lock.release_write()
+            lock.release_os()
+
+    def _compact_loop(self, interval: int):
+        while not self._stop.wait(interval):
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"⚠️  Error compactando carritos: {e}")
+
+    def compact(self, grace_seconds: int = 60) -> Dict[str, int]:
+        """
+        Elimina los shards de carritos vacíos que no se tocaron en los últimos
+        `grace_seconds` y los temporales huérfanos de más de una hora.
+        """
+        now = time.time()
+        removed = tmp_removed = 0
+        for directory in list(self.root.iterdir()) if self.root.exists() else []:
+            if not directory.is_dir():
+                continue
+            for tmp in directory.glob(".*.tmp"):
+                if now - tmp.stat().st_mtime > 3600:
+                    tmp.unlink(missing_ok=True)
+                    tmp_removed += 1
+            for path in directory.glob("[!.]*.json"):
+                try:
+                    idle = now - path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if idle > grace_seconds and self._remove_shard(path, only_if_empty=True):
+                    removed += 1
+        self._stats["compactions"] += 1
+        self._stats["shards_removed"] += removed
+        self._stats["tmp_removed"] += tmp_removed
+        return {"shards_removed": removed, "tmp_removed": tmp_removed}
+
+    def _remove_shard(self, path: Path, only_if_empty: bool) -> bool:
+        lock = _get_lock(self._stripe(path))
+        lock.acquire_write()
+        try:
+            if only_if_empty:
+                doc = _load_data(path, None, create=False)
+                if doc is None:
+                    return False
+                cart = doc.get("items")
+                # Formato de db/cart_document.py o lista de items (antiguo)
+                if (cart.get("items") if isinstance(cart, dict) else cart):
+                    return False
+            path.unlink(missing_ok=True)
+            _forget_file(path)
+            return True
+        finally:
+            lock.release_write()
+            lock.release_os()
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats)
@@ -0,0 +1,343 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from core.config import settings
+from db.engines.json_engine import _cache_invalidate, _get_lock, _load_data
+
+# Ubicación de un registro dentro del ledger: (segmento, offset, longitud)
+Location = Tuple[int, int, int]
+
+class OrderLedger:
+    """
+    Órdenes del motor JSON como ledger append-only.
+
+    Cada registro es una línea JSON en orders/segment-NNNNNN.jsonl:
+        {"op": "create", "order": {...}}
+        {"op": "update", "id": "...", "changes": {...}}
+        {"op": "delete", "id": "..."}
+    Los segmentos rotan al superar ORDER_SEGMENT_MAX_BYTES. orders/index.jsonl
+    guarda, por cada registro, su id, email del cliente y ubicación, así que
+    crear una orden escribe dos líneas y buscar por id o por cliente solo lee
+    los registros de esas órdenes.
+
+    El índice se puede reconstruir siempre a partir de los segmentos: si un
+    proceso cae entre escribir el registro y su línea de índice, el siguiente
+    escritor indexa lo que falte. Una línea de índice a medias al final se
+    recorta, y si hay alguna ilegible el índice se rehace desde los segmentos.
+    """
+
+    def __init__(self, root: Path, legacy_file: Path):
+        self.root = root
+        self.legacy_file = legacy_file
+        self.index_file = root / "index.jsonl"
+        self._mutex = threading.RLock()
+        self._ready = False
+        self._ready_lock = threading.Lock()
+        # Índices en memoria, alimentados desde index.jsonl
+        self._index_offset = 0
+        self._index_ino: Optional[int] = None  # cambia si alguien rehace el índice
+        self._index_damaged = False
+        self._by_id: Dict[str, List[Location]] = {}
+        self._by_email: Dict[str, List[str]] = {}
+        self._segment_end: Dict[int, int] = {}  # fin indexado de cada segmento
+
+    # --- Rutas y bloqueo ---
+    def _segment_path(self, segment: int) -> Path:
+        return self.root / f"segment-{segment:06d}.jsonl"
+
+    def _segments(self) -> List[int]:
+        return sorted(int(p.stem.split("-")[1]) for p in self.root.glob("segment-*.jsonl"))
+
+    @contextmanager
+    def _write_lock(self, check_all_segments: bool = False) -> Iterator[None]:
+        """Serializa a los escritores del ledger, también entre workers."""
+        lock = _get_lock(self.root / "ledger")
+        lock.acquire_write()
+        try:
+            with self._mutex:
+                self._refresh()
+                if self._index_damaged:
+                    self._rebuild_index()
+                else:
+                    self._repair_index_tail()
+                self._index_unindexed(check_all_segments)
+                yield
+        finally:
+            lock.release_write()
+            lock.release_os()
+
+    # --- Índice ---
+    def _ensure_ready(self):
+        if self._ready:
+            return
+        with self._ready_lock:
+            if self._ready:
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            with self._write_lock(check_all_segments=True):
+                pass  # recupera registros sin indexar tras una caída
+            self._migrate_legacy()
+            self._ready = True
+
+    def _reset_index(self):
+        self._index_offset = 0
+        self._by_id, self._by_email, self._segment_end = {}, {}, {}
+        self._index_damaged = False
+
+    def _refresh(self):
+        """Lee las líneas de índice que otros procesos hayan añadido."""
+        with self._mutex:
+            try:
+                stat = self.index_file.stat()
+            except FileNotFoundError:
+                return
+            if stat.st_ino != self._index_ino:
+                # Índice nuevo (primera lectura o rehecho por otro proceso)
+                self._reset_index()
+                self._index_ino = stat.st_ino
+            size = stat.st_size
+            if size <= self._index_offset:
+                return
+            with open(self.index_file, "rb") as f:
+                f.seek(self._index_offset)
+                chunk = f.read(size - self._index_offset)
+            # Solo se consumen líneas completas
+            end = chunk.rfind(b"\n") + 1
+            for line in chunk[:end].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    self._apply_index_entry(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    # Línea dañada (p. ej. pegada a una escritura interrumpida):
+                    # se salta y el siguiente escritor rehace el índice
+                    self._index_damaged = True
+            self._index_offset += end
+
+    def _repair_index_tail(self):
+        """
+        Recorta una línea de índice a medias (escritura interrumpida) antes de
+        añadir otra detrás. Llamar dentro de _write_lock tras _refresh: todo
+        lo que pasa de _index_offset es esa línea incompleta.
+        """
+        try:
+            size = self.index_file.stat().st_size
+        except FileNotFoundError:
+            return
+        if size > self._index_offset:
+            with open(self.index_file, "rb+") as f:
+                f.truncate(self._index_offset)
+
+    def _rebuild_index(self):
+        """Rehace index.jsonl desde los segmentos (llamar dentro de _write_lock)."""
+        print(f"⚠️  {self.index_file} tenía líneas dañadas: se reconstruye desde los segmentos")
+        tmp = self.index_file.with_name(self.index_file.name + ".tmp")
+        tmp.write_bytes(b"")
+        os.replace(tmp, self.index_file)
+        self._reset_index()
+        self._index_ino = self.index_file.stat().st_ino
+        self._index_unindexed(check_all_segments=True)
+
+    def _refresh_for_read(self):
+        self._refresh()
+        if self._index_damaged:
+            with self._write_lock():
+                pass  # rehace el índice antes de leer
+
+    def _apply_index_entry(self, entry: Dict[str, Any]):
+        order_id, location = entry["id"], (entry["seg"], entry["off"], entry["len"])
+        self._segment_end[entry["seg"]] = max(self._segment_end.get(entry["seg"], 0), entry["off"] + entry["len"])
+        if entry["op"] == "create":
+            self._by_id[order_id] = [location]
+            if entry.get("email"):
+                self._by_email.setdefault(entry["email"], []).append(order_id)
+        elif entry["op"] == "delete":
+            self._by_id.pop(order_id, None)
+        elif order_id in self._by_id:
+            self._by_id[order_id].append(location)
+
+    def _index_unindexed(self, check_all_segments: bool):
+        """
+        Indexa los registros que no llegaron a index.jsonl. En marcha normal
+        basta con mirar el último segmento: uno anterior solo rota después de
+        que otro escritor haya pasado por aquí.
+        """
+        segments = self._segments()
+        for segment in segments if check_all_segments else segments[-1:]:
+            path = self._segment_path(segment)
+            size = path.stat().st_size
+            start = self._segment_end.get(segment, 0)
+            if size <= start:
+                continue
+            with open(path, "rb+") as f:
+                f.seek(start)
+                chunk = f.read()
+                end = chunk.rfind(b"\n") + 1
+                if end < len(chunk):
+                    # Línea a medias de una escritura interrumpida
+                    f.truncate(start + end)
+            offset = start
+            for line in chunk[:end].splitlines(keepends=True):
+                if line.strip():
+                    self._write_index(json.loads(line), segment, offset, len(line))
+                offset += len(line)
+
+    def _write_index(self, record: Dict[str, Any], segment: int, offset: int, length: int):
+        op = record["op"]
+        order_id = record["order"]["id"] if op == "create" else record["id"]
+        entry = {"op": op, "id": order_id, "seg": segment, "off": offset, "len": length}
+        if op == "create":
+            entry["email"] = record["order"].get("cliente_email")
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.index_file, "ab") as f:
+            f.write(line)
+        # Este proceso ya conoce la entrada: se aplica y se avanza el offset
+        self._apply_index_entry(entry)
+        self._index_offset += len(line)
+
+    # --- Escritura ---
+    def _append(self, record: Dict[str, Any]):
+        """Añade un registro al segmento actual (llamar dentro de _write_lock)."""
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        segments = self._segments()
+        segment = segments[-1] if segments else 1
+        path = self._segment_path(segment)
+        size = path.stat().st_size if path.exists() else 0
+        if size and size + len(line) > settings.ORDER_SEGMENT_MAX_BYTES:
+            segment += 1
+            path, size = self._segment_path(segment), 0
+        with open(path, "ab") as f:
+            f.write(line)
+            if settings.DB_DURABILITY != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        self._write_index(record, segment, size, len(line))
+
+    def append(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        self._ensure_ready()
+        with self._write_lock():
+            if order["id"] in self._by_id:
+                raise ValueError(f"La orden {order['id']} ya existe")
+            self._append({"op": "create", "order": order})
+        return order
+
+    def update(self, order_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Registra un evento de actualización y devuelve la orden resultante."""
+        self._ensure_ready()
+        with self._write_lock():
+            if order_id not in self._by_id:
+                return None
+            self._append({"op": "update", "id": order_id, "changes": changes})
+            return self._materialize(order_id)
+
+    # --- Lectura ---
+    def _read_record(self, location: Location) -> Dict[str, Any]:
+        segment, offset, length = location
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def _materialize(self, order_id: str) -> Optional[Dict[str, Any]]:
+        with self._mutex:
+            locations = list(self._by_id.get(order_id, []))
+        if not locations:
+            return None
+        order = self._read_record(locations[0])["order"]
+        for location in locations[1:]:
+            order.update(self._read_record(location)["changes"])
+        return order
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        self._ensure_ready()
+        self._refresh_for_read()
+        return self._materialize(order_id)
+
+    def by_customer(self, email: str) -> List[Dict[str, Any]]:
+        self._ensure_ready()
+        self._refresh_for_read()
+        with self._mutex:
+            ids = [i for i in self._by_email.get(email, []) if i in self._by_id]
+        return [order for order in map(self._materialize, ids) if order is not None]
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Historial completo, recorriendo los segmentos en orden (O(historial))."""
+        self._ensure_ready()
+        orders: Dict[str, Dict[str, Any]] = {}
+        for segment in self._segments():
+            with open(self._segment_path(segment), "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # escritura en curso
+                    record = json.loads(line)
+                    if record["op"] == "create":
+                        orders[record["order"]["id"]] = record["order"]
+                    elif record["op"] == "delete":
+                        orders.pop(record["id"], None)
+                    elif record["id"] in orders:
+                        orders[record["id"]].update(record["changes"])
+        return list(orders.values())
+
+    # --- Colección completa (read_json/write_json sobre orders.json) ---
+    def _save_all_locked(self, orders: List[Dict[str, Any]]):
+        """Traduce una lista completa a eventos: altas, cambios y bajas."""
+        current = {order["id"]: order for order in self.load_all()}
+        wanted = set()
+        for order in orders:
+            wanted.add(order["id"])
+            previous = current.get(order["id"])
+            if previous is None:
+                self._append({"op": "create", "order": order})
+            elif previous != order:
+                changes = {k: v for k, v in order.items() if previous.get(k) != v}
+                self._append({"op": "update", "id": order["id"], "changes": changes})
+        for order_id in current:
+            if order_id not in wanted:
+                self._append({"op": "delete", "id": order_id})
+
+    def save_all(self, orders: List[Dict[str, Any]]):
+        self._ensure_ready()
+        with self._write_lock():
+            self._save_all_locked(orders)
+
+    @contextmanager
+    def transaction_all(self) -> Iterator[List[Dict[str, Any]]]:
+        self._ensure_ready()
+        with self._write_lock():
+            orders = self.load_all()
+            yield orders
+            self._save_all_locked(orders)
+
+    # --- Migración ---
+    def _migrate_legacy(self):
+        """Importa orders.json al ledger (una sola vez, protegido entre procesos)."""
+        if not self.legacy_file.exists():
+            return
+        lock = _get_lock(self.legacy_file)
+        lock.acquire_write()
+        try:
+            if not self.legacy_file.exists():
+                return  # otro worker ya migró
+            orders = _load_data(self.legacy_file, [], create=False, strict=True)
+            if not isinstance(orders, list):
+                orders = []
+            with self._write_lock():
+                for order in orders:
+                    if order.get("id") not in self._by_id:
+                        self._append({"op": "create", "order": order})
+            os.replace(self.legacy_file, self.legacy_file.with_name(self.legacy_file.name + ".migrated"))
+            _cache_invalidate(self.legacy_file)
+            print(f"✅ {len(orders)} órdenes migradas de {self.legacy_file.name} a {self.root.name}/")
+        finally:
+            lock.release_write()
+            lock.release_os()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._mutex:
+            return {
+                "orders": len(self._by_id),
+                "customers": len(self._by_email),
+                "segments": len(self._segment_end),
+            }
@@ -0,0 +1,308 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from core.config import settings
+from db.engines.base import StorageEngine
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    vendor_id TEXT,
+    categoria TEXT,
+    marca TEXT,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_products_vendor ON products(vendor_id);
+CREATE INDEX IF NOT EXISTS idx_products_categoria ON products(categoria);
+CREATE INDEX IF NOT EXISTS idx_products_marca ON products(marca);
+CREATE INDEX IF NOT EXISTS idx_products_status ON products(status);
+
+CREATE TABLE IF NOT EXISTS users (
+    email TEXT PRIMARY KEY,
+    role TEXT,
+    tipo TEXT,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
+CREATE INDEX IF NOT EXISTS idx_users_tipo ON users(tipo);
+CREATE INDEX IF NOT EXISTS idx_users_status ON users(status);
+
+CREATE TABLE IF NOT EXISTS credentials (
+    email TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS carts (
+    email TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    pos INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    cliente_email TEXT,
+    fecha TEXT,
+    estado TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orders_cliente ON orders(cliente_email);
+
+-- Configuración y cualquier otro archivo sin tabla propia. También guarda
+-- las claves de primer nivel de productos.json distintas de "productos".
+CREATE TABLE IF NOT EXISTS documents (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+# Tabla de cada colección: columna clave y columnas indexadas
+_TABLES: Dict[str, Dict[str, Any]] = {
+    "productos.json": {"table": "products", "key": "id", "columns": ("vendor_id", "categoria", "marca", "status")},
+    "users.json": {"table": "users", "key": "email", "columns": ("role", "tipo", "status")},
+    "credentials.json": {"table": "credentials", "key": "email", "columns": ()},
+    "carts.json": {"table": "carts", "key": "email", "columns": ()},
+    "orders.json": {"table": "orders", "key": "id", "columns": ("cliente_email", "fecha", "estado")},
+}
+
+# Tablas de colecciones con clave ({clave: valor} en JSON)
+_KEYED_TABLES = ("users", "credentials", "carts")
+
+_SYNCHRONOUS = {"always": "FULL", "batch": "NORMAL", "none": "OFF"}
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+class SQLiteEngine(StorageEngine):
+    """
+    Motor SQLite (sqlite3 de la librería estándar, modo WAL).
+
+    Cada colección conocida vive en su propia tabla con índices sobre los
+    campos de búsqueda; guardar un documento completo solo reescribe las filas
+    que cambiaron. Las transacciones usan BEGIN IMMEDIATE, que serializa a los
+    escritores también entre workers de uvicorn.
+    """
+
+    def __init__(self, path: Path):
+        super().__init__("sqlite")
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    # --- Conexiones ---
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: las transacciones se abren explícitamente
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={_SYNCHRONOUS.get(settings.DB_DURABILITY, 'FULL')}")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(_SCHEMA)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _begin(self, filename: str, immediate: bool) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        start = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        if immediate:
+            self._record(filename, start)
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _record(self, filename: str, start: float):
+        waited = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            stats = self._stats.setdefault(
+                filename, {"write_acquisitions": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+            )
+            stats["write_acquisitions"] += 1
+            stats["wait_ms_total"] += waited
+            stats["wait_ms_max"] = max(stats["wait_ms_max"], waited)
+
+    # --- Lectura/escritura de documentos completos ---
+    def _load_in(self, conn: sqlite3.Connection, filename: str, default: Any) -> Any:
+        spec = _TABLES.get(filename)
+        if spec is None:
+            row = conn.execute("SELECT data FROM documents WHERE name = ?", (filename,)).fetchone()
+            return json.loads(row[0]) if row else default
+
+        rows = conn.execute(
+            f"SELECT {spec['key']}, data FROM {spec['table']} ORDER BY rowid"
+        ).fetchall()
+        if spec["table"] in _KEYED_TABLES:
+            return {key: json.loads(data) for key, data in rows}
+        items = [json.loads(data) for _, data in rows]
+        if spec["table"] == "orders":
+            return items
+        row = conn.execute("SELECT data FROM documents WHERE name = ?", (filename,)).fetchone()
+        document = json.loads(row[0]) if row else {}
+        document["productos"] = items
+        return document
+
+    def _save_in(self, conn: sqlite3.Connection, filename: str, data: Any):
+        spec = _TABLES.get(filename)
+        if spec is None:
+            conn.execute(
+                "INSERT INTO documents (name, data) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET data = excluded.data",
+                (filename, _dumps(data)),
+            )
+            return
+
+        if spec["table"] in _KEYED_TABLES:
+            entries = list(data.items())
+        else:
+            if spec["table"] == "products":
+                items = data.get("productos", [])
+                meta = {k: v for k, v in data.items() if k != "productos"}
+                conn.execute("DELETE FROM documents WHERE name = ?", (filename,))
+                if meta:
+                    conn.execute("INSERT INTO documents (name, data) VALUES (?, ?)", (filename, _dumps(meta)))
+            else:
+                items = data
+            entries = [(item[spec["key"]], item) for item in items]
+
+        # Solo se escriben las filas que cambiaron
+        table, key = spec["table"], spec["key"]
+        existing = dict(conn.execute(f"SELECT {key}, data FROM {table}").fetchall())
+        upserts = []
+        seen = set()
+        for item_key, value in entries:
+            seen.add(item_key)
+            text = _dumps(value)
+            if existing.get(item_key) != text:
+                upserts.append(self._row(spec, item_key, value, text))
+        if upserts:
+            self._upsert(conn, spec, upserts)
+        removed = [(k,) for k in existing if k not in seen]
+        if removed:
+            conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", removed)
+
+    def _row(self, spec: Dict[str, Any], item_key: Any, value: Any, text: str) -> tuple:
+        fields = value if isinstance(value, dict) else {}
+        return (item_key, *(fields.get(column) for column in spec["columns"]), text)
+
+    def _upsert(self, conn: sqlite3.Connection, spec: Dict[str, Any], rows: List[tuple]):
+        columns = (spec["key"], *spec["columns"], "data")
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns[1:])
+        conn.executemany(
+            f"INSERT INTO {spec['table']} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT({spec['key']}) DO UPDATE SET {updates}",
+            rows,
+        )
+
+    def load(self, filename: str, default: Any) -> Any:
+        return self._load_in(self._conn(), filename, default)
+
+    def save(self, filename: str, data: Any):
+        with self._begin(filename, immediate=True) as conn:
+            self._save_in(conn, filename, data)
+
+    @contextmanager
+    def transaction(self, filename: str, default: Any) -> Iterator[Any]:
+        with self._begin(filename, immediate=True) as conn:
+            data = self._load_in(conn, filename, default)
+            yield data
+            self._save_in(conn, filename, data)
+
+    @contextmanager
+    def read_transaction(self, filename: str, default: Any) -> Iterator[Any]:
+        with self._begin(filename, immediate=False) as conn:
+            yield self._load_in(conn, filename, default)
+
+    # --- Acceso por clave usando los índices ---
+    def get_item(self, filename: str, key: Any, default: Any = None) -> Any:
+        spec = _TABLES.get(filename)
+        if spec is None:
+            return super().get_item(filename, key, default)
+        row = self._conn().execute(
+            f"SELECT data FROM {spec['table']} WHERE {spec['key']} = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def find_items(self, filename: str, field: str, value: Any) -> List[Dict[str, Any]]:
+        spec = _TABLES.get(filename)
+        if spec is None or field not in spec["columns"]:
+            return super().find_items(filename, field, value)
+        rows = self._conn().execute(
+            f"SELECT data FROM {spec['table']} WHERE {field} = ? ORDER BY rowid", (value,)
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def append_item(self, filename: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        spec = _TABLES.get(filename)
+        if spec is None or spec["table"] in _KEYED_TABLES:
+            return super().append_item(filename, item)
+        with self._begin(filename, immediate=True) as conn:
+            self._upsert(conn, spec, [self._row(spec, item[spec["key"]], item, _dumps(item))])
+        return item
+
+    def update_item(self, filename: str, key: Any, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        spec = _TABLES.get(filename)
+        if spec is None or spec["table"] in _KEYED_TABLES:
+            return super().update_item(filename, key, changes)
+        with self._begin(filename, immediate=True) as conn:
+            row = conn.execute(
+                f"SELECT data FROM {spec['table']} WHERE {spec['key']} = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            item = {**json.loads(row[0]), **changes}
+            self._upsert(conn, spec, [self._row(spec, key, item, _dumps(item))])
+        return item
+
+    @contextmanager
+    def edit_item(
+        self,
+        filename: str,
+        key: Any,
+        default: Any,
+        upgrade: Optional[Callable[[Any], Any]] = None,
+    ) -> Iterator[Any]:
+        spec = _TABLES[filename]
+        if spec["table"] not in _KEYED_TABLES:
+            raise ValueError(f"{filename} no es una colección con clave")
+        with self._begin(filename, immediate=True) as conn:
+            row = conn.execute(
+                f"SELECT data FROM {spec['table']} WHERE {spec['key']} = ?", (key,)
+            ).fetchone()
+            value = json.loads(row[0]) if row else default
+            if upgrade is not None:
+                value = upgrade(value)
+            yield value
+            self._upsert(conn, spec, [self._row(spec, key, value, _dumps(value))])
+
+    def change_token(self, filename: str) -> Any:
+        spec = _TABLES.get(filename)
+        if spec is not None and spec["table"] != "products":
+            return None
+        # Documentos opacos y claves de primer nivel de productos.json (entre
+        # ellas la "version" del catálogo) viven en la tabla documents
+        row = self._conn().execute("SELECT data FROM documents WHERE name = ?", (filename,)).fetchone()
+        return row[0] if row else ""
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            locks = {
+                name: {**s, "wait_ms_total": round(s["wait_ms_total"], 3), "wait_ms_max": round(s["wait_ms_max"], 3)}
+                for name, s in self._stats.items()
+            }
+        return {"path": str(self.path), "locks": locks}
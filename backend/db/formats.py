@@ -0,0 +1,168 @@
+# backend/db/formats.py
+"""
+Formatos de serialización de los archivos de datos del motor JSON.
+
+El formato se elige por archivo (DB_FORMAT y DB_FORMATS_STR en
+core/config.py) y el nombre del archivo no cambia: productos.json puede
+estar guardado en msgpack. Al leer, el formato se detecta por el contenido:
+los binarios empiezan con una cabecera MAGIC + nombre del códec, todo lo
+demás se trata como JSON. Un archivo en otro formato se sigue leyendo sin
+problemas y pasa al formato configurado en la siguiente escritura (o ya
+mismo con `python -m db.convert`).
+
+Formatos disponibles:
+    json          JSON con indentación (el formato histórico, legible)
+    json-compact  JSON sin espacios
+    orjson        JSON compacto con orjson; si no está instalado, json-compact
+    msgpack       MessagePack binario (requiere el paquete msgpack)
+    marshal       snapshot con marshal: el más rápido de cargar, pero solo
+                  lo lee la misma versión mayor de Python. Los archivos de
+                  db/ son locales y de confianza; no usarlo con datos ajenos.
+"""
+
+import json
+import marshal
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+from core.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Cabecera de los formatos binarios: MAGIC + 1 byte de longitud + nombre
+MAGIC = b"\x89MRFY"
+
+class FormatError(ValueError):
+    """El contenido no se puede decodificar con el formato detectado."""
+
+class Codec(ABC):
+    name: str = ""
+    binary: bool = False
+
+    @abstractmethod
+    def encode(self, data: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, payload: bytes) -> Any:
+        pass
+
+def _json_loads(payload: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            pass  # p. ej. NaN, que json sí acepta
+    return json.loads(payload.decode("utf-8"))
+
+class JsonCodec(Codec):
+    name = "json"
+
+    def encode(self, data: Any) -> bytes:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+    def decode(self, payload: bytes) -> Any:
+        return _json_loads(payload)
+
+class CompactJsonCodec(JsonCodec):
+    name = "json-compact"
+
+    def encode(self, data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class OrjsonCodec(CompactJsonCodec):
+    name = "orjson"
+
+    def encode(self, data: Any) -> bytes:
+        if orjson is None:
+            return super().encode(data)
+        # OPT_NON_STR_KEYS: claves int como las convierte json.dumps
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+class MsgpackCodec(Codec):
+    name = "msgpack"
+    binary = True
+
+    def encode(self, data: Any) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def decode(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+class MarshalCodec(Codec):
+    name = "marshal"
+    binary = True
+
+    def encode(self, data: Any) -> bytes:
+        return marshal.dumps(data)
+
+    def decode(self, payload: bytes) -> Any:
+        return marshal.loads(payload)
+
+_CODECS: Dict[str, Codec] = {
+    codec.name: codec
+    for codec in (JsonCodec(), CompactJsonCodec(), OrjsonCodec(), MsgpackCodec(), MarshalCodec())
+}
+
+def available_formats() -> List[str]:
+    return [name for name in _CODECS if name != "msgpack" or msgpack is not None]
+
+def get_codec(name: str) -> Codec:
+    if name not in available_formats():
+        raise ValueError(
+            f"Formato '{name}' no disponible. Disponibles: {', '.join(available_formats())}"
+        )
+    return _CODECS[name]
+
+def _configured_formats() -> Dict[str, str]:
+    """DB_FORMATS_STR = "productos.json=orjson,users.json=msgpack"."""
+    formats = {}
+    for entry in settings.DB_FORMATS_STR.split(","):
+        if "=" in entry:
+            filename, name = entry.split("=", 1)
+            formats[filename.strip()] = name.strip()
+    return formats
+
+def codec_for(filename: str) -> Codec:
+    """Códec configurado para un archivo (DB_FORMAT si no tiene uno propio)."""
+    return get_codec(_configured_formats().get(filename, settings.DB_FORMAT))
+
+def encode(data: Any, codec: Codec) -> bytes:
+    payload = codec.encode(data)
+    if not codec.binary:
+        return payload
+    name = codec.name.encode("ascii")
+    return MAGIC + bytes([len(name)]) + name + payload
+
+def _header_length(payload: bytes) -> int:
+    return len(MAGIC) + 1 + payload[len(MAGIC)]
+
+def detect(payload: bytes) -> Codec:
+    if not payload.startswith(MAGIC):
+        return _CODECS["json"]
+    if len(payload) <= len(MAGIC) or len(payload) < _header_length(payload):
+        raise FormatError("Cabecera binaria incompleta")
+    name = payload[len(MAGIC) + 1:_header_length(payload)].decode("ascii", "replace")
+    if name not in _CODECS:
+        raise FormatError(f"Formato binario desconocido: '{name}'")
+    return _CODECS[name]
+
+def decode(payload: bytes) -> Any:
+    """Decodifica el contenido de un archivo detectando su formato."""
+    codec = detect(payload)
+    if codec.binary:
+        if codec.name == "msgpack" and msgpack is None:
+            raise FormatError("El archivo está en msgpack pero el paquete no está instalado")
+        payload = payload[_header_length(payload):]
+    try:
+        return codec.decode(payload)
+    except Exception as e:
+        # Cada librería lanza sus propias excepciones (ValueError, EOFError, ...)
+        raise FormatError(f"Contenido {codec.name} inválido: {e}") from e
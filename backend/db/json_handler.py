@@ -1,75 +1,112 @@
-import json
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Iterator, Optional, TypeVar
+from core.config import settings
+from db.engines import get_engine
+from db.cart_document import CartDocument, upgrade_cart
+# Estadísticas del motor JSON (se mantienen aquí por compatibilidad)
+from db.engines.json_engine import get_cache_stats, get_write_stats, get_lock_stats, clear_cache
 
 # Ajusta la ruta base para que apunte al directorio 'db'
 BASE_DIR = Path(__file__).resolve().parent
 PRODUCTS_FILE = BASE_DIR / "productos.json"
 USERS_FILE = BASE_DIR / "users.json"
+# Hashes de contraseña, separados de los perfiles (services/user_directory.py)
+CREDENTIALS_FILE = BASE_DIR / "credentials.json"
 ORDERS_FILE = BASE_DIR / "orders.json"
 CART_FILE = BASE_DIR / "carts.json"  # NUEVO: Archivo para carritos
 
-def _load_data(file_path: Path, default: Any) -> Any:
-    if not file_path.exists():
-        # Crea el archivo si no existe con el valor por defecto
-        _save_data(file_path, default)
-        return default
-    try:
-        return json.loads(file_path.read_text(encoding='utf-8'))
-    except json.JSONDecodeError:
-        return default
-
-def _save_data(file_path: Path, data: Any):
-    file_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
+# Todas las funciones delegan en el motor de almacenamiento activo
+# (STORAGE_ENGINE en core/config.py). Las colecciones se identifican por su
+# nombre de archivo tanto en el motor JSON como en SQLite.
 
 def load_products() -> List[Dict[str, Any]]:
-    data = _load_data(PRODUCTS_FILE, {"productos": []})
+    data = get_engine().load(PRODUCTS_FILE.name, {"productos": []})
     return data.get("productos", [])
 
 def load_users() -> Dict[str, Any]:
-    return _load_data(USERS_FILE, {})
+    return get_engine().load(USERS_FILE.name, {})
+
+def get_user(email: str) -> Optional[Dict[str, Any]]:
+    """Busca un usuario por email (consulta indexada en SQLite)."""
+    return get_engine().get_item(USERS_FILE.name, email)
 
 def save_users(users: Dict[str, Any]):
-    _save_data(USERS_FILE, users)
+    get_engine().save(USERS_FILE.name, users)
 
 def load_orders() -> List[Dict[str, Any]]:
-    return _load_data(ORDERS_FILE, [])
+    return get_engine().load(ORDERS_FILE.name, [])
 
 def save_orders(orders: List[Dict[str, Any]]):
-    _save_data(ORDERS_FILE, orders)
+    get_engine().save(ORDERS_FILE.name, orders)
+
+def append_order(order: Dict[str, Any]) -> Dict[str, Any]:
+    """Registra una orden nueva sin reescribir el historial."""
+    return get_engine().append_item(ORDERS_FILE.name, order)
+
+def get_order(order_id: str) -> Optional[Dict[str, Any]]:
+    return get_engine().get_item(ORDERS_FILE.name, order_id)
+
+def get_customer_orders(email: str) -> List[Dict[str, Any]]:
+    return get_engine().find_items(ORDERS_FILE.name, "cliente_email", email)
+
+def update_order(order_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Aplica cambios a una orden; devuelve la orden actualizada o None si no existe."""
+    return get_engine().update_item(ORDERS_FILE.name, order_id, changes)
 
 # ========== FUNCIONES DE CARRITO (NUEVAS) ==========
-def load_carts() -> Dict[str, List[Dict[str, Any]]]:
+def load_carts() -> Dict[str, Dict[str, Any]]:
     """
     Carga los carritos de todos los usuarios.
-    Estructura: { "email_usuario": [ {item1}, {item2}, ... ], ... }
+    Estructura: { "email_usuario": {carrito (ver db/cart_document.py)}, ... }
     """
-    return _load_data(CART_FILE, {})
+    carts = get_engine().load(CART_FILE.name, {})
+    return {email: upgrade_cart(cart) for email, cart in carts.items()}
 
-def save_carts(carts: Dict[str, List[Dict[str, Any]]]):
-    """Guarda todos los carritos."""
-    _save_data(CART_FILE, carts)
+def save_carts(carts: Dict[str, Any]):
+    """Guarda todos los carritos (en el formato nuevo o como listas de items)."""
+    get_engine().save(CART_FILE.name, {email: upgrade_cart(cart) for email, cart in carts.items()})
 
-def get_user_cart(email: str) -> List[Dict[str, Any]]:
+def _get_cart(email: str) -> CartDocument:
     if not email or not isinstance(email, str):
         raise ValueError("Email inválido")
-    carts = load_carts()
-    return carts.get(email, [])
+    return CartDocument(upgrade_cart(get_engine().get_item(CART_FILE.name, email, None)))
+
+def get_user_cart(email: str) -> List[Dict[str, Any]]:
+    """Items del carrito de un usuario, en el orden en que se añadieron."""
+    return _get_cart(email).items()
+
+def get_user_cart_summary(email: str) -> Dict[str, Any]:
+    """Items, total y unidades del carrito (el total ya está calculado)."""
+    return _get_cart(email).summary()
 
 def save_user_cart(email: str, cart_items: List[Dict[str, Any]]):
-    if not email or not isinstance(email, str):
-        raise ValueError("Email inválido")
     if not isinstance(cart_items, list):
         raise ValueError("Los items deben ser una lista")
-    carts = load_carts()
-    carts[email] = cart_items
-    save_carts(carts)
+    with edit_user_cart(email) as cart:
+        cart.replace(cart_items)
 
 def clear_user_cart(email: str):
     """Vacía el carrito de un usuario."""
-    carts = load_carts()
-    carts[email] = []
-    save_carts(carts)
+    with edit_user_cart(email) as cart:
+        cart.clear()
+
+@contextmanager
+def edit_user_cart(email: str) -> Iterator[CartDocument]:
+    """
+    Lectura-modificación-escritura del carrito de un usuario.
+    El CartDocument cedido se modifica en el sitio y se guarda al salir del
+    bloque (no se guarda si el bloque lanza una excepción). Un carrito en el
+    formato antiguo se convierte aquí y se guarda ya convertido.
+    """
+    if not email or not isinstance(email, str):
+        raise ValueError("Email inválido")
+    with get_engine().edit_item(CART_FILE.name, email, {}, upgrade=upgrade_cart) as data:
+        yield CartDocument(data)
 
 def read_json(filename: str) -> Any:
     """
@@ -81,8 +118,7 @@ def read_json(filename: str) -> Any:
     Returns:
         Los datos del JSON parseados
     """
-    file_path = BASE_DIR / filename
-    return _load_data(file_path, {})
+    return get_engine().load(filename, {})
 
 def write_json(filename: str, data: Any):
     """
@@ -92,5 +128,87 @@ def write_json(filename: str, data: Any):
         filename: Nombre del archivo (ej: "productos.json")
         data: Datos a escribir
     """
-    file_path = BASE_DIR / filename
-    _save_data(file_path, data)
\ No newline at end of file
+    get_engine().save(filename, data)
+
+def transaction(filename: str, default: Any = None):
+    """
+    Lectura-modificación-escritura atómica de un archivo del directorio db.
+
+    Los escritores del mismo archivo quedan serializados (también entre
+    workers de uvicorn) y los datos cedidos se guardan al salir del bloque,
+    salvo que el bloque lance una excepción. Los datos deben modificarse en
+    el sitio.
+
+    Ejemplo:
+        with transaction("users.json") as users:
+            users[email]["status"] = "blocked"
+    """
+    return get_engine().transaction(filename, {} if default is None else default)
+
+def read_transaction(filename: str, default: Any = None):
+    """
+    Lectura consistente bajo bloqueo compartido: varios lectores a la vez,
+    ningún escritor del mismo archivo mientras dure el bloque.
+    """
+    return get_engine().read_transaction(filename, {} if default is None else default)
+
+# ========== API ASÍNCRONA ==========
+# Las rutas `async def` no deben llamar a las funciones de arriba: leer y
+# parsear un archivo bloquearía el event loop para todas las peticiones.
+# Estas variantes hacen el mismo trabajo en un pool de hilos acotado
+# (DB_IO_WORKERS), así un disco lento solo frena a quien espera el dato.
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.DB_IO_WORKERS), thread_name_prefix="db-io"
+                )
+    return _executor
+
+async def run_in_db_executor(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Ejecuta una función síncrona de almacenamiento en el pool de E/S."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+async def aload_products() -> List[Dict[str, Any]]:
+    return await run_in_db_executor(load_products)
+
+async def aload_users() -> Dict[str, Any]:
+    return await run_in_db_executor(load_users)
+
+async def aget_user(email: str) -> Optional[Dict[str, Any]]:
+    return await run_in_db_executor(get_user, email)
+
+async def aload_orders() -> List[Dict[str, Any]]:
+    return await run_in_db_executor(load_orders)
+
+async def aread_json(filename: str) -> Any:
+    return await run_in_db_executor(read_json, filename)
+
+async def awrite_json(filename: str, data: Any):
+    await run_in_db_executor(write_json, filename, data)
+
+def _apply_in_transaction(filename: str, default: Any, mutate: Callable[[Any], T]) -> T:
+    with transaction(filename, default) as data:
+        return mutate(data)
+
+async def atransaction(filename: str, mutate: Callable[[Any], T], default: Any = None) -> T:
+    """
+    Versión async de `transaction`: `mutate(data)` se ejecuta en el pool de
+    E/S con el archivo bloqueado y debe modificar los datos en el sitio. Si
+    lanza una excepción no se guarda nada y la excepción llega al llamador.
+
+    Ejemplo:
+        def block(users):
+            users[email]["status"] = "blocked"
+        await atransaction("users.json", block)
+    """
+    return await run_in_db_executor(_apply_in_transaction, filename, default, mutate)
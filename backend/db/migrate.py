@@ -0,0 +1,117 @@
+# backend/db/migrate.py
+"""
+Importa los archivos db/*.json actuales al motor SQLite.
+
+Uso (desde la carpeta backend):
+    python -m db.migrate                         # usa SQLITE_PATH de la configuración
+    python -m db.migrate --sqlite otra_base.sqlite3
+    python -m db.migrate --split-credentials     # solo separa las contraseñas (motor activo)
+
+Después basta con poner STORAGE_ENGINE=sqlite en el .env. Los archivos JSON
+no se modifican, así que se puede volver al motor JSON en cualquier momento
+(perdiendo lo escrito mientras tanto en SQLite).
+
+--split-credentials lleva los hashes de contraseña de un users.json antiguo
+a credentials.json. Mientras no se haga, el login los sigue leyendo de
+users.json.
+"""
+
+import argparse
+from pathlib import Path
+from typing import Any, Dict, Optional
+from db.engines import DB_DIR, JsonEngine, SQLiteEngine, StorageEngine, get_engine, sqlite_path
+from db.engines.json_engine import _load_data
+from db.json_handler import CREDENTIALS_FILE, USERS_FILE
+
+# Colecciones que el motor JSON no guarda en su archivo .json: las órdenes
+# viven en el ledger y los carritos en shards. Se importan aparte del glob
+# (ver _read_source)
+ENGINE_COLLECTIONS = ("orders.json", "carts.json")
+
+def _count(filename: str, data: Any) -> int:
+    if filename == "productos.json":
+        return len(data.get("productos", []))
+    return len(data) if isinstance(data, (list, dict)) else 1
+
+def _read_source(source: JsonEngine, filename: str) -> Any:
+    """
+    Una colección del origen, sin modificarlo. Si carts.json u orders.json
+    siguen existiendo se leen tal cual: pasar por el motor los repartiría en
+    shards o en el ledger y los renombraría a .migrated.
+    """
+    path = DB_DIR / filename
+    if filename in ENGINE_COLLECTIONS and path.exists():
+        return _load_data(path, source.empty(filename), create=False, strict=True)
+    return source.load(filename, source.empty(filename))
+
+def migrate(target_path: Optional[Path] = None) -> Dict[str, int]:
+    """
+    Copia cada colección a SQLite y devuelve cuántos elementos importó de
+    cada una. Lanza RuntimeError si lo que queda en SQLite no cuadra con el
+    origen.
+    """
+    source = JsonEngine(DB_DIR)
+    target = SQLiteEngine(target_path or sqlite_path())
+    filenames = [
+        path.name for path in sorted(DB_DIR.glob("*.json"))
+        if not path.name.startswith(".") and path.name not in ENGINE_COLLECTIONS
+    ]
+    counts = {}
+    for filename in [*ENGINE_COLLECTIONS, *filenames]:
+        data = _read_source(source, filename)
+        target.save(filename, data)
+        expected = _count(filename, data)
+        imported = _count(filename, target.load(filename, target.empty(filename)))
+        if imported != expected:
+            raise RuntimeError(f"{filename}: {expected} elementos en el origen y {imported} en SQLite")
+        counts[filename] = imported
+    split_credentials(target)
+    return counts
+
+def split_credentials(engine: Optional[StorageEngine] = None) -> int:
+    """
+    Lleva los hashes que aún estén en users.json a credentials.json (sin
+    pisar uno ya guardado allí). Devuelve cuántos movió.
+    """
+    engine = engine or get_engine()
+    # Primero se copian y después se quitan de users.json: si algo falla a
+    # medias, el hash sigue en al menos uno de los dos archivos. Las
+    # transacciones no se anidan (SQLite no lo permite en una conexión).
+    users = engine.load(USERS_FILE.name, {})
+    legacy = {
+        key: record["hashed_password"]
+        for key, record in users.items()
+        if isinstance(record, dict) and "hashed_password" in record
+    }
+    if not legacy:
+        return 0
+    with engine.transaction(CREDENTIALS_FILE.name, engine.empty(CREDENTIALS_FILE.name)) as credentials:
+        for key, hashed_password in legacy.items():
+            credentials.setdefault(key.strip().lower(), {"hashed_password": hashed_password})
+    with engine.transaction(USERS_FILE.name, engine.empty(USERS_FILE.name)) as users:
+        for key in legacy:
+            if isinstance(users.get(key), dict):
+                users[key].pop("hashed_password", None)
+    return len(legacy)
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa db/*.json a SQLite")
+    parser.add_argument("--sqlite", type=Path, default=None, help="Ruta de la base SQLite de destino")
+    parser.add_argument(
+        "--split-credentials", action="store_true",
+        help="Solo mover las contraseñas de users.json a credentials.json en el motor activo",
+    )
+    args = parser.parse_args()
+
+    if args.split_credentials:
+        moved = split_credentials()
+        print(f"✅ {moved} contraseñas movidas de users.json a credentials.json")
+        return
+
+    target = args.sqlite or sqlite_path()
+    for filename, count in migrate(target).items():
+        print(f"✅ {filename}: {count} elementos")
+    print(f"Base SQLite lista en {target}. Activa STORAGE_ENGINE=sqlite en el .env")
+
+if __name__ == "__main__":
+    main()
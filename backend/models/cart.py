@@ -19,6 +19,8 @@ class CartItemUpdate(BaseModel):
 class CartResponse(BaseModel):
     items: List[CartItem]
     total: float
+    # Unidades en el carrito (suma de cantidades)
+    count: int = 0
 
 class Cart(BaseModel):
     items: List[CartItem]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 from pydantic import Field
 from datetime import datetime
 import uuid
@@ -11,6 +11,37 @@ class Product(BaseModel):
     marca: str
     descripcion: str
 
+class ProductDetail(Product):
+    """Producto con los datos de gestión (paneles de vendedor y admin)."""
+    stock: int = 0
+    imagen: str = ""
+    destacado: bool = False
+    vendor_id: Optional[str] = None
+    vendor_name: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+class ProductPage(BaseModel):
+    items: List[Product]
+    total: int
+    next_cursor: Optional[str] = None
+    # Conteos por categoría y marca dentro del resultado filtrado
+    facets: Dict[str, Dict[str, int]]
+
+class ProductSearchResult(BaseModel):
+    items: List[Product]
+    total: int
+    # Solo en modo prefix: términos que completan la última palabra
+    suggestions: List[str] = []
+
+class ProductChanges(BaseModel):
+    version: int
+    # True: upserts es el catálogo completo y la copia local se reemplaza
+    full: bool
+    upserts: List[Product]
+    deletes: List[int]
+
 class OrderItem(BaseModel):
     id: int
     nombre: str
@@ -27,4 +58,12 @@ class Order(BaseModel):
     cliente_email: str
     items: List[OrderItem]
     total: float
-    estado: str = "Completado"
\ No newline at end of file
+    estado: str = "Completado"
+
+class CheckoutResult(BaseModel):
+    order: Order
+    subtotal: float
+    # Descuento general de platform_config.json (ya aplicado en precio_final)
+    descuento: float
+    impuestos: float
+    total: float
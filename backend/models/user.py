@@ -8,6 +8,10 @@ class User(BaseModel):
     tipo: str = "cliente"
     role: Literal["customer", "vendor", "admin"] = "customer"  # ← NUEVO
 
+class UserListing(User):
+    """Usuario tal como lo lista el panel de administración (sin contraseña)."""
+    status: str = "active"
+
 class UserInDB(User):
     hashed_password: str
 
@@ -0,0 +1,118 @@
+# backend/scripts/bench_formats.py
+"""
+Compara los formatos de db/formats.py: tamaño en disco y tiempo de guardar y
+cargar conjuntos de datos sintéticos con la forma de productos.json,
+users.json y orders.json.
+
+Uso (desde la carpeta backend):
+    python -m scripts.bench_formats
+    python -m scripts.bench_formats --sizes 1000 50000 --repeat 3
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+from db import formats
+
+CATEGORIAS = ["Procesadores", "Tarjetas Gráficas", "Memorias", "Almacenamiento", "Periféricos"]
+MARCAS = ["Intel", "AMD", "NVIDIA", "Kingston", "Logitech", "Corsair"]
+
+def make_products(n: int) -> Dict[str, Any]:
+    return {
+        "productos": [
+            {
+                "id": i,
+                "nombre": f"Producto {i} {random.choice(MARCAS)}",
+                "precio": random.randint(50_000, 9_000_000),
+                "categoria": random.choice(CATEGORIAS),
+                "marca": random.choice(MARCAS),
+                "imagen": "",
+                "destacado": random.random() < 0.1,
+                "descripcion": "Descripción de prueba con tildes y ñ " * 3,
+                "vendor_id": f"vendor{i % 50}@merify.com",
+                "vendor_name": "Vendedor Demo",
+                "status": "active",
+                "stock": random.randint(0, 100),
+                "created_at": "2025-01-01T00:00:00",
+            }
+            for i in range(1, n + 1)
+        ],
+        "categorias": CATEGORIAS,
+        "marcas": MARCAS,
+    }
+
+def make_users(n: int) -> Dict[str, Any]:
+    return {
+        f"user{i}@merify.com": {
+            "nombre": f"Usuario {i}",
+            "email": f"user{i}@merify.com",
+            "tipo": "cliente",
+            "role": "cliente",
+            "hashed_password": "$5$rounds=535000$" + uuid.uuid4().hex,
+        }
+        for i in range(n)
+    }
+
+def make_orders(n: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "fecha": "2025-10-03T07:37:52.633815",
+            "cliente_email": f"user{random.randrange(n)}@merify.com",
+            "items": [
+                {"id": random.randint(1, 1000), "nombre": "Tarjeta Gráfica", "cantidad": 1, "precio_final": 4670000.0}
+                for _ in range(random.randint(1, 4))
+            ],
+            "total": 4670000.0,
+            "estado": "pendiente",
+        }
+        for _ in range(n)
+    ]
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def bench(name: str, data: Any, directory: Path, repeat: int):
+    print(f"\n{name}")
+    print(f"  {'formato':<14}{'tamaño':>14}{'guardar ms':>13}{'cargar ms':>12}")
+    for format_name in formats.available_formats():
+        codec = formats.get_codec(format_name)
+        path = directory / f"{name}.{format_name}"
+
+        def save():
+            path.write_bytes(formats.encode(data, codec))
+
+        def load():
+            return formats.decode(path.read_bytes())
+
+        save_ms = best_of(repeat, save)
+        load_ms = best_of(repeat, load)
+        assert load() == formats.decode(formats.encode(data, formats.get_codec("json")))
+        print(f"  {format_name:<14}{path.stat().st_size:>14,}{save_ms:>13.1f}{load_ms:>12.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de formatos de serialización")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 20_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(42)
+    missing = [name for name in ("orjson", "msgpack") if getattr(formats, name) is None]
+    if missing:
+        print(f"ℹ️  No instalados: {', '.join(missing)} (orjson cae a json-compact, msgpack se omite)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            for name, factory in (("productos", make_products), ("users", make_users), ("orders", make_orders)):
+                bench(f"{name} (n={n:,})", factory(n), Path(tmp), args.repeat)
+
+if __name__ == "__main__":
+    main()
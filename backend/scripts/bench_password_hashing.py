@@ -0,0 +1,63 @@
+# backend/scripts/bench_password_hashing.py
+"""
+Mide cuántos logins por segundo (verificaciones de contraseña) da cada
+núcleo con distintos valores de PASSWORD_HASH_ROUNDS, y el rendimiento del
+pool de core/hashing.py con varios procesos.
+
+Sirve para elegir el coste: con R logins/s por núcleo y W procesos en el
+pool, un worker de uvicorn aguanta unos R * W logins/s sin quitar CPU al
+resto de rutas.
+
+Uso (desde la carpeta backend):
+    python -m scripts.bench_password_hashing
+    python -m scripts.bench_password_hashing --rounds 100000 535000 --workers 1 2 4 --logins 200
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from core.hashing import PasswordHasher, hash_password, verify_and_update
+
+PASSWORD = "contraseña-de-prueba-123"
+
+def per_core(rounds: int, logins: int) -> float:
+    """Verificaciones por segundo en el proceso actual (un núcleo)."""
+    hashed = hash_password(PASSWORD, rounds)
+    start = time.perf_counter()
+    for _ in range(logins):
+        verify_and_update(PASSWORD, hashed, rounds)
+    return logins / (time.perf_counter() - start)
+
+async def with_pool(rounds: int, workers: int, logins: int) -> float:
+    """Verificaciones por segundo con `logins` peticiones concurrentes en el pool."""
+    hasher = PasswordHasher(rounds, workers)
+    try:
+        hashed = await hasher.hash(PASSWORD)
+        # Calienta todos los procesos del pool antes de medir
+        await asyncio.gather(*(hasher.verify(PASSWORD, hashed) for _ in range(workers)))
+        start = time.perf_counter()
+        results = await asyncio.gather(*(hasher.verify(PASSWORD, hashed) for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+    finally:
+        hasher.shutdown()
+    assert all(valid for valid, _ in results)
+    return logins / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del hashing de contraseñas")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[100_000, 535_000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--logins", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}, {args.logins} logins por medición")
+    for rounds in args.rounds:
+        single = per_core(rounds, args.logins)
+        print(f"\nrounds={rounds}: {single:8.1f} logins/s por núcleo ({1000 / single:.1f} ms por login)")
+        for workers in args.workers:
+            rate = asyncio.run(with_pool(rounds, workers, args.logins))
+            print(f"  pool de {workers}: {rate:8.1f} logins/s ({rate / workers:.1f} por proceso)")
+
+if __name__ == "__main__":
+    main()
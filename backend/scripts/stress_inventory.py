@@ -0,0 +1,142 @@
+# backend/scripts/stress_inventory.py
+"""
+Prueba de carga de services/inventory_service.py: muchos hilos reservan,
+confirman, liberan y abandonan reservas (que expiran) sobre pocos productos
+con poco stock, mientras el barrido guarda las ventas en segundo plano.
+
+Al final comprueba que no se vendió más de lo que había, que el stock
+guardado es exactamente el inicial menos lo vendido y que no quedan
+unidades reservadas. Sale con código 1 si algo no cuadra.
+
+Trabaja sobre un directorio temporal con el motor JSON (el de por defecto)
+o con SQLite (--engine sqlite), así que no toca los datos de db/. Todos los
+hilos comparten un proceso: InventoryService guarda las reservas en
+memoria y solo garantiza no sobrevender con un único proceso que venda
+(ver su docstring). tests/test_inventory.py la ejecuta en versión corta.
+
+Uso (desde la carpeta backend):
+    python -m scripts.stress_inventory
+    python -m scripts.stress_inventory --threads 64 --products 5 --stock 200 --seconds 10 --engine sqlite
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+def use_temporary_engine(name: str, directory: Path):
+    """Pone como motor activo uno nuevo sobre `directory`; devuelve el anterior."""
+    from db.engines import JsonEngine, SQLiteEngine, use_engine
+
+    if name == "json":
+        return use_engine(JsonEngine(directory))
+    if name == "sqlite":
+        return use_engine(SQLiteEngine(directory / "stress.sqlite3"))
+    raise ValueError(f"Motor '{name}' no soportado. Disponibles: json, sqlite")
+
+def run(catalog, args) -> bool:
+    from services.inventory_service import InsufficientStockError, InventoryService
+
+    created = catalog.create_many([
+        {"nombre": f"Producto {i}", "precio": 1000.0, "categoria": "Pruebas", "marca": "Merify",
+         "descripcion": "", "stock": args.stock, "status": "active"}
+        for i in range(args.products)
+    ])
+    product_ids = [p["id"] for p in created]
+
+    inventory = InventoryService(catalog, stripes=args.stripes, reservation_ttl=0.2)
+    catalog.refresh()
+    catalog.subscribe(inventory)
+    inventory.start(interval=0.05)
+
+    sold: Dict[int, int] = {product_id: 0 for product_id in product_ids}
+    counts = {"committed": 0, "released": 0, "abandoned": 0, "rejected": 0}
+    merge_lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        local_sold = {product_id: 0 for product_id in product_ids}
+        local = dict.fromkeys(counts, 0)
+        while time.monotonic() < deadline:
+            lines = {pid: rng.randint(1, 3) for pid in rng.sample(product_ids, rng.randint(1, min(3, len(product_ids))))}
+            try:
+                reservation = inventory.reserve(lines)
+            except InsufficientStockError:
+                local["rejected"] += 1
+                continue
+            action = rng.random()
+            if action < 0.7:
+                inventory.commit(reservation.id)
+                for pid, quantity in lines.items():
+                    local_sold[pid] += quantity
+                local["committed"] += 1
+            elif action < 0.9:
+                inventory.release(reservation.id)
+                local["released"] += 1
+            else:
+                local["abandoned"] += 1  # la libera el barrido al expirar
+        with merge_lock:
+            for pid, quantity in local_sold.items():
+                sold[pid] += quantity
+            for name, value in local.items():
+                counts[name] += value
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    inventory.stop()
+    inventory.sweep(now=float("inf"))
+    inventory.flush()
+    catalog.refresh()
+
+    ok = True
+    print(f"{args.threads} hilos, {args.products} productos con stock {args.stock}, {elapsed:.1f} s")
+    print(f"  reservas: {counts}")
+    print(f"  inventario: {inventory.stats()}")
+    for pid in product_ids:
+        persisted = catalog.get(pid)["stock"]
+        available = inventory.available(pid)
+        status = "ok"
+        if sold[pid] > args.stock:
+            status, ok = "SOBREVENTA", False
+        elif persisted != args.stock - sold[pid] or available != persisted:
+            status, ok = "DESCUADRE", False
+        print(f"  producto {pid}: vendidas {sold[pid]}, guardado {persisted}, disponible {available} -> {status}")
+    if inventory.stats()["active_reservations"]:
+        print("  quedan reservas activas")
+        ok = False
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de concurrencia del inventario")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--products", type=int, default=4)
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--stripes", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--engine", choices=["json", "sqlite"], default="json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes de importar la configuración: sin fsync
+        os.environ["DB_DURABILITY"] = "none"
+        from services.catalog_service import CatalogService
+
+        use_temporary_engine(args.engine, Path(tmp))
+        ok = run(CatalogService(), args)
+    print("✅ Sin sobreventa" if ok else "❌ Falló la prueba")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -4,5 +4,15 @@ Servicios de negocio (capa de aplicación)
 """
 
 from .payment_service import PaymentService, get_payment_service
+from .catalog_service import CatalogService, ProductNotFoundError, get_catalog_service
+from .search_index import ProductSearchIndex, get_search_index
+from .inventory_service import InventoryService, InsufficientStockError, get_inventory_service
+from .user_directory import UserDirectory, UserNotFoundError, get_user_directory
 
-__all__ = ['PaymentService', 'get_payment_service']
\ No newline at end of file
+__all__ = [
+    'PaymentService', 'get_payment_service',
+    'CatalogService', 'ProductNotFoundError', 'get_catalog_service',
+    'ProductSearchIndex', 'get_search_index',
+    'InventoryService', 'InsufficientStockError', 'get_inventory_service',
+    'UserDirectory', 'UserNotFoundError', 'get_user_directory'
+]
\ No newline at end of file
@@ -0,0 +1,565 @@
+# backend/services/catalog_service.py
+import base64
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from core.config import settings
+from core.projection import Fields, project
+from db.engines import get_engine
+from db.json_handler import PRODUCTS_FILE, transaction
+
+# Campos con índice secundario
+INDEXED_FIELDS = ("vendor_id", "categoria", "marca", "status")
+
+def _price(product: Dict[str, Any]) -> float:
+    return float(product.get("precio") or 0)
+
+# Órdenes de listado: (clave de ordenación, descendente). Todas las claves
+# terminan en el id, así son únicas y sirven de cursor.
+SORT_KEYS: Dict[str, Callable[[Dict[str, Any]], tuple]] = {
+    "name": lambda p: (str(p.get("nombre") or "").casefold(), p["id"]),
+    "price": lambda p: (_price(p), p["id"]),
+    "newest": lambda p: (str(p.get("created_at") or ""), p["id"]),
+}
+SORTS: Dict[str, Tuple[str, bool]] = {
+    "name": ("name", False),
+    "name_desc": ("name", True),
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+    "newest": ("newest", True),
+}
+FACET_FIELDS = ("categoria", "marca")
+QUERY_CACHE_SIZE = 128
+
+class _ResultSet:
+    """Resultado ordenado de unos filtros: claves e ids paralelos y facetas."""
+
+    __slots__ = ("keys", "ids", "facets")
+
+    def __init__(self, keys: List[tuple], ids: List[int], facets: Dict[str, Dict[Any, int]]):
+        self.keys = keys
+        self.ids = ids
+        self.facets = facets
+
+def _encode_cursor(key: tuple) -> str:
+    raw = json.dumps(list(key), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except ValueError:
+        raise ValueError("Cursor inválido")
+    if not isinstance(key, list) or not key:
+        raise ValueError("Cursor inválido")
+    return tuple(key)
+
+# (producto antes, producto después): None antes = alta, None después = baja
+Change = Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+# Token tras una escritura propia: aún no se conoce la firma que dejó
+_OWN_WRITE = object()
+
+def _journal_entry(version: int, changes: List[Change]) -> Dict[str, Any]:
+    """Entrada del diario de cambios: ids que tocó una versión."""
+    ids = {p["id"] for change in changes for p in change if p is not None}
+    return {"version": version, "ids": sorted(ids)}
+
+class ProductNotFoundError(LookupError):
+    """El producto no existe en el catálogo."""
+
+class CatalogListener(ABC):
+    """
+    Observador de los cambios del catálogo (p. ej. el índice de búsqueda).
+    Se llama con el lock del catálogo tomado, así que recibe los eventos en
+    el mismo orden en que se aplican; no debe llamar de vuelta al catálogo.
+    """
+
+    @abstractmethod
+    def reset(self, products: List[Dict[str, Any]]):
+        """El catálogo se (re)cargó completo."""
+        pass
+
+    @abstractmethod
+    def apply(self, changes: List[Change]):
+        """Cambios incrementales confirmados (altas, modificaciones y bajas)."""
+        pass
+
+class CatalogService:
+    """
+    Catálogo de productos en memoria con índices por id y por los campos de
+    INDEXED_FIELDS.
+
+    productos.json lleva un contador "version" que cada escritura del
+    servicio incrementa (y la hora de esa escritura en "modified_at"), y un
+    diario acotado "journal" con los ids que tocó cada versión, que es lo
+    que usa changes() para la sincronización incremental de los clientes.
+
+    Antes de cada lectura se compara un token barato del motor (la firma
+    del archivo en el motor JSON) con el que quedó tras la última carga o
+    escritura de este proceso. Si cambió, alguien más escribió (otro
+    worker, una edición a mano, db/convert.py): si la versión avanzó y el
+    diario cubre el salto se reindexan solo esos ids; si no, se reconstruyen
+    los índices. Las escrituras de este proceso actualizan los índices de
+    forma incremental; su firma no se puede leer sin carrera (otro worker
+    puede escribir justo detrás), así que la lectura siguiente carga el
+    archivo una vez y solo lo da por propio si la versión es la nuestra.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._version: Optional[int] = None
+        self._modified_at: Optional[float] = None
+        # [{"version": v, "ids": [...]}, ...] de versiones consecutivas
+        self._journal: List[Dict[str, Any]] = []
+        self._token: Any = None
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        # campo -> valor -> ids (dict como conjunto ordenado)
+        self._indexes: Dict[str, Dict[Any, Dict[int, None]]] = {f: {} for f in INDEXED_FIELDS}
+        # (filtros, orden) -> _ResultSet de la versión actual (LRU)
+        self._results: "OrderedDict[tuple, _ResultSet]" = OrderedDict()
+        self._listeners: List[CatalogListener] = []
+
+    # --- Sincronización con el almacenamiento ---
+    def _sync(self):
+        engine = get_engine()
+        token = engine.change_token(PRODUCTS_FILE.name)
+        with self._lock:
+            if self._loaded and token is not None and token == self._token:
+                return
+        data = engine.load(PRODUCTS_FILE.name, {"productos": []})
+        with self._lock:
+            if self._loaded and self._token is _OWN_WRITE and data.get("version", 0) == self._version:
+                pass  # es nuestra última escritura: solo faltaba su firma
+            # El token cambió: la versión solo decide cómo ponerse al día
+            elif not self._loaded or not self._replay(data):
+                self._rebuild(data)
+            self._token = token
+
+    def _replay(self, data: Dict[str, Any]) -> bool:
+        """
+        Aplica las versiones que otro worker añadió desde la cargada,
+        reindexando solo los ids del diario. Devuelve False si el diario no
+        cubre el salto (o la versión no avanzó) y hay que reconstruir.
+        """
+        version = data.get("version", 0)
+        if self._version is None or version <= self._version:
+            return False
+        entries = [e for e in data.get("journal", []) if e.get("version", 0) > self._version]
+        if [e.get("version") for e in entries] != list(range(self._version + 1, version + 1)):
+            return False
+        ids = {i for entry in entries for i in entry.get("ids", [])}
+        current = {p["id"]: p for p in data.get("productos", []) if p.get("id") in ids}
+        changes: List[Change] = []
+        for product_id in sorted(ids):
+            before, after = self._by_id.get(product_id), current.get(product_id)
+            if before is not None:
+                self._unindex(before)
+                self._by_id.pop(product_id, None)
+            if after is not None:
+                self._index(after)
+            if before is not None or after is not None:
+                changes.append((before, after))
+        self._version = version
+        self._modified_at = data.get("modified_at")
+        self._journal = list(data.get("journal", []))
+        self._results.clear()
+        for listener in self._listeners:
+            listener.apply(changes)
+        return True
+
+    def _rebuild(self, data: Dict[str, Any]):
+        self._by_id = {}
+        self._indexes = {f: {} for f in INDEXED_FIELDS}
+        for product in data.get("productos", []):
+            self._index(product)
+        self._version = data.get("version", 0)
+        self._modified_at = data.get("modified_at")
+        self._journal = list(data.get("journal", []))
+        self._loaded = True
+        self._results.clear()
+        products = list(self._by_id.values())
+        for listener in self._listeners:
+            listener.reset(products)
+
+    def _index(self, product: Dict[str, Any]):
+        self._by_id[product["id"]] = product
+        for field in INDEXED_FIELDS:
+            self._indexes[field].setdefault(product.get(field), {})[product["id"]] = None
+
+    def _unindex(self, product: Dict[str, Any]):
+        for field in INDEXED_FIELDS:
+            bucket = self._indexes[field].get(product.get(field))
+            if bucket is not None:
+                bucket.pop(product["id"], None)
+                if not bucket:
+                    del self._indexes[field][product.get(field)]
+
+    def _write(self, apply: Callable[[List[Dict[str, Any]]], Tuple[Any, List[Change]]]) -> Any:
+        """
+        Aplica `apply(productos)` dentro de una transacción sobre productos.json,
+        incrementa la versión y, ya confirmada la escritura, lleva los cambios
+        a los índices. Si entretanto escribió otro worker, se marca el
+        catálogo para recargar en la siguiente lectura.
+        """
+        with transaction(PRODUCTS_FILE.name, {"productos": []}) as data:
+            result, changes = apply(data.setdefault("productos", []))
+            base_version = data.get("version", 0)
+            data["version"] = base_version + 1
+            data["modified_at"] = time.time()
+            entry = _journal_entry(base_version + 1, changes)
+            journal = data.setdefault("journal", [])
+            journal.append(entry)
+            del journal[:-max(1, settings.CATALOG_JOURNAL_SIZE)]
+        with self._lock:
+            if self._loaded and self._version == base_version:
+                for before, after in changes:
+                    if before is not None:
+                        self._unindex(before)
+                        self._by_id.pop(before["id"], None)
+                    if after is not None:
+                        self._index(dict(after))
+                self._version = base_version + 1
+                self._modified_at = data["modified_at"]
+                self._journal.append(entry)
+                del self._journal[:-max(1, settings.CATALOG_JOURNAL_SIZE)]
+                self._results.clear()
+                for listener in self._listeners:
+                    listener.apply(changes)
+                self._token = _OWN_WRITE
+            else:
+                self._loaded = False
+        return result
+
+    def subscribe(self, listener: CatalogListener):
+        """Registra un observador; si el catálogo ya está cargado recibe un reset."""
+        with self._lock:
+            self._listeners.append(listener)
+            if self._loaded:
+                listener.reset(list(self._by_id.values()))
+
+    def refresh(self):
+        """Recarga el catálogo si otro worker lo modificó (notifica a los observadores)."""
+        self._sync()
+
+    # --- Lectura ---
+    @property
+    def version(self) -> int:
+        self._sync()
+        return self._version
+
+    @property
+    def last_modified(self) -> Optional[float]:
+        """Momento (epoch) de la última escritura del catálogo; None si no consta."""
+        self._sync()
+        return self._modified_at
+
+    def get(self, product_id: int) -> Optional[Dict[str, Any]]:
+        self._sync()
+        with self._lock:
+            product = self._by_id.get(product_id)
+            return dict(product) if product is not None else None
+
+    def all(self, fields: Fields = None) -> List[Dict[str, Any]]:
+        """Todos los productos; con `fields` solo esos campos de cada uno."""
+        self._sync()
+        with self._lock:
+            return [project(p, fields) for p in self._by_id.values()]
+
+    def ids(self, field: str, value: Any) -> set:
+        """Ids de los productos cuyo campo indexado `field` vale `value`."""
+        self._sync()
+        with self._lock:
+            return set(self._indexes[field].get(value, ()))
+
+    def iter_by(self, field: str, value: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre (por id) los productos cuyo campo indexado `field` vale
+        `value`, copiando uno cada vez: para exportaciones que no deben
+        cargar la lista completa en memoria.
+        """
+        for product_id in sorted(self.ids(field, value)):
+            with self._lock:
+                product = self._by_id.get(product_id)
+                product = dict(product) if product is not None else None
+            if product is not None:
+                yield product
+
+    def find(self, fields: Fields = None, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Productos que cumplen todos los filtros (solo campos indexados), p. ej.
+        find(vendor_id=email) o find(categoria="Memorias", status="active").
+        Cuesta lo que el índice más pequeño de los filtros. Con `fields` se
+        copian solo esos campos de cada producto.
+        """
+        unknown = set(filters) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos sin índice: {', '.join(sorted(unknown))}")
+        self._sync()
+        with self._lock:
+            if not filters:
+                return [project(p, fields) for p in self._by_id.values()]
+            buckets = [self._indexes[f].get(v, {}) for f, v in filters.items()]
+            smallest = min(buckets, key=len)
+            others = [b for b in buckets if b is not smallest]
+            return [
+                project(self._by_id[i], fields) for i in smallest
+                if all(i in bucket for bucket in others)
+            ]
+
+    # --- Listado paginado ---
+    def query(
+        self,
+        limit: int = 24,
+        cursor: Optional[str] = None,
+        sort: str = "name",
+        categoria: Optional[str] = None,
+        marca: Optional[str] = None,
+        status: Optional[str] = None,
+        destacado: Optional[bool] = None,
+        min_precio: Optional[float] = None,
+        max_precio: Optional[float] = None,
+        fields: Fields = None,
+    ) -> Dict[str, Any]:
+        """
+        Una página del catálogo con paginación por cursor (keyset): el cursor
+        es la clave del último producto entregado, así que las altas y bajas
+        no desplazan las páginas siguientes.
+
+        Cada combinación de filtros y orden se calcula una vez por versión del
+        catálogo (ids ordenados + facetas) y queda en una caché LRU; una página
+        cuesta O(log n + limit). Con `fields` los items solo llevan esos
+        campos (el cursor se calcula sobre el producto completo).
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Orden '{sort}' no soportado. Disponibles: {', '.join(SORTS)}")
+        sort_key, descending = SORTS[sort]
+        after = _decode_cursor(cursor) if cursor else None
+        filters = (
+            ("categoria", categoria), ("marca", marca), ("status", status),
+            ("destacado", destacado), ("min_precio", min_precio), ("max_precio", max_precio),
+        )
+        self._sync()
+        with self._lock:
+            cache_key = (filters, sort_key)
+            result = self._results.get(cache_key)
+            if result is None:
+                result = self._build_result(dict(filters), sort_key)
+                self._results[cache_key] = result
+                if len(self._results) > QUERY_CACHE_SIZE:
+                    self._results.popitem(last=False)
+            else:
+                self._results.move_to_end(cache_key)
+
+            try:
+                if descending:
+                    end = bisect_left(result.keys, after) if after else len(result.ids)
+                    start = max(0, end - limit)
+                    page, has_more = result.ids[start:end][::-1], start > 0
+                else:
+                    start = bisect_right(result.keys, after) if after else 0
+                    end = start + limit
+                    page, has_more = result.ids[start:end], end < len(result.ids)
+            except TypeError:
+                # Cursor de otro orden (tipos de clave distintos)
+                raise ValueError("Cursor inválido para este orden")
+
+            items = [project(self._by_id[i], fields) for i in page]
+            return {
+                "items": items,
+                "total": len(result.ids),
+                "next_cursor": _encode_cursor(SORT_KEYS[sort_key](self._by_id[page[-1]])) if has_more and page else None,
+                "facets": {field: dict(counts) for field, counts in result.facets.items()},
+                # Versión del catálogo de la que sale esta página
+                "version": self._version,
+            }
+
+    # --- Sincronización incremental ---
+    def changes(self, since: int) -> Dict[str, Any]:
+        """
+        Lo que cambió desde la versión `since`: los productos creados o
+        modificados (upserts, en su estado actual) y los ids borrados
+        (deletes). Si el diario ya no llega hasta `since` (se compactó, o la
+        versión no existe) se devuelve el catálogo completo con full=True y
+        el cliente debe reemplazar su copia.
+        """
+        self._sync()
+        with self._lock:
+            version, journal = self._version, self._journal
+            pending = version - since
+            covered = pending == 0 or (
+                0 < pending <= len(journal) and journal[-1]["version"] == version
+            )
+            if not covered:
+                return {
+                    "version": version,
+                    "full": True,
+                    "upserts": [dict(p) for p in self._by_id.values()],
+                    "deletes": [],
+                }
+            # Las entradas son de versiones consecutivas: las últimas `pending`
+            touched = set()
+            for entry in journal[len(journal) - pending:]:
+                touched.update(entry["ids"])
+            ids = sorted(touched)
+            return {
+                "version": version,
+                "full": False,
+                "upserts": [dict(self._by_id[i]) for i in ids if i in self._by_id],
+                "deletes": [i for i in ids if i not in self._by_id],
+            }
+
+    def _build_result(self, filters: Dict[str, Any], sort_key: str) -> _ResultSet:
+        # Se parte del índice más pequeño de los filtros por igualdad
+        buckets = [
+            self._indexes[f].get(filters[f], {})
+            for f in ("categoria", "marca", "status") if filters[f] is not None
+        ]
+        candidates = min(buckets, key=len) if buckets else self._by_id
+        others = [b for b in buckets if b is not candidates]
+        destacado, low, high = filters["destacado"], filters["min_precio"], filters["max_precio"]
+
+        matched = []
+        for product_id in candidates:
+            if any(product_id not in bucket for bucket in others):
+                continue
+            product = self._by_id[product_id]
+            if destacado is not None and bool(product.get("destacado")) != destacado:
+                continue
+            if (low is not None and _price(product) < low) or (high is not None and _price(product) > high):
+                continue
+            matched.append(product)
+
+        key_of = SORT_KEYS[sort_key]
+        matched.sort(key=key_of)
+        facets: Dict[str, Dict[Any, int]] = {field: {} for field in FACET_FIELDS}
+        for product in matched:
+            for field in FACET_FIELDS:
+                value = product.get(field)
+                if value is not None:
+                    facets[field][value] = facets[field].get(value, 0) + 1
+        return _ResultSet([key_of(p) for p in matched], [p["id"] for p in matched], facets)
+
+    # --- Escritura ---
+    def create(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Añade un producto con un id nuevo (máximo actual + 1)."""
+        return self.create_many([fields])[0]
+
+    def create_many(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Añade varios productos en una sola escritura. Los ids se reservan en
+        bloque a partir del máximo actual, en el orden de `rows`.
+        """
+        def apply(products):
+            first = max((p.get("id", 0) for p in products), default=0) + 1
+            created = [{"id": first + offset, **fields} for offset, fields in enumerate(rows)]
+            products.extend(created)
+            return created, [(None, product) for product in created]
+        if not rows:
+            return []
+        return [dict(p) for p in self._write(apply)]
+
+    def update(
+        self,
+        product_id: int,
+        changes: Dict[str, Any],
+        check: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Aplica `changes` a un producto. `check(producto)` se ejecuta dentro de
+        la transacción antes de modificar nada (p. ej. validar el dueño) y
+        puede lanzar una excepción para cancelar.
+        """
+        def apply(products):
+            product = next((p for p in products if p.get("id") == product_id), None)
+            if product is None:
+                raise ProductNotFoundError(product_id)
+            if check is not None:
+                check(product)
+            before = dict(product)
+            product.update(changes)
+            return product, [(before, product)]
+        return dict(self._write(apply))
+
+    def update_many(
+        self,
+        changes: Dict[str, Any],
+        ids: Optional[List[int]] = None,
+        **filters: Any,
+    ) -> Dict[int, Optional[Dict[str, Any]]]:
+        """
+        Aplica `changes` a varios productos en una sola escritura: los de
+        `ids` o, sin ids, los que cumplen todos los filtros por igualdad
+        (p. ej. status="pending", vendor_id=email). Los filtros se evalúan
+        sobre los datos de la transacción, no sobre los índices.
+
+        Devuelve {id: producto actualizado}, con None para los ids que no
+        existen.
+        """
+        if ids is None and not filters:
+            raise ValueError("Se requieren ids o al menos un filtro")
+        def apply(products):
+            if ids is not None:
+                by_id = {p.get("id"): p for p in products}
+                selected = [(i, by_id.get(i)) for i in dict.fromkeys(ids)]
+            else:
+                selected = [
+                    (p.get("id"), p) for p in products
+                    if all(p.get(f) == v for f, v in filters.items())
+                ]
+            results, applied = {}, []
+            for product_id, product in selected:
+                if product is None:
+                    results[product_id] = None
+                    continue
+                before = dict(product)
+                product.update(changes)
+                results[product_id] = product
+                applied.append((before, product))
+            return results, applied
+        results = self._write(apply)
+        return {i: dict(p) if p is not None else None for i, p in results.items()}
+
+    def adjust_stock(self, deltas: Dict[int, int]) -> Dict[int, int]:
+        """
+        Suma `deltas` ({id: unidades, negativas para ventas}) al stock de
+        varios productos en una sola escritura. Devuelve el stock resultante
+        de cada producto que aún existe.
+        """
+        def apply(products):
+            stock, applied = {}, []
+            for product in products:
+                delta = deltas.get(product.get("id"))
+                if delta:
+                    before = dict(product)
+                    product["stock"] = int(product.get("stock") or 0) + delta
+                    stock[product["id"]] = product["stock"]
+                    applied.append((before, product))
+            return stock, applied
+        if not any(deltas.values()):
+            return {}
+        return self._write(apply)
+
+    def delete(self, product_id: int, check: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        def apply(products):
+            position = next((i for i, p in enumerate(products) if p.get("id") == product_id), None)
+            if position is None:
+                raise ProductNotFoundError(product_id)
+            if check is not None:
+                check(products[position])
+            product = products.pop(position)
+            return product, [(product, None)]
+        return self._write(apply)
+
+# Instancia singleton
+catalog_service = CatalogService()
+
+def get_catalog_service() -> CatalogService:
+    """Dependency injection para FastAPI"""
+    return catalog_service
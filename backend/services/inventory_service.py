@@ -0,0 +1,331 @@
+# backend/services/inventory_service.py
+import atexit
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from core.config import settings
+from services.catalog_service import (
+    CatalogListener,
+    CatalogService,
+    Change,
+    ProductNotFoundError,
+    get_catalog_service,
+)
+
+class InsufficientStockError(Exception):
+    """No hay unidades suficientes de un producto para la reserva."""
+
+    def __init__(self, product_id: int, requested: int, available: int):
+        super().__init__(f"Stock insuficiente para el producto {product_id}: pedidas {requested}, disponibles {available}")
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+
+class ReservationNotFoundError(LookupError):
+    """La reserva no existe: ya se confirmó, se liberó o expiró."""
+
+class Reservation:
+    """Unidades apartadas de uno o varios productos hasta `expires_at` (epoch)."""
+
+    __slots__ = ("id", "items", "expires_at", "owner")
+
+    def __init__(self, items: Dict[int, int], expires_at: float, owner: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.items = items
+        self.expires_at = expires_at
+        self.owner = owner
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "items": dict(self.items), "expires_at": self.expires_at, "owner": self.owner}
+
+class InventoryService(CatalogListener):
+    """
+    Contadores de stock en memoria con reservas temporales.
+
+    El disponible de un producto es: stock guardado en productos.json
+    - unidades reservadas - unidades vendidas que aún no se guardaron. Cada
+    producto se protege con una de INVENTORY_LOCK_STRIPES franjas de
+    bloqueo (id % franjas); una reserva de varios productos toma sus franjas
+    en orden, así que reservar es atómico y sin interbloqueos, y dos
+    productos de franjas distintas no se esperan entre sí.
+
+    reserve() aparta unidades, commit() las da por vendidas, release() las
+    devuelve y revert() deshace un commit() si la venta no llegó a
+    registrarse; las reservas que pasan su TTL las libera un barrido en
+    segundo plano. Las ventas se acumulan y se guardan juntas (adjust_stock
+    del catálogo) cada INVENTORY_FLUSH_INTERVAL_SECONDS, no en cada venta.
+
+    Como observador del catálogo recibe el stock guardado: altas, cambios de
+    stock de los vendedores y recargas por escrituras de otros workers.
+
+    Las reservas viven en la memoria del proceso: la garantía de no
+    sobrevender es exacta solo con un único proceso que venda (un worker de
+    uvicorn, o un solo worker atendiendo las rutas de compra). Con varios,
+    las reservas y ventas aún no guardadas de los otros no se ven hasta el
+    siguiente guardado y dos workers pueden vender las mismas unidades.
+    """
+
+    def __init__(
+        self,
+        catalog: Optional[CatalogService] = None,
+        stripes: Optional[int] = None,
+        reservation_ttl: Optional[float] = None,
+    ):
+        self.catalog = catalog or get_catalog_service()
+        self.reservation_ttl = reservation_ttl if reservation_ttl is not None else settings.INVENTORY_RESERVATION_TTL_SECONDS
+        self._stripes = [threading.Lock() for _ in range(max(1, stripes or settings.INVENTORY_LOCK_STRIPES))]
+        # Por producto (cada entrada se modifica con la franja del producto)
+        self._on_hand: Dict[int, int] = {}     # stock guardado
+        self._reserved: Dict[int, int] = {}    # reservado sin confirmar
+        self._unflushed: Dict[int, int] = {}   # vendido, pendiente de guardar
+        self._in_flight: Dict[int, int] = {}   # vendido, guardándose ahora
+        self._reservations: Dict[str, Reservation] = {}
+        self._registry_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"reserved": 0, "rejected": 0, "committed": 0, "released": 0, "expired": 0, "reverted": 0, "flushes": 0}
+        self._worker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # --- Franjas de bloqueo ---
+    @contextmanager
+    def _locked(self, product_ids: Iterable[int]) -> Iterator[None]:
+        indexes = sorted({product_id % len(self._stripes) for product_id in product_ids})
+        for index in indexes:
+            self._stripes[index].acquire()
+        try:
+            yield
+        finally:
+            for index in reversed(indexes):
+                self._stripes[index].release()
+
+    def _available(self, product_id: int) -> int:
+        return (
+            self._on_hand.get(product_id, 0)
+            - self._reserved.get(product_id, 0)
+            - self._unflushed.get(product_id, 0)
+            - self._in_flight.get(product_id, 0)
+        )
+
+    @staticmethod
+    def _add(counter: Dict[int, int], product_id: int, quantity: int):
+        value = counter.get(product_id, 0) + quantity
+        if value:
+            counter[product_id] = value
+        else:
+            counter.pop(product_id, None)
+
+    def _count(self, stat: str, n: int = 1):
+        with self._stats_lock:
+            self._stats[stat] += n
+
+    # --- CatalogListener ---
+    # Se llama con el lock del catálogo tomado: aquí solo se toman franjas,
+    # y el resto del servicio nunca pide el catálogo con una franja tomada.
+    def reset(self, products: List[Dict[str, Any]]):
+        stock = {p["id"]: int(p.get("stock") or 0) for p in products}
+        with self._locked(range(len(self._stripes))):
+            self._on_hand = stock
+
+    def apply(self, changes: List[Change]):
+        for before, after in changes:
+            product_id = (after or before)["id"]
+            with self._locked([product_id]):
+                if after is None:
+                    self._on_hand.pop(product_id, None)
+                else:
+                    self._on_hand[product_id] = int(after.get("stock") or 0)
+
+    # --- Operaciones ---
+    def available(self, product_id: int) -> int:
+        """Unidades que se pueden reservar ahora mismo."""
+        self.catalog.refresh()
+        with self._locked([product_id]):
+            if product_id not in self._on_hand:
+                raise ProductNotFoundError(product_id)
+            return max(0, self._available(product_id))
+
+    def reserve(
+        self,
+        items: Dict[int, int],
+        ttl: Optional[float] = None,
+        owner: Optional[str] = None,
+    ) -> Reservation:
+        """
+        Aparta `items` ({id de producto: unidades}) de forma atómica: o se
+        reservan todas las líneas o ninguna. Lanza InsufficientStockError o
+        ProductNotFoundError sin reservar nada.
+        """
+        if not items:
+            raise ValueError("La reserva no tiene productos")
+        if any(quantity <= 0 for quantity in items.values()):
+            raise ValueError("Las cantidades deben ser positivas")
+        # Trae el stock guardado por otros workers antes de tomar las franjas
+        self.catalog.refresh()
+        with self._locked(items):
+            for product_id, quantity in items.items():
+                if product_id not in self._on_hand:
+                    raise ProductNotFoundError(product_id)
+                available = self._available(product_id)
+                if quantity > available:
+                    self._count("rejected")
+                    raise InsufficientStockError(product_id, quantity, max(0, available))
+            for product_id, quantity in items.items():
+                self._add(self._reserved, product_id, quantity)
+        reservation = Reservation(
+            dict(items), time.time() + (self.reservation_ttl if ttl is None else ttl), owner
+        )
+        with self._registry_lock:
+            self._reservations[reservation.id] = reservation
+        self._count("reserved")
+        return reservation
+
+    def _take(self, reservation_id: str) -> Reservation:
+        with self._registry_lock:
+            reservation = self._reservations.pop(reservation_id, None)
+        if reservation is None:
+            raise ReservationNotFoundError(reservation_id)
+        return reservation
+
+    def commit(self, reservation_id: str) -> Reservation:
+        """Da por vendidas las unidades reservadas (se guardan en el siguiente flush)."""
+        reservation = self._take(reservation_id)
+        with self._locked(reservation.items):
+            for product_id, quantity in reservation.items.items():
+                self._add(self._reserved, product_id, -quantity)
+                self._add(self._unflushed, product_id, quantity)
+        self._count("committed")
+        return reservation
+
+    def revert(self, reservation: Reservation):
+        """
+        Deshace el commit() de una reserva (p. ej. no se pudo guardar la
+        orden): sus unidades vuelven al disponible. Las que un flush ya
+        guardó se devuelven al catálogo con adjust_stock.
+        """
+        saved: Dict[int, int] = {}
+        with self._locked(reservation.items):
+            for product_id, quantity in reservation.items.items():
+                pending = min(quantity, self._unflushed.get(product_id, 0))
+                self._add(self._unflushed, product_id, -pending)
+                if quantity > pending:
+                    saved[product_id] = quantity - pending
+        if saved:
+            self.catalog.adjust_stock(saved)
+        self._count("reverted")
+
+    def release(self, reservation_id: str) -> Reservation:
+        """Devuelve al disponible las unidades de una reserva."""
+        reservation = self._take(reservation_id)
+        self._release(reservation)
+        self._count("released")
+        return reservation
+
+    def _release(self, reservation: Reservation):
+        with self._locked(reservation.items):
+            for product_id, quantity in reservation.items.items():
+                self._add(self._reserved, product_id, -quantity)
+
+    def get_reservation(self, reservation_id: str) -> Optional[Reservation]:
+        with self._registry_lock:
+            return self._reservations.get(reservation_id)
+
+    # --- Mantenimiento ---
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Libera las reservas expiradas; devuelve cuántas."""
+        now = time.time() if now is None else now
+        with self._registry_lock:
+            expired = [r for r in self._reservations.values() if r.expires_at <= now]
+            for reservation in expired:
+                del self._reservations[reservation.id]
+        for reservation in expired:
+            self._release(reservation)
+        if expired:
+            self._count("expired", len(expired))
+        return len(expired)
+
+    def flush(self) -> int:
+        """
+        Guarda en productos.json, en una sola escritura, las ventas
+        confirmadas desde el último flush. Devuelve cuántos productos tocó.
+        """
+        with self._flush_lock:
+            product_ids = [product_id for product_id, quantity in list(self._unflushed.items()) if quantity]
+            if not product_ids:
+                return 0
+            deltas: Dict[int, int] = {}
+            with self._locked(product_ids):
+                for product_id in product_ids:
+                    quantity = self._unflushed.pop(product_id, 0)
+                    if quantity:
+                        self._add(self._in_flight, product_id, quantity)
+                        deltas[product_id] = -quantity
+            try:
+                self.catalog.adjust_stock(deltas)
+                # Si otro worker escribió en medio, la recarga trae el stock
+                # guardado antes de dejar de descontar lo que está en vuelo
+                self.catalog.refresh()
+            except Exception:
+                with self._locked(deltas):
+                    for product_id, delta in deltas.items():
+                        self._add(self._in_flight, product_id, delta)
+                        self._add(self._unflushed, product_id, -delta)
+                raise
+            with self._locked(deltas):
+                for product_id, delta in deltas.items():
+                    self._add(self._in_flight, product_id, delta)
+            self._count("flushes")
+            return len(deltas)
+
+    def start(self, interval: Optional[float] = None):
+        """Arranca el hilo que expira reservas y guarda las ventas periódicamente."""
+        interval = settings.INVENTORY_FLUSH_INTERVAL_SECONDS if interval is None else interval
+        if self._worker is not None or interval <= 0:
+            return
+        self._worker = threading.Thread(target=self._loop, args=(interval,), name="inventory-sweeper", daemon=True)
+        self._worker.start()
+        # Las ventas pendientes no se pierden al apagar el proceso
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️  Error guardando el inventario: {e}")
+
+    def _loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.sweep()
+                self.flush()
+                self.catalog.refresh()
+            except Exception as e:
+                print(f"⚠️  Error en el mantenimiento del inventario: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._registry_lock:
+            stats["active_reservations"] = len(self._reservations)
+        stats["unflushed_units"] = sum(self._unflushed.values())
+        return stats
+
+_inventory_service: Optional[InventoryService] = None
+_inventory_lock = threading.Lock()
+
+def get_inventory_service() -> InventoryService:
+    """Inventario singleton, suscrito al catálogo y con su barrido en marcha."""
+    global _inventory_service
+    if _inventory_service is None:
+        with _inventory_lock:
+            if _inventory_service is None:
+                inventory = InventoryService()
+                catalog = inventory.catalog
+                catalog.refresh()
+                catalog.subscribe(inventory)
+                inventory.start()
+                _inventory_service = inventory
+    return _inventory_service
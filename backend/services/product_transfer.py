@@ -0,0 +1,101 @@
+# backend/services/product_transfer.py
+"""
+Importación y exportación masiva de productos en CSV o NDJSON (un objeto
+JSON por línea).
+
+La importación lee el cuerpo de la petición por trozos y entrega los
+registros uno a uno según van llegando, así que cada fila se puede validar
+sin esperar al archivo completo. La exportación es un generador: produce
+una línea por producto y no arma el archivo en memoria.
+"""
+
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+# (número de fila, registro, error): registro None si la fila no se pudo leer
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Líneas completas (sin el salto) de un cuerpo recibido por trozos."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *complete, pending = pending.split(b"\n")
+        for line in complete:
+            yield line.rstrip(b"\r").decode("utf-8-sig")
+    if pending:
+        yield pending.rstrip(b"\r").decode("utf-8-sig")
+
+async def _ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    row = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, None, f"JSON inválido: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row, None, "Cada línea debe ser un objeto JSON"
+            continue
+        yield row, record, None
+
+async def _csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    header: Optional[Sequence[str]] = None
+    row = 0
+    buffered = ""
+    async for line in _lines(chunks):
+        # Un campo entre comillas puede contener saltos de línea: el registro
+        # está completo cuando el número de comillas es par
+        buffered = f"{buffered}\n{line}" if buffered else line
+        if buffered.count('"') % 2:
+            continue
+        text, buffered = buffered, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) > len(header):
+            yield row, None, f"La fila tiene {len(values)} columnas y la cabecera {len(header)}"
+            continue
+        # Las celdas vacías cuentan como no informadas (toman el valor por defecto)
+        yield row, {name: value for name, value in zip(header, values) if value != ""}, None
+    if buffered:
+        yield row + 1, None, "Comillas sin cerrar al final del archivo"
+
+def read_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Record]:
+    """Registros de un cuerpo CSV (con cabecera) o NDJSON, en orden de llegada."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato '{fmt}' no soportado. Disponibles: {', '.join(FORMATS)}")
+    return _csv_records(chunks) if fmt == "csv" else _ndjson_records(chunks)
+
+def export_lines(products: Iterable[Dict[str, Any]], fmt: str, columns: Sequence[str]) -> Iterator[str]:
+    """Líneas CSV (con cabecera) o NDJSON de `products`, una por producto."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato '{fmt}' no soportado. Disponibles: {', '.join(FORMATS)}")
+    if fmt == "ndjson":
+        for product in products:
+            record = {c: product.get(c) for c in columns}
+            yield json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    for product in products:
+        writer.writerow(["" if product.get(c) is None else product.get(c) for c in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # La cabecera sola (sin productos) también se envía
+    if buffer.tell():
+        yield buffer.getvalue()
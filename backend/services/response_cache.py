@@ -0,0 +1,82 @@
+# backend/services/response_cache.py
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from services.catalog_service import CatalogListener, Change, get_catalog_service
+
+# Máximo de respuestas guardadas (combinaciones de filtros/orden/página)
+RESPONSE_CACHE_SIZE = 256
+
+class CatalogResponseCache(CatalogListener):
+    """
+    Respuestas del catálogo ya validadas y codificadas (bytes JSON), por
+    versión del catálogo y parámetros de la consulta.
+
+    Cada entrada se guarda con la versión de la que salieron los datos y
+    solo se sirve mientras el catálogo siga en esa versión. Además, como
+    observador del catálogo, se vacía en cuanto se confirma cualquier alta,
+    cambio o baja de productos, así que no retiene respuestas viejas.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Any, bytes]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    # --- CatalogListener ---
+    def reset(self, products: List[Dict[str, Any]]):
+        self.clear()
+
+    def apply(self, changes: List[Change]):
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._version = None
+
+    # --- Acceso ---
+    def get(self, version: int, key: Any) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key) if version == self._version else None
+            if body is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return body
+
+    def put(self, version: int, key: Any, body: bytes):
+        with self._lock:
+            if self._version is not None and version < self._version:
+                return  # respuesta calculada antes de un cambio ya visto
+            if version != self._version:
+                # Primera respuesta de una versión nueva: lo anterior ya no vale
+                self._entries.clear()
+                self._version = version
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "version": self._version}
+
+_response_cache: Optional[CatalogResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> CatalogResponseCache:
+    """Caché singleton, suscrita al catálogo la primera vez que se usa."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                cache = CatalogResponseCache()
+                get_catalog_service().subscribe(cache)
+                _response_cache = cache
+    return _response_cache
@@ -0,0 +1,211 @@
+# backend/services/search_index.py
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from typing import Any, Collection, Dict, List, Optional, Tuple
+from services.catalog_service import CatalogListener, Change, get_catalog_service
+
+# Peso de cada campo en la frecuencia de un término (BM25F simplificado)
+FIELD_WEIGHTS = {"nombre": 3.0, "marca": 2.0, "categoria": 2.0, "descripcion": 1.0}
+# Parámetros de BM25
+K1 = 1.2
+B = 0.75
+# Palabras vacías del español que no aportan al ranking
+STOPWORDS = frozenset(
+    "a al con de del el en la las lo los o para por que se sin su sus un una unos unas y".split()
+)
+# Máximo de términos del vocabulario que expande un prefijo
+MAX_PREFIX_TERMS = 50
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def fold(text: str) -> str:
+    """Minúsculas y sin tildes ni diéresis: "Gráfica" -> "grafica", "Ñandú" -> "nandu"."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(fold(text)) if t not in STOPWORDS]
+
+class _TrieNode:
+    __slots__ = ("children", "terminal")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.terminal = False
+
+class ProductSearchIndex(CatalogListener):
+    """
+    Índice invertido en memoria sobre nombre, descripción, marca y categoría.
+
+    Ranking BM25 con las frecuencias ponderadas por campo (FIELD_WEIGHTS) y
+    un trie del vocabulario para el modo typeahead, donde la última palabra
+    de la consulta se trata como prefijo. Se alimenta de los eventos del
+    CatalogService, así que las altas, cambios y bajas de productos hechos
+    por las rutas de vendedor y de admin se reflejan sin reconstruir nada.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, float]] = {}  # término -> id -> tf ponderada
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        self._doc_length: Dict[int, float] = {}
+        self._total_length = 0.0
+        self._trie = _TrieNode()
+
+    # --- CatalogListener ---
+    def reset(self, products: List[Dict[str, Any]]):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_length.clear()
+            self._total_length = 0.0
+            self._trie = _TrieNode()
+            for product in products:
+                self._add(product)
+
+    def apply(self, changes: List[Change]):
+        with self._lock:
+            for before, after in changes:
+                if before is not None:
+                    self._remove(before["id"])
+                if after is not None:
+                    self._add(after)
+
+    # --- Mantenimiento del índice ---
+    def _add(self, product: Dict[str, Any]):
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(str(product.get(field) or "")):
+                terms[term] = terms.get(term, 0.0) + weight
+        product_id = product["id"]
+        self._doc_terms[product_id] = terms
+        length = sum(terms.values())
+        self._doc_length[product_id] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._trie_insert(term)
+            postings[product_id] = tf
+
+    def _remove(self, product_id: int):
+        terms = self._doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_length.pop(product_id)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                self._trie_remove(term)
+
+    def _trie_insert(self, term: str):
+        node = self._trie
+        for char in term:
+            node = node.children.setdefault(char, _TrieNode())
+        node.terminal = True
+
+    def _trie_remove(self, term: str):
+        path = [self._trie]
+        for char in term:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].terminal = False
+        # Poda de las ramas que quedaron vacías
+        for depth in range(len(term), 0, -1):
+            node = path[depth]
+            if node.terminal or node.children:
+                break
+            del path[depth - 1].children[term[depth - 1]]
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        node = self._trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        terms: List[str] = []
+        stack: List[Tuple[_TrieNode, str]] = [(node, prefix)]
+        while stack and len(terms) < MAX_PREFIX_TERMS:
+            node, term = stack.pop()
+            if node.terminal:
+                terms.append(term)
+            for char in sorted(node.children, reverse=True):
+                stack.append((node.children[char], term + char))
+        return terms
+
+    # --- Consulta ---
+    def _bm25(self, scores: Dict[int, float], term: str, boost: float = 1.0):
+        postings = self._postings.get(term)
+        if not postings:
+            return
+        n = len(self._doc_terms)
+        average = self._total_length / n if n else 1.0
+        idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+        for product_id, tf in postings.items():
+            norm = K1 * (1 - B + B * self._doc_length[product_id] / average)
+            scores[product_id] = scores.get(product_id, 0.0) + boost * idf * tf * (K1 + 1) / (tf + norm)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        prefix: bool = False,
+        allowed: Optional[Collection[int]] = None,
+    ) -> Tuple[List[Tuple[int, float]], int]:
+        """
+        Devuelve ([(id, puntuación)] de los mejores `limit` productos, total de
+        coincidencias). Con prefix=True la última palabra se expande con el
+        trie ("tarjeta gra" encuentra "tarjeta grafica"). `allowed` restringe
+        el resultado a esos ids (p. ej. los productos activos).
+        """
+        terms = tokenize(query)
+        if not terms:
+            return [], 0
+        with self._lock:
+            scores: Dict[int, float] = {}
+            exact = terms[:-1] if prefix else terms
+            for term in exact:
+                self._bm25(scores, term)
+            if prefix:
+                for term in self._expand_prefix(terms[-1]):
+                    # Las expansiones más largas que el prefijo pesan algo menos
+                    self._bm25(scores, term, boost=1.0 if term == terms[-1] else 0.8)
+            if allowed is not None:
+                scores = {i: score for i, score in scores.items() if i in allowed}
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+            return top, len(scores)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """Términos del vocabulario que empiezan por `prefix`, los más frecuentes primero."""
+        folded = fold(prefix).strip()
+        if not folded:
+            return []
+        with self._lock:
+            terms = self._expand_prefix(folded)
+            return sorted(terms, key=lambda t: (-len(self._postings[t]), t))[:limit]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"documents": len(self._doc_terms), "terms": len(self._postings)}
+
+_search_index: Optional[ProductSearchIndex] = None
+_search_index_lock = threading.Lock()
+
+def get_search_index() -> ProductSearchIndex:
+    """Índice singleton, suscrito al catálogo la primera vez que se usa."""
+    global _search_index
+    if _search_index is None:
+        with _search_index_lock:
+            if _search_index is None:
+                index = ProductSearchIndex()
+                get_catalog_service().subscribe(index)
+                _search_index = index
+    return _search_index
@@ -0,0 +1,290 @@
+# backend/services/user_directory.py
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+from core.principal_cache import invalidate_principal
+from core.revocation import revocation_list
+from core.projection import Fields, project
+from db.engines import get_engine
+from db.json_handler import CREDENTIALS_FILE, USERS_FILE, transaction
+
+# Campos con índice secundario y el valor que toman si el usuario no lo guarda
+INDEXED_FIELDS = ("role", "tipo", "status")
+DEFAULTS = {"role": "customer", "tipo": "cliente", "status": "active"}
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+def _profile(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Perfil de un usuario: el registro sin el hash de la contraseña."""
+    return {k: v for k, v in record.items() if k != "hashed_password"}
+
+def _indexed(profile: Dict[str, Any], field: str) -> Any:
+    return profile.get(field) or DEFAULTS[field]
+
+class UserNotFoundError(LookupError):
+    """El usuario no existe."""
+
+class EmailAlreadyRegisteredError(ValueError):
+    """Ya hay un usuario con ese email."""
+
+class UserDirectory:
+    """
+    Directorio de usuarios en memoria: perfil por email normalizado e
+    índices por role, tipo y status (un usuario sin el campo cuenta con el
+    valor de DEFAULTS).
+
+    Los hashes de contraseña no están en el directorio ni en users.json:
+    viven en credentials.json y solo los tocan el login y el reseteo
+    (password_hash / set_password). Un users.json antiguo, con el hash en
+    cada usuario, sigue sirviendo para el login hasta separarlo con
+    python -m db.migrate --split-credentials.
+
+    users.json se escribe poco: cualquier escritura (de este proceso o de
+    otro worker) cambia el token barato del motor y la siguiente lectura
+    reconstruye los índices. Si el motor no da token (SQLite), get() va al
+    motor por clave, que ya está indexado, y los listados recargan.
+
+    Los cambios de perfil, los borrados y los cambios de contraseña anulan
+    los tokens ya emitidos de esos usuarios (core/revocation.py).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._token: Any = None
+        self._by_email: Dict[str, Dict[str, Any]] = {}
+        # emails normalizados en orden (el cursor de los listados)
+        self._emails: List[str] = []
+        # campo -> valor -> emails (dict como conjunto)
+        self._indexes: Dict[str, Dict[Any, Dict[str, None]]] = {f: {} for f in INDEXED_FIELDS}
+        # filtros -> emails ordenados, de la carga actual
+        self._results: Dict[Tuple, List[str]] = {}
+
+    # --- Sincronización con el almacenamiento ---
+    def _sync(self):
+        engine = get_engine()
+        token = engine.change_token(USERS_FILE.name)
+        with self._lock:
+            if self._loaded and token is not None and token == self._token:
+                return
+        users = engine.load(USERS_FILE.name, {})
+        with self._lock:
+            self._rebuild(users)
+            self._token = token
+
+    def _rebuild(self, users: Dict[str, Any]):
+        self._by_email = {}
+        self._indexes = {f: {} for f in INDEXED_FIELDS}
+        for key, record in users.items():
+            if not isinstance(record, dict):
+                continue
+            email = normalize_email(key)
+            profile = _profile(record)
+            self._by_email[email] = profile
+            for field in INDEXED_FIELDS:
+                self._indexes[field].setdefault(_indexed(profile, field), {})[email] = None
+        self._emails = sorted(self._by_email)
+        self._results.clear()
+        self._loaded = True
+
+    def _changed(self, emails: List[str], revoke: bool = False):
+        """
+        Tras escribir: recargar en la siguiente lectura y olvidar las sesiones
+        en caché. Con `revoke` se anulan además los tokens ya emitidos.
+        """
+        with self._lock:
+            self._loaded = False
+        for email in emails:
+            invalidate_principal(email)
+        if revoke:
+            revocation_list.revoke_subjects(emails)
+
+    def refresh(self):
+        self._sync()
+
+    # --- Lectura ---
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        """Perfil (sin contraseña) del usuario con ese email, o None."""
+        email = normalize_email(email)
+        if get_engine().change_token(USERS_FILE.name) is None:
+            record = get_engine().get_item(USERS_FILE.name, email)
+            return _profile(record) if isinstance(record, dict) else None
+        self._sync()
+        with self._lock:
+            profile = self._by_email.get(email)
+            return dict(profile) if profile is not None else None
+
+    def exists(self, email: str) -> bool:
+        return self.get(email) is not None
+
+    def query(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        role: Optional[str] = None,
+        tipo: Optional[str] = None,
+        status: Optional[str] = None,
+        fields: Fields = None,
+    ) -> Dict[str, Any]:
+        """
+        Una página de usuarios ordenados por email, filtrados por igualdad en
+        los campos indexados. El cursor es el email del último usuario
+        entregado. Los items llevan status (con su valor por defecto) y nunca
+        la contraseña; con `fields` solo esos campos.
+        """
+        filters = (("role", role), ("tipo", tipo), ("status", status))
+        self._sync()
+        with self._lock:
+            emails = self._results.get(filters)
+            if emails is None:
+                emails = self._filter({f: v for f, v in filters if v is not None})
+                self._results[filters] = emails
+            start = bisect_right(emails, normalize_email(cursor)) if cursor else 0
+            page = emails[start:start + limit]
+            items = [
+                project({**self._by_email[e], "status": _indexed(self._by_email[e], "status")}, fields)
+                for e in page
+            ]
+            has_more = start + limit < len(emails)
+            return {
+                "items": items,
+                "total": len(emails),
+                "next_cursor": page[-1] if has_more and page else None,
+            }
+
+    def _filter(self, filters: Dict[str, Any]) -> List[str]:
+        if not filters:
+            return self._emails
+        # Se parte del índice más pequeño de los filtros
+        buckets = [self._indexes[f].get(v, {}) for f, v in filters.items()]
+        smallest = min(buckets, key=len)
+        others = [b for b in buckets if b is not smallest]
+        return sorted(e for e in smallest if all(e in bucket for bucket in others))
+
+    # --- Credenciales ---
+    def password_hash(self, email: str) -> Optional[str]:
+        """Hash guardado de la contraseña (solo para login y reseteo)."""
+        email = normalize_email(email)
+        credential = get_engine().get_item(CREDENTIALS_FILE.name, email)
+        if isinstance(credential, dict) and credential.get("hashed_password"):
+            return credential["hashed_password"]
+        # users.json antiguo que aún no se separó (db/migrate.py --split-credentials)
+        record = get_engine().get_item(USERS_FILE.name, email)
+        return record.get("hashed_password") if isinstance(record, dict) else None
+
+    def set_password(self, email: str, hashed_password: str, revoke: bool = True):
+        """
+        Guarda el hash de la contraseña. Por defecto anula las sesiones
+        abiertas; no cuando solo se rehashea la misma contraseña (login).
+        """
+        email = normalize_email(email)
+        if not self.exists(email):
+            raise UserNotFoundError(email)
+        with get_engine().edit_item(CREDENTIALS_FILE.name, email, {}) as credential:
+            credential["hashed_password"] = hashed_password
+        invalidate_principal(email)
+        if revoke:
+            revocation_list.revoke_subjects([email])
+
+    # --- Escritura ---
+    def register(self, profile: Dict[str, Any], hashed_password: str) -> Dict[str, Any]:
+        """
+        Da de alta un usuario; lanza EmailAlreadyRegisteredError si el email ya existe.
+
+        Primero se guarda la credencial y después el alta en users.json, que
+        decide quién se queda el email (sin anidar transacciones). Si el alta
+        falla, la credencial vuelve a como estaba mientras siga siendo la de
+        este alta; si hasta eso falla queda una credencial sin usuario, que
+        no da acceso y que el siguiente alta del email sobrescribe. Nunca
+        queda un usuario sin contraseña.
+        """
+        email = normalize_email(profile["email"])
+        profile = {**_profile(profile), "email": email}
+        # Sin esta comprobación se pisaría la credencial de un usuario existente
+        if self.exists(email):
+            raise EmailAlreadyRegisteredError(email)
+        with get_engine().edit_item(CREDENTIALS_FILE.name, email, {}) as credential:
+            previous = credential.get("hashed_password")
+            credential["hashed_password"] = hashed_password
+        try:
+            with transaction(USERS_FILE.name) as users:
+                if email in users:
+                    raise EmailAlreadyRegisteredError(email)
+                users[email] = profile
+        except Exception:
+            with transaction(CREDENTIALS_FILE.name) as credentials:
+                credential = credentials.get(email)
+                if isinstance(credential, dict) and credential.get("hashed_password") == hashed_password:
+                    if previous is None:
+                        del credentials[email]
+                    else:
+                        credential["hashed_password"] = previous
+            raise
+        self._changed([email])
+        return dict(profile)
+
+    def update(self, email: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.update_many(changes, emails=[email])
+        profile = next(iter(result.values()))
+        if profile is None:
+            raise UserNotFoundError(email)
+        return profile
+
+    def update_many(
+        self,
+        changes: Dict[str, Any],
+        emails: Optional[List[str]] = None,
+        **filters: Any,
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Aplica `changes` a varios usuarios en una sola escritura: los de
+        `emails` o, sin emails, los que cumplen todos los filtros por igualdad
+        sobre los campos indexados. Devuelve {email: perfil actualizado}, con
+        None para los emails que no existen.
+        """
+        if emails is None and not filters:
+            raise ValueError("Se requieren emails o al menos un filtro")
+        unknown = set(filters) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos sin índice: {', '.join(sorted(unknown))}")
+        changes = _profile(changes)
+        with transaction(USERS_FILE.name) as users:
+            keys = {normalize_email(key): key for key in users}
+            if emails is not None:
+                selected = [normalize_email(e) for e in dict.fromkeys(emails)]
+            else:
+                selected = [
+                    email for email, key in keys.items()
+                    if isinstance(users[key], dict)
+                    and all(_indexed(users[key], f) == v for f, v in filters.items())
+                ]
+            results = {}
+            for email in selected:
+                record = users.get(keys.get(email))
+                if record is None:
+                    results[email] = None
+                    continue
+                record.update(changes)
+                results[email] = _profile(record)
+        self._changed([e for e, p in results.items() if p is not None], revoke=True)
+        return results
+
+    def delete(self, email: str) -> Dict[str, Any]:
+        email = normalize_email(email)
+        with transaction(USERS_FILE.name) as users:
+            key = email if email in users else next((k for k in users if normalize_email(k) == email), None)
+            if key is None:
+                raise UserNotFoundError(email)
+            record = users.pop(key)
+        with transaction(CREDENTIALS_FILE.name) as credentials:
+            credentials.pop(email, None)
+        self._changed([email], revoke=True)
+        return _profile(record)
+
+# Instancia singleton
+user_directory = UserDirectory()
+
+def get_user_directory() -> UserDirectory:
+    """Dependency injection para FastAPI"""
+    return user_directory
@@ -0,0 +1,112 @@
+# backend/tests/conftest.py
+"""
+Configuración común de las pruebas.
+
+core/config.py exige variables sin valor por defecto (SECRET_KEY, STRIPE_*,
+...): aquí se ponen unas de prueba antes de importar nada de la app, así
+que no hace falta un .env. Cada prueba que usa `engine` trabaja sobre un
+directorio temporal, con el motor JSON y con SQLite, y con los servicios
+singleton recién creados; nunca toca los datos de db/.
+
+Ejecutar desde la carpeta backend:
+    python -m pytest
+"""
+
+import os
+
+_TEST_SETTINGS = {
+    "PROJECT_NAME": "Merify API (pruebas)",
+    "ALLOWED_ORIGINS_STR": "http://localhost:5173",
+    "SECRET_KEY": "clave-solo-para-pruebas",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "STRIPE_SECRET_KEY": "sk_test_pruebas",
+    "STRIPE_PUBLISHABLE_KEY": "pk_test_pruebas",
+    # Sin fsync, hashes baratos y sin procesos aparte para hashear
+    "DB_DURABILITY": "none",
+    "PASSWORD_HASH_ROUNDS": "1000",
+    "PASSWORD_HASH_WORKERS": "0",
+    "CART_COMPACT_INTERVAL_SECONDS": "0",
+    "INVENTORY_FLUSH_INTERVAL_SECONDS": "0",
+}
+for _name, _value in _TEST_SETTINGS.items():
+    os.environ.setdefault(_name, _value)
+
+from typing import Any, Dict, Optional
+import pytest
+
+ENGINES = ("json", "sqlite")
+
+@pytest.fixture(params=ENGINES)
+def engine(request, tmp_path, monkeypatch):
+    """
+    Motor activo nuevo en tmp_path (una vez por motor) y servicios singleton
+    vacíos, para que ninguna prueba vea el estado de otra.
+    """
+    import core.rate_limit
+    import services.catalog_service
+    import services.inventory_service
+    import services.response_cache
+    import services.search_index
+    import services.user_directory
+    from core.principal_cache import principal_cache
+    from core.revocation import revocation_list
+    from db.engines import JsonEngine, SQLiteEngine, use_engine
+
+    if request.param == "json":
+        new_engine = JsonEngine(tmp_path)
+    else:
+        new_engine = SQLiteEngine(tmp_path / "test.sqlite3")
+    previous = use_engine(new_engine)
+
+    monkeypatch.setattr(services.catalog_service, "catalog_service", services.catalog_service.CatalogService())
+    monkeypatch.setattr(services.user_directory, "user_directory", services.user_directory.UserDirectory())
+    monkeypatch.setattr(services.inventory_service, "_inventory_service", None)
+    monkeypatch.setattr(services.response_cache, "_response_cache", None)
+    monkeypatch.setattr(services.search_index, "_search_index", None)
+    monkeypatch.setattr(core.rate_limit, "_limiter", None)
+    monkeypatch.setattr(revocation_list, "_loaded", False)
+    principal_cache.clear()
+    yield new_engine
+    inventory = services.inventory_service._inventory_service
+    if inventory is not None:
+        inventory._stop.set()
+    principal_cache.clear()
+    use_engine(previous)
+
+@pytest.fixture
+def client(engine):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+def create_user(email: str, role: str = "customer", password: str = "secreta123", **profile: Any) -> Dict[str, Any]:
+    """Da de alta un usuario directamente en el directorio (sin pasar por la API)."""
+    from core.security import get_password_hash
+    from services.user_directory import get_user_directory
+
+    return get_user_directory().register(
+        {"nombre": profile.pop("nombre", email.split("@")[0]), "email": email, "role": role, **profile},
+        get_password_hash(password),
+    )
+
+def auth_headers(email: str, role: str = "customer", token: Optional[str] = None) -> Dict[str, str]:
+    """Cabecera Authorization con un access token para `email` (se crea el usuario si falta)."""
+    from core.security import create_session_tokens
+    from services.user_directory import get_user_directory
+
+    user = get_user_directory().get(email) or create_user(email, role)
+    token = token or create_session_tokens(user)["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def create_products(*products: Dict[str, Any]):
+    """Productos de prueba en el catálogo activo (campos mínimos por defecto)."""
+    from services.catalog_service import get_catalog_service
+
+    defaults = {"precio": 1000.0, "categoria": "Pruebas", "marca": "Merify", "descripcion": "",
+                "stock": 10, "status": "active", "vendor_id": "vendedor@merify.com"}
+    return get_catalog_service().create_many(
+        [{**defaults, "nombre": f"Producto {i}", **product} for i, product in enumerate(products)]
+    )
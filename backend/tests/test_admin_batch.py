@@ -0,0 +1,55 @@
+# backend/tests/test_admin_batch.py
+"""Moderación en bloque del panel de administración (products:batch, users:batch)."""
+
+from conftest import auth_headers, create_products, create_user
+from services.catalog_service import get_catalog_service
+from services.user_directory import get_user_directory
+
+def _admin():
+    return auth_headers("admin@merify.com", role="admin")
+
+def test_products_batch_by_ids_reports_missing_ones(client):
+    first, second = create_products({"status": "pending"}, {"status": "pending"})
+    response = client.patch(
+        "/api/admin/products:batch", json={"status": "active", "ids": [first["id"], 999]}, headers=_admin()
+    )
+    assert response.json()["updated"] == 1
+    assert {"id": 999, "result": "not_found"} in response.json()["results"]
+    assert get_catalog_service().get(first["id"])["status"] == "active"
+    assert get_catalog_service().get(second["id"])["status"] == "pending"
+
+def test_products_batch_by_filters(client):
+    create_products(
+        {"status": "pending", "vendor_id": "a@merify.com"},
+        {"status": "pending", "vendor_id": "b@merify.com"},
+        {"status": "active", "vendor_id": "a@merify.com"},
+    )
+    response = client.patch(
+        "/api/admin/products:batch", params={"status": "pending", "vendor_id": "a@merify.com"},
+        json={"status": "rejected"}, headers=_admin(),
+    )
+    assert response.json()["updated"] == 1
+    assert sorted(p["status"] for p in get_catalog_service().all()) == ["active", "pending", "rejected"]
+    assert client.patch("/api/admin/products:batch", json={"status": "active"}, headers=_admin()).status_code == 400
+
+def test_users_batch_blocks_and_ends_their_sessions(client):
+    create_user("ana@merify.com")
+    create_user("beto@merify.com", role="vendor")
+    ana = auth_headers("ana@merify.com")
+    assert client.get("/api/users/me", headers=ana).status_code == 200
+
+    response = client.patch(
+        "/api/admin/users:batch", json={"status": "blocked", "emails": ["ana@merify.com", "nadie@merify.com"]},
+        headers=_admin(),
+    )
+    assert response.json()["updated"] == 1
+    assert get_user_directory().get("ana@merify.com")["status"] == "blocked"
+    assert client.get("/api/users/me", headers=ana).status_code == 401
+
+    client.patch("/api/admin/users:batch", params={"role": "vendor"}, json={"status": "blocked"}, headers=_admin())
+    assert get_user_directory().get("beto@merify.com")["status"] == "blocked"
+    assert get_user_directory().get("admin@merify.com").get("status", "active") == "active"
+
+def test_batch_endpoints_require_an_admin(client):
+    response = client.patch("/api/admin/users:batch", json={"status": "blocked", "emails": []}, headers=auth_headers("ana@merify.com"))
+    assert response.status_code == 403
@@ -0,0 +1,64 @@
+# backend/tests/test_auth.py
+"""Refresh tokens que rotan, lista de revocación y modo sin estado (AUTH_STATELESS)."""
+
+from conftest import create_user
+from core.config import settings
+from core.revocation import RevocationList, revocation_list
+from db.json_handler import USERS_FILE
+
+def _login(client, email="ana@merify.com", password="secreta123"):
+    response = client.post("/api/auth/login", data={"username": email, "password": password})
+    assert response.status_code == 200
+    return response.json()
+
+def _me(client, access_token):
+    return client.get("/api/users/me", headers={"Authorization": f"Bearer {access_token}"})
+
+def test_refresh_rotates_and_each_refresh_token_works_once(client):
+    create_user("ana@merify.com")
+    session = _login(client)
+    renewed = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]})
+    assert renewed.status_code == 200
+    assert renewed.json()["refresh_token"] != session["refresh_token"]
+    assert _me(client, renewed.json()["access_token"]).status_code == 200
+
+    again = client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]})
+    assert again.status_code == 401
+
+def test_token_types_are_not_interchangeable(client):
+    create_user("ana@merify.com")
+    session = _login(client)
+    assert _me(client, session["refresh_token"]).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": session["access_token"]}).status_code == 401
+
+def test_password_reset_revokes_earlier_sessions(client):
+    create_user("ana@merify.com")
+    session = _login(client)
+    reset_token = client.post("/api/auth/forgot", json={"email": "ana@merify.com"}).json()["reset_token"]
+    assert client.post("/api/auth/reset", json={"token": reset_token, "new_password": "nueva456"}).status_code == 200
+
+    assert _me(client, session["access_token"]).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": session["refresh_token"]}).status_code == 401
+    assert _me(client, _login(client, password="nueva456")["access_token"]).status_code == 200
+
+def test_revocations_reach_other_workers(engine):
+    revocation_list.revoke_token("jti-1", exp=None)
+    revocation_list.revoke_subjects(["ana@merify.com"])
+    # Otro worker con su propia lista en memoria lee el mismo documento
+    other = RevocationList(retention=3600)
+    assert other.is_revoked({"jti": "jti-1", "sub": "beto@merify.com", "iat": 0})
+    assert other.is_revoked({"jti": "x", "sub": "ana@merify.com", "iat": 0})
+    assert not other.is_revoked({"jti": "x", "sub": "beto@merify.com", "iat": 0})
+
+def test_stateless_mode_trusts_claims_until_revoked(client, engine, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+    create_user("ana@merify.com", role="vendor")
+    access_token = _login(client)["access_token"]
+    # El perfil no se vuelve a leer: basta con los claims firmados
+    with engine.transaction(USERS_FILE.name, {}) as users:
+        users["ana@merify.com"]["nombre"] = "Otro nombre"
+    body = _me(client, access_token).json()
+    assert (body["role"], body["nombre"]) == ("vendor", "ana")
+
+    revocation_list.revoke_subjects(["ana@merify.com"])
+    assert _me(client, access_token).status_code == 401
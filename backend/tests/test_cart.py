@@ -0,0 +1,102 @@
+# backend/tests/test_cart.py
+import pytest
+from conftest import auth_headers, create_products
+from db.json_handler import get_customer_orders, get_user_cart
+from services.catalog_service import get_catalog_service
+from services.inventory_service import get_inventory_service
+
+EMAIL = "cliente@merify.com"
+
+def _fill_cart(client, headers, *lines):
+    for producto_id, cantidad in lines:
+        response = client.post("/api/cart", json={"producto_id": producto_id, "cantidad": cantidad}, headers=headers)
+        assert response.status_code == 201
+
+def test_checkout_creates_order_and_empties_cart(client):
+    headers = auth_headers(EMAIL)
+    first, second = create_products({"precio": 1000.0, "stock": 5}, {"precio": 250.0, "stock": 5})
+    _fill_cart(client, headers, (first["id"], 2), (second["id"], 1))
+
+    response = client.post("/api/cart/checkout", headers=headers)
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["subtotal"] == 2250.0
+    assert [o["id"] for o in get_customer_orders(EMAIL)] == [body["order"]["id"]]
+    assert get_user_cart(EMAIL) == []
+    inventory = get_inventory_service()
+    assert inventory.available(first["id"]) == 3
+    inventory.flush()
+    assert get_catalog_service().get(first["id"])["stock"] == 3
+
+def test_checkout_of_empty_cart_is_rejected(client):
+    response = client.post("/api/cart/checkout", headers=auth_headers(EMAIL))
+    assert response.status_code == 400
+
+def test_checkout_without_stock_keeps_the_cart(client):
+    headers = auth_headers(EMAIL)
+    (product,) = create_products({"stock": 1})
+    _fill_cart(client, headers, (product["id"], 2))
+
+    response = client.post("/api/cart/checkout", headers=headers)
+
+    assert response.status_code == 409
+    assert [item["cantidad"] for item in get_user_cart(EMAIL)] == [2]
+    assert get_customer_orders(EMAIL) == []
+
+def test_failed_order_write_returns_the_units(client, monkeypatch):
+    import api.routes.cart
+
+    headers = auth_headers(EMAIL)
+    (product,) = create_products({"stock": 3})
+    _fill_cart(client, headers, (product["id"], 2))
+
+    def broken_append(order):
+        raise OSError("disco lleno")
+    monkeypatch.setattr(api.routes.cart, "append_order", broken_append)
+    with pytest.raises(OSError):
+        client.post("/api/cart/checkout", headers=headers)
+
+    assert get_inventory_service().available(product["id"]) == 3
+    assert [item["cantidad"] for item in get_user_cart(EMAIL)] == [2]
+
+def test_cart_document_keeps_total_and_count_in_step():
+    from db.cart_document import CartDocument, upgrade_cart
+
+    cart = CartDocument(upgrade_cart([]))
+    mouse = cart.add({"id": 7, "nombre": "Mouse", "precio": 10.1}, 2)
+    cart.add({"id": 7, "nombre": "Mouse", "precio": 10.1}, 1)
+    teclado = cart.add({"id": 8, "nombre": "Teclado", "precio": 0.2}, 3)
+    assert len(cart) == 2
+    assert cart.summary()["total"] == 30.9 and cart.summary()["count"] == 6
+
+    cart.set_quantity(mouse["id"], 1)
+    assert (cart.data["total"], cart.data["count"]) == (10.7, 4)
+    assert cart.set_quantity(999, 1) is None
+    assert cart.remove(teclado["id"]) and cart.remove(mouse["id"])
+    assert (cart.data["total"], cart.data["count"]) == (0.0, 0)
+    cart.clear()
+    assert cart.add({"id": 9, "nombre": "Monitor", "precio": 1.0}, 1)["id"] == 3
+
+def test_legacy_list_cart_is_upgraded_merging_repeated_products():
+    from db.cart_document import CartDocument, upgrade_cart
+
+    legacy = [
+        {"id": 1, "producto_id": 7, "nombre": "Mouse", "precio": 10.0, "cantidad": 1},
+        {"id": 2, "producto_id": 7, "nombre": "Mouse", "precio": 10.0, "cantidad": 2},
+    ]
+    cart = CartDocument(upgrade_cart(legacy))
+    assert [(i["producto_id"], i["cantidad"]) for i in cart.items()] == [(7, 3)]
+    assert cart.summary()["total"] == 30.0
+    assert cart.data["ids"] == {"1": 7}
+
+def test_cart_summary_endpoint(client):
+    headers = auth_headers(EMAIL)
+    first, second = create_products({"precio": 1000.0}, {"precio": 250.0})
+    _fill_cart(client, headers, (first["id"], 2), (second["id"], 1), (first["id"], 1))
+    item_id = client.get("/api/cart", headers=headers).json()[1]["id"]
+    assert client.put(f"/api/cart/{item_id}", json={"cantidad": 4}, headers=headers).status_code == 200
+
+    summary = client.get("/api/cart/summary", headers=headers).json()
+    assert summary["total"] == 4000.0
+    assert [i["cantidad"] for i in summary["items"]] == [3, 4]
@@ -0,0 +1,93 @@
+# backend/tests/test_catalog_service.py
+from contextlib import contextmanager
+from typing import List
+from db.engines import get_engine
+from services.catalog_service import CatalogListener, CatalogService
+
+class RecordingListener(CatalogListener):
+    def __init__(self):
+        self.events: List[str] = []
+
+    def reset(self, products):
+        self.events.append("reset")
+
+    def apply(self, changes):
+        self.events.append("apply")
+
+def _product(nombre: str, **fields):
+    return {"nombre": nombre, "precio": 100.0, "categoria": "Pruebas", "stock": 1, **fields}
+
+def test_own_writes_are_applied_incrementally(engine):
+    catalog, listener = CatalogService(), RecordingListener()
+    catalog.refresh()
+    catalog.subscribe(listener)
+    product = catalog.create(_product("A"))
+    catalog.update(product["id"], {"precio": 200.0})
+
+    assert catalog.get(product["id"])["precio"] == 200.0
+    assert catalog.version == 2
+    assert listener.events == ["reset", "apply", "apply"]
+
+def test_write_from_another_worker_right_after_ours_is_seen(engine, monkeypatch):
+    import services.catalog_service as module
+
+    ours, theirs = CatalogService(), CatalogService()
+    ours.refresh()
+    product = ours.create(_product("A"))
+    real_transaction = module.transaction
+
+    @contextmanager
+    def transaction_then_foreign_write(*args, **kwargs):
+        with real_transaction(*args, **kwargs) as data:
+            yield data
+        # Otro worker escribe justo después de confirmar la nuestra
+        monkeypatch.setattr(module, "transaction", real_transaction)
+        theirs.update(product["id"], {"precio": 999.0})
+
+    monkeypatch.setattr(module, "transaction", transaction_then_foreign_write)
+    ours.update(product["id"], {"stock": 5})
+
+    assert ours.get(product["id"])["precio"] == 999.0
+    assert ours.get(product["id"])["stock"] == 5
+    assert ours.version == 3
+
+def test_write_from_another_worker_replays_the_journal(engine):
+    ours, theirs, listener = CatalogService(), CatalogService(), RecordingListener()
+    ours.refresh()
+    ours.subscribe(listener)
+    created = theirs.create(_product("B"))
+
+    assert ours.get(created["id"]) is not None
+    assert listener.events == ["reset", "apply"]
+
+def test_edit_without_version_bump_rebuilds(engine):
+    catalog = CatalogService()
+    product = catalog.create(_product("A"))
+    data = get_engine().load("productos.json", {"productos": []})
+    data["productos"][0]["nombre"] = "Editado a mano"
+    get_engine().save("productos.json", data)
+
+    assert catalog.get(product["id"])["nombre"] == "Editado a mano"
+
+def test_query_filters_facets_and_keeps_cursors_stable(engine):
+    from conftest import create_products
+    from services.catalog_service import get_catalog_service
+
+    catalog = get_catalog_service()
+    create_products(
+        {"nombre": "A", "categoria": "Audio", "precio": 10.0},
+        {"nombre": "B", "categoria": "Audio", "precio": 30.0},
+        {"nombre": "C", "categoria": "Video", "precio": 20.0},
+        {"nombre": "D", "categoria": "Audio", "precio": 50.0},
+    )
+    page = catalog.query(limit=2, sort="price_asc", max_precio=40.0)
+    assert [p["nombre"] for p in page["items"]] == ["A", "C"]
+    assert page["total"] == 3
+    assert page["facets"]["categoria"] == {"Audio": 2, "Video": 1}
+
+    # Un alta antes del cursor no desplaza la página siguiente
+    create_products({"nombre": "AA", "categoria": "Audio", "precio": 5.0})
+    following = catalog.query(limit=2, sort="price_asc", max_precio=40.0, cursor=page["next_cursor"])
+    assert [p["nombre"] for p in following["items"]] == ["B"]
+    assert following["next_cursor"] is None
+    assert [p["nombre"] for p in catalog.query(categoria="Video")["items"]] == ["C"]
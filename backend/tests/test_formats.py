@@ -0,0 +1,48 @@
+# backend/tests/test_formats.py
+"""Formatos de serialización de db/formats.py y su uso en el motor JSON."""
+
+import pytest
+from core.config import settings
+from db import formats
+from db.convert import convert_file
+
+DATA = {"productos": [{"id": 1, "nombre": "Cámara réflex", "precio": 1999.5, "activo": True, "tags": None}]}
+
+@pytest.mark.parametrize("name", formats.available_formats())
+def test_every_format_round_trips(name):
+    codec = formats.get_codec(name)
+    payload = formats.encode(DATA, codec)
+    assert payload.startswith(formats.MAGIC) == codec.binary
+    assert formats.decode(payload) == DATA
+
+@pytest.mark.parametrize("payload", [
+    b"{no es json",
+    formats.MAGIC,
+    formats.MAGIC + bytes([7]) + b"inventa" + b"datos",
+    formats.MAGIC + bytes([7]) + b"marshal" + b"\x00basura",
+])
+def test_undecodable_content_raises_format_error(payload):
+    with pytest.raises(formats.FormatError):
+        formats.decode(payload)
+
+@pytest.mark.parametrize("engine", ["json"], indirect=True)
+def test_engine_writes_the_configured_format_and_convert_goes_back(engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_FORMATS_STR", "productos.json=marshal")
+    engine.save("productos.json", DATA)
+    path = tmp_path / "productos.json"
+    assert formats.detect(path.read_bytes()).name == "marshal"
+    assert engine.load("productos.json", {}) == DATA
+
+    previous, _, _ = convert_file(path, formats.get_codec("json"))
+    assert previous == "marshal"
+    assert formats.detect(path.read_bytes()).name == "json"
+    assert engine.load("productos.json", {}) == DATA
+
+@pytest.mark.parametrize("engine", ["json"], indirect=True)
+def test_transaction_on_an_undecodable_file_keeps_it(engine, tmp_path):
+    path = tmp_path / "users.json"
+    path.write_bytes(b'{"ana@merify.com": {"nombre": "An')
+    with pytest.raises(formats.FormatError):
+        with engine.transaction("users.json", {}) as users:
+            users["beto@merify.com"] = {}
+    assert path.read_bytes() == b'{"ana@merify.com": {"nombre": "An'
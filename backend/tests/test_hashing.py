@@ -0,0 +1,42 @@
+# backend/tests/test_hashing.py
+"""Hash de contraseñas en su propio pool (core/hashing.py) y rehash al cambiar el coste."""
+
+import asyncio
+import pytest
+from conftest import create_user
+from core.config import settings
+from core.hashing import PasswordHasher, hash_password, verify_and_update
+from services.user_directory import get_user_directory
+
+def test_verify_and_update_flags_hashes_with_another_cost():
+    hashed = hash_password("secreta", 1000)
+    assert verify_and_update("secreta", hashed, 1000) == (True, None)
+    valid, new_hash = verify_and_update("secreta", hashed, 1500)
+    assert valid and "rounds=1500" in new_hash
+    assert verify_and_update("otra", hashed, 1000) == (False, None)
+    assert verify_and_update("secreta", "no-es-un-hash", 1000) == (False, None)
+    assert verify_and_update("secreta", None, 1000) == (False, None)
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_password_hasher_runs_in_threads_or_processes(workers):
+    hasher = PasswordHasher(rounds=1000, workers=workers)
+
+    async def scenario():
+        hashed = await hasher.hash("secreta")
+        return await hasher.verify("secreta", hashed), await hasher.verify("otra", hashed)
+
+    try:
+        assert asyncio.run(scenario()) == ((True, None), (False, None))
+    finally:
+        hasher.shutdown()
+
+def test_login_rehashes_a_password_stored_with_another_cost(client):
+    create_user("ana@merify.com")
+    directory = get_user_directory()
+    directory.set_password("ana@merify.com", hash_password("secreta123", 2000), revoke=False)
+
+    form = {"username": "ana@merify.com", "password": "secreta123"}
+    assert client.post("/api/auth/login", data=form).status_code == 200
+    assert f"rounds={settings.PASSWORD_HASH_ROUNDS}" in directory.password_hash("ana@merify.com")
+    assert client.post("/api/auth/login", data=form).status_code == 200
+    assert client.post("/api/auth/login", data={**form, "password": "mala"}).status_code == 401
@@ -0,0 +1,42 @@
+# backend/tests/test_http_cache.py
+"""Peticiones condicionales de core/http_cache.py (ETag, Last-Modified, Cache-Control)."""
+
+import pytest
+from starlette.requests import Request
+from conftest import create_products
+from core.http_cache import Conditional, _etag_matches, _http_date, version_etag
+
+def _conditional(**headers):
+    scope = {"type": "http", "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]}
+    return Conditional(Request(scope), "no-cache")
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    ('"a"', True),
+    ('W/"a"', True),
+    ('"b", "a"', True),
+    ("*", True),
+    ('"b"', False),
+])
+def test_if_none_match_uses_weak_comparison(if_none_match, matches):
+    assert _etag_matches(if_none_match, '"a"') is matches
+
+def test_if_modified_since_has_second_resolution_and_yields_to_the_etag():
+    assert _conditional(if_modified_since=_http_date(1000.0)).is_fresh('"a"', 1000.9)
+    assert not _conditional(if_modified_since=_http_date(1000.0)).is_fresh('"a"', 1001.0)
+    assert not _conditional(if_modified_since="no es una fecha").is_fresh('"a"', 1000.0)
+    # Con If-None-Match presente, If-Modified-Since no cuenta
+    assert not _conditional(if_none_match='"b"', if_modified_since=_http_date(1000.0)).is_fresh('"a"', 1000.0)
+
+def test_version_etag_depends_on_the_version_and_the_key():
+    assert version_etag("catalog", 1, ("limit", 5)) == version_etag("catalog", 1, ("limit", 5))
+    assert version_etag("catalog", 1, ("limit", 5)) != version_etag("catalog", 2, ("limit", 5))
+    assert version_etag("catalog", 1, ("limit", 5)) != version_etag("catalog", 1, ("limit", 6))
+
+def test_products_send_validators_and_honour_if_modified_since(client):
+    create_products({"nombre": "A"})
+    response = client.get("/api/products")
+    assert response.headers["cache-control"] == "public, no-cache"
+    last_modified = response.headers["last-modified"]
+    assert client.get("/api/products", headers={"If-Modified-Since": last_modified}).status_code == 304
+    # Otra combinación de parámetros es otra respuesta con su propio ETag
+    assert client.get("/api/products", params={"fields": "nombre"}).headers["etag"] != response.headers["etag"]
@@ -0,0 +1,13 @@
+# backend/tests/test_inventory.py
+"""
+Versión corta de scripts/stress_inventory.py con los dos motores: muchos
+hilos de un mismo proceso reservando a la vez no pueden sobrevender.
+"""
+
+from argparse import Namespace
+from scripts.stress_inventory import run
+from services.catalog_service import get_catalog_service
+
+def test_no_overselling_under_contention(engine):
+    args = Namespace(threads=16, products=3, stock=40, stripes=4, seconds=1.0)
+    assert run(get_catalog_service(), args)
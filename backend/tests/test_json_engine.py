@@ -0,0 +1,91 @@
+# backend/tests/test_json_engine.py
+import pytest
+from core.config import settings
+from db.engines import json_engine
+from db.json_handler import edit_user_cart
+
+pytestmark = pytest.mark.parametrize("engine", ["json"], indirect=True)
+
+def test_cache_and_writers_are_bounded(engine, monkeypatch):
+    monkeypatch.setattr(settings, "DB_CACHE_MAX_ENTRIES", 5)
+    for i in range(20):
+        engine.save(f"doc-{i}.json", {"n": i})
+        assert engine.load(f"doc-{i}.json", {}) == {"n": i}
+
+    assert len(json_engine._cache) <= 5
+    assert len(json_engine._writers) <= 5
+    # Lo expulsado se vuelve a leer del disco
+    assert engine.load("doc-0.json", {}) == {"n": 0}
+    engine.save("doc-0.json", {"n": 100})
+    assert engine.load("doc-0.json", {}) == {"n": 100}
+
+def test_compactor_forgets_removed_cart_shards(engine):
+    with edit_user_cart("cliente@merify.com") as cart:
+        cart.add({"id": 1, "nombre": "A", "precio": 10.0}, 1)
+    with edit_user_cart("cliente@merify.com") as cart:
+        cart.clear()
+    shard = engine.carts._shard_path("cliente@merify.com")
+    assert shard in json_engine._writers
+
+    assert engine.carts.compact(grace_seconds=-1)["shards_removed"] == 1
+    assert shard not in json_engine._writers
+    assert shard not in json_engine._cache
+
+def test_cached_reads_are_private_copies(engine):
+    engine.save("doc.json", {"items": [1, 2]})
+    first = engine.load("doc.json", {})
+    first["items"].append(3)
+    assert engine.load("doc.json", {}) == {"items": [1, 2]}
+
+def test_cache_serves_hits_and_notices_external_edits(engine, tmp_path):
+    engine.save("doc.json", {"n": 1})
+    engine.load("doc.json", {})
+    hits = json_engine.get_cache_stats()["hits"]
+    assert engine.load("doc.json", {}) == {"n": 1}
+    assert json_engine.get_cache_stats()["hits"] == hits + 1
+
+    # Edición a mano (otro proceso, un editor): cambia la firma del archivo
+    (tmp_path / "doc.json").write_text('{"n": 2, "editado": true}', encoding="utf-8")
+    assert engine.load("doc.json", {}) == {"n": 2, "editado": True}
+
+def test_concurrent_saves_share_commits_and_leave_a_whole_file(engine, tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    monkeypatch.setattr(settings, "DB_DURABILITY", "batch")
+    monkeypatch.setattr(settings, "DB_GROUP_COMMIT_WINDOW_MS", 5)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: engine.save("doc.json", {"n": i}), range(64)))
+
+    stats = json_engine.get_write_stats()["doc.json"]
+    assert stats["submitted"] == 64
+    assert stats["commits"] < 64
+    json_engine.clear_cache()
+    assert engine.load("doc.json", {})["n"] in range(64)
+    assert not list(tmp_path.glob(".*.tmp"))
+
+def test_failed_write_keeps_the_previous_file(engine, tmp_path, monkeypatch):
+    engine.save("doc.json", {"n": 1})
+
+    def failing_replace(src, dst):
+        raise OSError("disco lleno")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(json_engine.os, "replace", failing_replace)
+        with pytest.raises(OSError):
+            engine.save("doc.json", {"n": 2})
+    assert engine.load("doc.json", {}) == {"n": 1}
+    assert not list(tmp_path.glob(".*.tmp"))
+
+def test_legacy_carts_file_is_split_into_shards(engine, tmp_path):
+    import json
+    from db.json_handler import get_user_cart
+
+    item = {"id": 1, "producto_id": 6, "nombre": "Fuente", "precio": 10.0, "cantidad": 2, "imagen": ""}
+    legacy = {"ana@merify.com": [item], "beto@merify.com": []}
+    (tmp_path / "carts.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    assert get_user_cart("ana@merify.com") == [item]
+    assert not (tmp_path / "carts.json").exists()
+    assert (tmp_path / "carts.json.migrated").exists()
+    assert engine.carts._shard_path("ana@merify.com").exists()
+    assert sorted(engine.load("carts.json", {})) == ["ana@merify.com", "beto@merify.com"]
@@ -0,0 +1,34 @@
+# backend/tests/test_migrate.py
+"""python -m db.migrate: importa db/*.json a SQLite sin tocar el origen."""
+
+import json
+import db.migrate
+from db.engines import SQLiteEngine
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+def test_migrate_copies_everything_and_leaves_the_json_files_alone(tmp_path, monkeypatch):
+    source = tmp_path / "db"
+    source.mkdir()
+    order = {"id": "o-1", "fecha": "2025-10-03T07:37:52", "cliente_email": "ana@merify.com",
+             "items": [], "total": 0.0, "estado": "Completado"}
+    _write(source / "orders.json", [order])
+    _write(source / "carts.json", {"ana@merify.com": [{"id": 1, "cantidad": 2}]})
+    _write(source / "productos.json", {"productos": [{"id": 1, "nombre": "Mouse"}]})
+    _write(source / "users.json", {"ana@merify.com": {"email": "ana@merify.com", "hashed_password": "h"}})
+    before = {path.name: path.read_bytes() for path in source.iterdir()}
+    monkeypatch.setattr(db.migrate, "DB_DIR", source)
+
+    counts = db.migrate.migrate(tmp_path / "out.sqlite3")
+
+    assert counts["orders.json"] == 1
+    assert counts["carts.json"] == 1
+    assert counts["productos.json"] == 1
+    assert {path.name: path.read_bytes() for path in source.iterdir()} == before
+    target = SQLiteEngine(tmp_path / "out.sqlite3")
+    assert target.load("orders.json", []) == [order]
+    assert target.load("carts.json", {}) == {"ana@merify.com": [{"id": 1, "cantidad": 2}]}
+    # Las contraseñas se separan en el destino, no en el origen
+    assert "hashed_password" not in target.load("users.json", {})["ana@merify.com"]
+    assert target.load("credentials.json", {})["ana@merify.com"] == {"hashed_password": "h"}
@@ -0,0 +1,65 @@
+# backend/tests/test_order_ledger.py
+"""Ledger append-only de órdenes del motor JSON (db/engines/order_ledger.py)."""
+
+import json
+from core.config import settings
+from db.engines.order_ledger import OrderLedger
+
+def _order(order_id, email="ana@merify.com"):
+    return {"id": order_id, "cliente_email": email, "items": [], "total": 0.0, "estado": "Pendiente"}
+
+def _ledger(tmp_path):
+    # Una instancia nueva equivale a otro proceso abriendo el mismo ledger
+    return OrderLedger(tmp_path / "orders", legacy_file=tmp_path / "orders.json")
+
+def test_updates_are_appended_and_replayed(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.append(_order("o-1"))
+    ledger.append(_order("o-2", email="beto@merify.com"))
+    assert ledger.update("o-1", {"estado": "Completado"})["estado"] == "Completado"
+    assert ledger.update("no-existe", {"estado": "Completado"}) is None
+
+    other = _ledger(tmp_path)
+    assert other.get("o-1")["estado"] == "Completado"
+    assert [o["id"] for o in other.by_customer("ana@merify.com")] == ["o-1"]
+    segment = (tmp_path / "orders" / "segment-000001.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["op"] for line in segment] == ["create", "create", "update"]
+
+def test_segments_rotate_by_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ORDER_SEGMENT_MAX_BYTES", 300)
+    ledger = _ledger(tmp_path)
+    for i in range(6):
+        ledger.append(_order(f"o-{i}"))
+    assert len(list((tmp_path / "orders").glob("segment-*.jsonl"))) > 1
+    assert [o["id"] for o in _ledger(tmp_path).by_customer("ana@merify.com")] == [f"o-{i}" for i in range(6)]
+
+def test_torn_index_tail_is_cut_before_the_next_write(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.append(_order("o-1"))
+    with open(tmp_path / "orders" / "index.jsonl", "ab") as f:
+        f.write(b'{"op": "create", "id": "o-')  # caída a media línea
+
+    other = _ledger(tmp_path)
+    other.append(_order("o-2"))
+    assert [o["id"] for o in _ledger(tmp_path).by_customer("ana@merify.com")] == ["o-1", "o-2"]
+
+def test_damaged_index_is_rebuilt_from_the_segments(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.append(_order("o-1"))
+    ledger.append(_order("o-2"))
+    index = tmp_path / "orders" / "index.jsonl"
+    lines = index.read_bytes().splitlines(keepends=True)
+    index.write_bytes(b"basura\n" + lines[1])
+
+    other = _ledger(tmp_path)
+    assert other.get("o-1")["id"] == "o-1"
+    assert [o["id"] for o in other.by_customer("ana@merify.com")] == ["o-1", "o-2"]
+
+def test_record_without_index_line_is_indexed_on_open(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.append(_order("o-1"))
+    # Caída entre escribir el registro y su línea de índice
+    with open(tmp_path / "orders" / "segment-000001.jsonl", "ab") as f:
+        f.write((json.dumps({"op": "create", "order": _order("o-2")}) + "\n").encode("utf-8"))
+
+    assert _ledger(tmp_path).get("o-2")["id"] == "o-2"
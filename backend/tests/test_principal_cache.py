@@ -0,0 +1,37 @@
+# backend/tests/test_principal_cache.py
+"""Caché de usuarios autenticados: qué escrituras de users.json la invalidan."""
+
+import pytest
+from conftest import auth_headers, create_user
+from core.principal_cache import principal_cache
+from db.json_handler import USERS_FILE
+
+# Solo el motor JSON da firma de users.json (con SQLite no se vigila)
+pytestmark = pytest.mark.parametrize("engine", ["json"], indirect=True)
+
+def test_other_users_writes_keep_cached_sessions(client):
+    headers = auth_headers("ana@merify.com")
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+    hits = principal_cache.stats()["hits"]
+
+    create_user("beto@merify.com")
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+    assert principal_cache.stats()["hits"] == hits + 1
+
+def test_foreign_change_of_a_cached_user_is_picked_up(client, engine):
+    headers = auth_headers("ana@merify.com")
+    assert client.get("/api/users/me", headers=headers).json()["nombre"] == "ana"
+
+    # Otro worker escribe users.json sin pasar por este directorio
+    with engine.transaction(USERS_FILE.name, {}) as users:
+        users["ana@merify.com"]["nombre"] = "Ana María"
+        users["carla@merify.com"] = {"nombre": "carla", "email": "carla@merify.com"}
+    assert client.get("/api/users/me", headers=headers).json()["nombre"] == "Ana María"
+
+def test_foreign_delete_of_a_cached_user_ends_the_session(client, engine):
+    headers = auth_headers("ana@merify.com")
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+
+    with engine.transaction(USERS_FILE.name, {}) as users:
+        del users["ana@merify.com"]
+    assert client.get("/api/users/me", headers=headers).status_code == 401
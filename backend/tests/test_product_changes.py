@@ -0,0 +1,43 @@
+# backend/tests/test_product_changes.py
+"""GET /api/products/changes: sincronización incremental sobre el diario del catálogo."""
+
+from conftest import create_products
+from core.config import settings
+from services.catalog_service import get_catalog_service
+
+def _changes(client, since):
+    return client.get("/api/products/changes", params={"since": since}).json()
+
+def test_changes_since_a_version_bring_upserts_and_deletes(client):
+    first, second = create_products({"nombre": "A"}, {"nombre": "B"})
+    version = _changes(client, 0)["version"]
+
+    catalog = get_catalog_service()
+    catalog.update(second["id"], {"precio": 5.0})
+    catalog.delete(first["id"])
+    [third] = create_products({"nombre": "C"})
+
+    delta = _changes(client, version)
+    assert delta["full"] is False
+    assert delta["version"] == version + 3
+    assert sorted(p["id"] for p in delta["upserts"]) == [second["id"], third["id"]]
+    assert delta["deletes"] == [first["id"]]
+    assert _changes(client, delta["version"]) == {**delta, "upserts": [], "deletes": []}
+
+def test_a_version_older_than_the_journal_gets_the_full_catalog(client, monkeypatch):
+    monkeypatch.setattr(settings, "CATALOG_JOURNAL_SIZE", 2)
+    [product] = create_products({"nombre": "A"})
+    version = _changes(client, 0)["version"]
+    for precio in (1.0, 2.0, 3.0):
+        get_catalog_service().update(product["id"], {"precio": precio})
+
+    delta = _changes(client, version)
+    assert delta["full"] is True
+    assert [p["precio"] for p in delta["upserts"]] == [3.0]
+
+def test_unchanged_catalog_answers_304(client):
+    create_products({"nombre": "A"})
+    version = _changes(client, 0)["version"]
+    etag = client.get("/api/products/changes", params={"since": version}).headers["etag"]
+    response = client.get("/api/products/changes", params={"since": version}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
@@ -0,0 +1,52 @@
+# backend/tests/test_product_transfer.py
+"""Importación y exportación masiva de productos del vendedor."""
+
+import csv
+import io
+import json
+from conftest import auth_headers
+from services.catalog_service import get_catalog_service
+
+VENDOR = "vendedor@merify.com"
+ROW = {"nombre": "Mouse", "descripcion": "Óptico", "precio": 25000, "categoria": "Periféricos", "marca": "Logi"}
+
+def _import(client, body, format="ndjson", email=VENDOR):
+    return client.post(
+        "/vendor/products/import", params={"format": format}, content=body,
+        headers=auth_headers(email, role="vendor"),
+    )
+
+def test_ndjson_import_keeps_valid_rows_and_reports_the_rest(client):
+    lines = [json.dumps(ROW), json.dumps({**ROW, "precio": "caro"}), "{roto", json.dumps({**ROW, "nombre": "Teclado"})]
+    body = _import(client, "\n".join(lines).encode("utf-8")).json()
+    assert body["created"] == 2
+    assert [error["row"] for error in body["errors"]] == [2, 3]
+    products = [get_catalog_service().get(i) for i in body["ids"]]
+    assert [p["nombre"] for p in products] == ["Mouse", "Teclado"]
+    assert all(p["status"] == "pending" and p["vendor_id"] == VENDOR for p in products)
+
+def test_export_csv_can_be_imported_again(client):
+    _import(client, "\n".join(json.dumps({**ROW, "nombre": f"P{i}"}) for i in range(3)).encode("utf-8"))
+    response = client.get("/vendor/products/export", params={"format": "csv"}, headers=auth_headers(VENDOR, role="vendor"))
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["nombre"] for row in rows] == ["P0", "P1", "P2"]
+
+    body = _import(client, response.content, format="csv", email="otro@merify.com").json()
+    assert body["created"] == 3 and body["errors"] == []
+    copy = get_catalog_service().get(body["ids"][0])
+    assert (copy["nombre"], copy["precio"], copy["descripcion"], copy["vendor_id"]) == ("P0", 25000.0, "Óptico", "otro@merify.com")
+
+def test_export_ndjson_only_lists_the_vendors_products(client):
+    _import(client, json.dumps(ROW).encode("utf-8"))
+    _import(client, json.dumps({**ROW, "nombre": "Ajeno"}).encode("utf-8"), email="otro@merify.com")
+    response = client.get("/vendor/products/export", params={"format": "ndjson"}, headers=auth_headers(VENDOR, role="vendor"))
+    assert [json.loads(line)["nombre"] for line in response.text.splitlines()] == ["Mouse"]
+
+def test_import_limits_and_encoding(client, monkeypatch):
+    from api.routes import vendor
+
+    monkeypatch.setattr(vendor, "MAX_IMPORT_ROWS", 2)
+    assert _import(client, "\n".join([json.dumps(ROW)] * 3).encode("utf-8")).status_code == 413
+    assert _import(client, "nombre\nCami\xf3n\n".encode("latin-1"), format="csv").status_code == 400
+    assert get_catalog_service().all() == []
@@ -0,0 +1,67 @@
+# backend/tests/test_products.py
+"""Listado del catálogo: GET /products como lista y /products/page paginado."""
+
+from conftest import create_products
+from services.catalog_service import get_catalog_service
+
+def test_products_keeps_the_list_shape(client):
+    create_products({"nombre": "Zapato"}, {"nombre": "Abrigo"})
+    response = client.get("/api/products")
+    assert response.status_code == 200
+    body = response.json()
+    assert isinstance(body, list)
+    assert sorted(p["nombre"] for p in body) == ["Abrigo", "Zapato"]
+
+def test_products_page_walks_the_catalog_by_cursor(client):
+    create_products(*({"nombre": f"P{i:02d}"} for i in range(5)))
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/products/page", params=params).json()
+        assert page["total"] == 5
+        seen += [p["nombre"] for p in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"P{i:02d}" for i in range(5)]
+
+def test_products_page_sorts_by_name_descending(client):
+    create_products({"nombre": "B"}, {"nombre": "C"}, {"nombre": "A"})
+    page = client.get("/api/products/page", params={"sort": "name_desc"}).json()
+    assert [p["nombre"] for p in page["items"]] == ["C", "B", "A"]
+
+def test_products_answers_304_until_the_catalog_changes(client):
+    create_products({"nombre": "A"})
+    for path in ("/api/products", "/api/products/page"):
+        etag = client.get(path).headers["etag"]
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+    etag = client.get("/api/products").headers["etag"]
+    create_products({"nombre": "B"})
+    response = client.get("/api/products", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+def test_encoded_responses_are_reused_until_the_catalog_changes(client):
+    from services.response_cache import get_response_cache
+
+    [product] = create_products({"nombre": "A"})
+    first = client.get("/api/products/page", params={"limit": 5})
+    hits = get_response_cache().stats()["hits"]
+    second = client.get("/api/products/page", params={"limit": 5})
+    assert second.content == first.content
+    assert get_response_cache().stats()["hits"] == hits + 1
+
+    get_catalog_service().update(product["id"], {"nombre": "B"})
+    assert client.get("/api/products/page", params={"limit": 5}).json()["items"][0]["nombre"] == "B"
+
+def test_response_cache_ignores_bodies_from_an_older_version():
+    from services.response_cache import CatalogResponseCache
+
+    cache = CatalogResponseCache(max_entries=2)
+    cache.put(2, "a", b"nuevo")
+    cache.put(1, "a", b"viejo")
+    assert cache.get(2, "a") == b"nuevo"
+    assert cache.get(1, "a") is None
+    cache.put(2, "b", b"b")
+    cache.put(2, "c", b"c")
+    assert cache.get(2, "a") is None  # LRU de 2 entradas
@@ -0,0 +1,34 @@
+# backend/tests/test_projection.py
+"""Proyección de campos (?fields=) de core/projection.py."""
+
+import pytest
+from fastapi import HTTPException
+from conftest import auth_headers, create_products, create_user
+from core.projection import parse_fields, project
+from models.order import Product, ProductDetail
+
+def test_parse_fields_dedupes_and_rejects_unknown_names():
+    assert parse_fields(" nombre, precio,nombre ", Product) == ("nombre", "precio")
+    assert parse_fields("", Product) is None
+    with pytest.raises(HTTPException) as error:
+        parse_fields("nombre,hashed_password", Product)
+    assert error.value.status_code == 400
+
+def test_projected_values_take_the_model_types():
+    fields = parse_fields("precio,stock,nombre", ProductDetail)
+    assert project({"precio": 600000, "stock": "7", "extra": 1}, fields) == {"precio": 600000.0, "stock": 7}
+    # Un dato guardado que no encaja con el modelo sale tal cual
+    assert project({"precio": "gratis"}, fields) == {"precio": "gratis"}
+
+def test_products_list_projects_fields(client):
+    create_products({"nombre": "Mouse", "precio": 600000})
+    response = client.get("/api/products", params={"fields": "nombre,precio"})
+    assert response.json() == [{"nombre": "Mouse", "precio": 600000.0}]
+    assert client.get("/api/products", params={"fields": "secreto"}).status_code == 400
+
+def test_admin_user_listing_cannot_project_passwords(client):
+    create_user("ana@merify.com")
+    headers = auth_headers("admin@merify.com", role="admin")
+    response = client.get("/api/admin/users", params={"fields": "email,status"}, headers=headers)
+    assert {"email": "ana@merify.com", "status": "active"} in response.json()["users"]
+    assert client.get("/api/admin/users", params={"fields": "hashed_password"}, headers=headers).status_code == 400
@@ -0,0 +1,52 @@
+# backend/tests/test_rate_limit.py
+"""Token buckets de core/rate_limit.py y el 429 de las rutas de autenticación."""
+
+import pytest
+from core.rate_limit import MemoryBackend, SQLiteBackend
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_keys=1000)
+    return SQLiteBackend(tmp_path / "ratelimit.sqlite3")
+
+def test_bucket_allows_a_burst_then_refills(backend):
+    assert [backend.hit("k", 3, 30, 0.0) for _ in range(3)] == [0, 0, 0]
+    assert backend.hit("k", 3, 30, 0.0) == pytest.approx(10.0)
+    # Un intento se recupera cada periodo/capacidad = 10 s
+    assert backend.hit("k", 3, 30, 10.0) == 0
+    assert backend.hit("k", 3, 30, 10.0) > 0
+    assert backend.hit("otra", 3, 30, 10.0) == 0
+
+def test_memory_backend_never_evicts_a_bucket_in_debt():
+    backend = MemoryBackend(max_keys=2)
+    for _ in range(2):
+        backend.hit("victima", 2, 60, 0.0)
+    backend.hit("a", 2, 60, 1.0)
+    # Tabla llena: la clave nueva espera a que expire la primera
+    assert backend.hit("b", 2, 60, 2.0) == pytest.approx(58.0)
+    assert backend.hit("victima", 2, 60, 2.0) > 0
+    assert len(backend) == 2
+    # "a" expira un periodo después de su último intento y "b" ya cabe
+    assert backend.hit("b", 2, 60, 61.0) == 0
+    assert backend.hit("victima", 2, 60, 61.0) == 0
+
+def test_memory_backend_expires_each_period_on_its_own():
+    backend = MemoryBackend(max_keys=1000)
+    backend.hit("larga", 3, 3600, 0.0)
+    for i in range(5):
+        backend.hit(f"corta{i}", 5, 60, 1.0)
+    assert len(backend) == 6
+    # Las de 60 s expiran aunque haya delante una de una hora sin expirar
+    backend.hit("larga", 3, 3600, 120.0)
+    assert len(backend) == 1
+
+def test_login_answers_429_with_retry_after(client, monkeypatch):
+    from core import rate_limit
+
+    monkeypatch.setitem(rate_limit.RULES, "login.email", (2, 60))
+    form = {"username": "nadie@merify.com", "password": "mala"}
+    assert [client.post("/api/auth/login", data=form).status_code for _ in range(2)] == [401, 401]
+    response = client.post("/api/auth/login", data=form)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
@@ -0,0 +1,40 @@
+# backend/tests/test_search.py
+"""GET /api/products/search: índice invertido con tildes plegadas."""
+
+from conftest import create_products
+from services.catalog_service import get_catalog_service
+from services.search_index import fold, tokenize
+
+def test_fold_and_tokenize_ignore_case_accents_and_stopwords():
+    assert fold("Gráfica ÑANDÚ") == "grafica nandu"
+    assert tokenize("La Tarjeta Gráfica de vídeo") == ["tarjeta", "grafica", "video"]
+
+def _search(client, q, **params):
+    return client.get("/api/products/search", params={"q": q, **params}).json()
+
+def test_search_matches_without_accents_and_ranks_the_name_first(client):
+    create_products(
+        {"nombre": "Tarjeta Gráfica RTX", "categoria": "Componentes"},
+        {"nombre": "Monitor 4K", "descripcion": "Ideal para tu tarjeta grafica"},
+        {"nombre": "Teclado", "descripcion": "Mecánico"},
+    )
+    body = _search(client, "GRAFICA")
+    assert body["total"] == 2
+    assert [p["nombre"] for p in body["items"]] == ["Tarjeta Gráfica RTX", "Monitor 4K"]
+    assert _search(client, "mecanico")["items"][0]["nombre"] == "Teclado"
+
+def test_prefix_mode_completes_the_last_word(client):
+    create_products({"nombre": "Audífonos inalámbricos"}, {"nombre": "Audio interfaz"})
+    body = _search(client, "aud", mode="prefix")
+    assert body["total"] == 2
+    assert set(body["suggestions"]) == {"audifonos", "audio"}
+    assert _search(client, "aud")["total"] == 0
+
+def test_index_follows_catalog_changes(client):
+    [product] = create_products({"nombre": "Silla ergonómica"})
+    assert _search(client, "silla")["total"] == 1
+    get_catalog_service().update(product["id"], {"nombre": "Escritorio"})
+    assert _search(client, "silla")["total"] == 0
+    assert _search(client, "escritorio")["total"] == 1
+    get_catalog_service().delete(product["id"])
+    assert _search(client, "escritorio")["total"] == 0
@@ -0,0 +1,87 @@
+# backend/tests/test_storage.py
+"""API de db/json_handler.py sobre los dos motores (JSON y SQLite)."""
+
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from db.json_handler import read_json, read_transaction, transaction, write_json
+
+def test_concurrent_transactions_lose_no_updates(engine):
+    write_json("contador.json", {"n": 0})
+
+    def increment(_):
+        with transaction("contador.json") as data:
+            data["n"] += 1
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(increment, range(200)))
+    assert read_json("contador.json") == {"n": 200}
+
+def test_transaction_that_raises_saves_nothing(engine):
+    write_json("contador.json", {"n": 1})
+    with pytest.raises(RuntimeError):
+        with transaction("contador.json") as data:
+            data["n"] = 99
+            raise RuntimeError("a medias")
+    with read_transaction("contador.json") as data:
+        assert data == {"n": 1}
+
+def _exercise(engine):
+    """Las mismas operaciones sobre un motor; devuelve todo lo observado."""
+    seen = []
+    engine.save("productos.json", {"version": 3, "productos": [
+        {"id": 1, "nombre": "Mouse", "categoria": "Periféricos"},
+        {"id": 2, "nombre": "Monitor", "categoria": "Pantallas"},
+    ]})
+    seen.append(engine.get_item("productos.json", 2))
+    seen.append(engine.find_items("productos.json", "categoria", "Periféricos"))
+    seen.append(engine.update_item("productos.json", 1, {"precio": 10.0}))
+    seen.append(engine.update_item("productos.json", 99, {"precio": 10.0}))
+    seen.append(engine.load("productos.json", {}))
+
+    engine.save("users.json", {"ana@merify.com": {"nombre": "Ana"}})
+    with engine.edit_item("users.json", "beto@merify.com", {}) as user:
+        user["nombre"] = "Beto"
+    with engine.transaction("users.json", {}) as users:
+        del users["ana@merify.com"]
+    seen.append(engine.get_item("users.json", "beto@merify.com"))
+    seen.append(engine.get_item("users.json", "ana@merify.com", "ninguno"))
+    seen.append(engine.load("users.json", {}))
+
+    for i in range(3):
+        engine.append_item("orders.json", {"id": f"o-{i}", "cliente_email": "ana@merify.com", "estado": "Pendiente"})
+    engine.update_item("orders.json", "o-1", {"estado": "Completado"})
+    seen.append(engine.get_item("orders.json", "o-1"))
+    seen.append(sorted(o["id"] for o in engine.find_items("orders.json", "cliente_email", "ana@merify.com")))
+
+    engine.save("platform_config.json", {"comision": 0.1, "lista": [1, "dos", None]})
+    seen.append(engine.load("platform_config.json", {}))
+    return seen
+
+def test_json_and_sqlite_engines_behave_the_same(tmp_path):
+    from db.engines import JsonEngine, SQLiteEngine
+
+    (tmp_path / "json").mkdir()
+    assert _exercise(JsonEngine(tmp_path / "json")) == _exercise(SQLiteEngine(tmp_path / "db.sqlite3"))
+
+def test_async_api_runs_transactions_off_the_event_loop(engine):
+    import asyncio
+    import threading
+    from db.json_handler import aread_json, atransaction, awrite_json
+
+    def add_item(data):
+        data.setdefault("items", []).append(threading.current_thread().name)
+        return len(data["items"])
+
+    def fail(data):
+        data["items"] = []
+        raise ValueError("sin cambios")
+
+    async def scenario():
+        await awrite_json("cola.json", {})
+        assert await atransaction("cola.json", add_item) == 1
+        with pytest.raises(ValueError):
+            await atransaction("cola.json", fail)
+        return await aread_json("cola.json")
+
+    items = asyncio.run(scenario())["items"]
+    assert len(items) == 1 and items[0].startswith("db-io")
@@ -0,0 +1,42 @@
+# backend/tests/test_user_directory.py
+"""Alta de usuarios: la credencial y users.json nunca quedan a medias."""
+
+import pytest
+import services.user_directory as module
+from services.user_directory import EmailAlreadyRegisteredError, get_user_directory
+from db.json_handler import USERS_FILE
+
+PROFILE = {"nombre": "Ana", "email": "Ana@Merify.com"}
+
+def test_register_stores_profile_and_credential(engine):
+    directory = get_user_directory()
+    assert directory.register(PROFILE, "hash-1")["email"] == "ana@merify.com"
+    assert directory.password_hash("ana@merify.com") == "hash-1"
+    with pytest.raises(EmailAlreadyRegisteredError):
+        directory.register(PROFILE, "hash-2")
+    assert directory.password_hash("ana@merify.com") == "hash-1"
+
+def test_failed_insert_removes_the_new_credential(engine, monkeypatch):
+    directory = get_user_directory()
+    real_transaction = module.transaction
+
+    def failing_transaction(filename, *args, **kwargs):
+        if filename == USERS_FILE.name:
+            raise OSError("disco lleno")
+        return real_transaction(filename, *args, **kwargs)
+
+    monkeypatch.setattr(module, "transaction", failing_transaction)
+    with pytest.raises(OSError):
+        directory.register(PROFILE, "hash-1")
+    monkeypatch.setattr(module, "transaction", real_transaction)
+    assert directory.get("ana@merify.com") is None
+    assert directory.password_hash("ana@merify.com") is None
+
+def test_losing_a_registration_race_restores_the_winners_credential(engine, monkeypatch):
+    directory = get_user_directory()
+    directory.register(PROFILE, "hash-ganador")
+    # El otro alta terminó entre la comprobación previa y el alta en users.json
+    monkeypatch.setattr(directory, "exists", lambda email: False)
+    with pytest.raises(EmailAlreadyRegisteredError):
+        directory.register(PROFILE, "hash-perdedor")
+    assert directory.password_hash("ana@merify.com") == "hash-ganador"
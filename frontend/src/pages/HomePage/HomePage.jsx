@@ -15,10 +15,28 @@ import {
 } from '../../components/Skeleton/Skeleton';
 import styles from './HomePage.module.css';
 
+const PAGE_SIZE = 24;
+const MAX_PRICE = 5000000;
+// Orden del selector -> parámetro sort de /products/page
+const SORT_PARAMS = {
+  'name-asc': 'name',
+  'name-desc': 'name_desc',
+  'price-asc': 'price_asc',
+  'price-desc': 'price_desc',
+  'newest-desc': 'newest'
+};
+
 const HomePage = () => {
   // ----- ESTADO -----
+  // Solo los productos que se muestran: la página actual y las que se
+  // hayan pedido con "Cargar más"
   const [products, setProducts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [total, setTotal] = useState(0);
+  const [categoryCounts, setCategoryCounts] = useState({});
+  const [catalogTotal, setCatalogTotal] = useState(0);
   const [loading, setLoading] = useState(true);
+  const [fetching, setFetching] = useState(false);
   const [error, setError] = useState(null);
   
   // Contextos
@@ -29,7 +47,7 @@ const HomePage = () => {
   const [search, setSearch] = useState({ query: '' });
   const [filters, setFilters] = useState({
     selectedCategory: 'all',
-    priceRange: 5000000, // <-- Simplificado a un solo valor
+    priceRange: MAX_PRICE, // <-- Simplificado a un solo valor
     sortBy: 'name-asc'
   });
   const [showFilters, setShowFilters] = useState(false); // Por defecto falso
@@ -40,23 +58,55 @@ const HomePage = () => {
   const debouncedSearch = useDebounce(search.query, 500);
 
   // ----- EFECTOS -----
+  // Conteos por categoría de todo el catálogo (facetas de una página mínima)
   useEffect(() => {
-    const fetchProducts = async () => {
+    apiClient.get('/products/page', { params: { limit: 1 } })
+      .then(response => {
+        setCategoryCounts(response.data.facets.categoria || {});
+        setCatalogTotal(response.data.total);
+      })
+      .catch(err => console.error("Error fetching categories:", err));
+  }, []);
+
+  // Primera página con la búsqueda, los filtros y el orden actuales
+  useEffect(() => {
+    let cancelled = false;
+    const fetchFirstPage = async () => {
       try {
-        setLoading(true);
-        const response = await apiClient.get('/products');
-        setProducts(response.data);
+        setFetching(true);
+        if (debouncedSearch) {
+          // La búsqueda devuelve una sola página de resultados
+          const response = await apiClient.get('/products/search', {
+            params: { q: debouncedSearch, limit: 50 }
+          });
+          if (cancelled) return;
+          setProducts(response.data.items);
+          setTotal(response.data.items.length);
+          setNextCursor(null);
+        } else {
+          const response = await apiClient.get('/products/page', { params: pageParams(null) });
+          if (cancelled) return;
+          setProducts(response.data.items);
+          setTotal(response.data.total);
+          setNextCursor(response.data.next_cursor);
+        }
       } catch (err) {
+        if (cancelled) return;
         console.error("Error fetching products:", err);
         setError('No se pudieron cargar los productos. Asegúrate que el backend funciona.');
         toast.error('Error al cargar productos');
       } finally {
-        setLoading(false);
+        if (!cancelled) {
+          setLoading(false);
+          setFetching(false);
+        }
       }
     };
-    fetchProducts();
-  }, [toast]);
-  
+    fetchFirstPage();
+    return () => { cancelled = true; };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [debouncedSearch, filters.selectedCategory, filters.priceRange, filters.sortBy, toast]);
+
   // Sincronizar filtros en desktop y móvil
   useEffect(() => {
     const mediaQuery = window.matchMedia('(min-width: 1024px)');
@@ -67,17 +117,43 @@ const HomePage = () => {
   }, []);
 
   // ----- LÓGICA DE FILTRADO -----
-  const categories = useMemo(() => {
-    const uniqueCategories = [...new Set(products.map(p => p.categoria))].filter(Boolean);
-    return [
-      { id: 'all', nombre: 'Todas', count: products.length },
-      ...uniqueCategories.map(cat => ({ id: cat, nombre: cat, count: products.filter(p => p.categoria === cat).length }))
-    ];
-  }, [products]);
+  // El servidor filtra y ordena las páginas; solo los resultados de una
+  // búsqueda (una página) se filtran y ordenan aquí
+  function pageParams(cursor) {
+    return {
+      limit: PAGE_SIZE,
+      sort: SORT_PARAMS[filters.sortBy],
+      ...(filters.selectedCategory !== 'all' && { categoria: filters.selectedCategory }),
+      ...(filters.priceRange < MAX_PRICE && { max_precio: filters.priceRange }),
+      ...(cursor && { cursor })
+    };
+  }
+
+  const loadMore = async () => {
+    if (!nextCursor || fetching) return;
+    try {
+      setFetching(true);
+      const response = await apiClient.get('/products/page', { params: pageParams(nextCursor) });
+      setProducts(prev => [...prev, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      console.error("Error fetching products:", err);
+      toast.error('Error al cargar más productos');
+    } finally {
+      setFetching(false);
+    }
+  };
+
+  const categories = useMemo(() => [
+    { id: 'all', nombre: 'Todas', count: catalogTotal },
+    ...Object.entries(categoryCounts)
+      .filter(([cat]) => cat && cat !== 'null')
+      .map(([cat, count]) => ({ id: cat, nombre: cat, count }))
+  ], [categoryCounts, catalogTotal]);
 
   const filteredProducts = useMemo(() => {
-    let result = products
-      .filter(p => debouncedSearch ? p.nombre.toLowerCase().includes(debouncedSearch.toLowerCase()) : true)
+    if (!debouncedSearch) return products;
+    const result = products
       .filter(p => filters.selectedCategory !== 'all' ? p.categoria === filters.selectedCategory : true)
       .filter(p => p.precio <= filters.priceRange);
 
@@ -86,7 +162,7 @@ const HomePage = () => {
       let comparison = 0;
       if (field === 'name') comparison = a.nombre.localeCompare(b.nombre);
       else if (field === 'price') comparison = a.precio - b.precio;
-      else if (field === 'rating') comparison = (b.rating || 0) - (a.rating || 0);
+      else if (field === 'newest') comparison = String(a.created_at || '').localeCompare(String(b.created_at || ''));
       return order === 'asc' ? comparison : -comparison;
     });
 
@@ -96,7 +172,7 @@ const HomePage = () => {
   // ----- HANDLERS -----
   const resetFilters = () => {
     setSearch({ query: '' });
-    setFilters({ selectedCategory: 'all', priceRange: 5000000, sortBy: 'name-asc' });
+    setFilters({ selectedCategory: 'all', priceRange: MAX_PRICE, sortBy: 'name-asc' });
   };
 
   const handleQuickView = (product) => {
@@ -110,7 +186,7 @@ const HomePage = () => {
   };
 
   // Conteo de filtros activos
-  const activeFiltersCount = (filters.selectedCategory !== 'all' ? 1 : 0) + (filters.priceRange < 5000000 ? 1 : 0);
+  const activeFiltersCount = (filters.selectedCategory !== 'all' ? 1 : 0) + (filters.priceRange < MAX_PRICE ? 1 : 0);
   const formatPrice = (price) => new Intl.NumberFormat('es-CO', { style: 'currency', currency: 'COP', maximumFractionDigits: 0 }).format(price);
   
   // ----- RENDERIZADO -----
@@ -145,11 +221,11 @@ const HomePage = () => {
                 <select value={filters.sortBy} onChange={(e) => setFilters(prev => ({ ...prev, sortBy: e.target.value }))} className={styles.sortSelect}>
                     <option value="name-asc">Nombre A-Z</option><option value="name-desc">Nombre Z-A</option>
                     <option value="price-asc">Precio: Menor a Mayor</option><option value="price-desc">Precio: Mayor a Menor</option>
-                    <option value="rating-desc">Mejor Valorados</option>
+                    <option value="newest-desc">Más Recientes</option>
                 </select>
             </div>
             
-            <div className={styles.resultsCount}>Mostrando <strong>{filteredProducts.length}</strong> productos</div>
+            <div className={styles.resultsCount}>Mostrando <strong>{filteredProducts.length}</strong> de {debouncedSearch ? filteredProducts.length : total} productos</div>
           </div>
         )}
       </section>
@@ -175,7 +251,7 @@ const HomePage = () => {
               <div className={styles.filterGroup}>
                   <h4 className={styles.filterTitle}>Precio Máximo</h4>
           <div className={styles.priceDisplay}><span>{formatPrice(0)}</span><span>{formatPrice(filters.priceRange)}</span></div>
-          <input type="range" min="0" max="5000000" step="100000" value={filters.priceRange} onChange={(e) => setFilters(prev => ({ ...prev, priceRange: parseInt(e.target.value) }))} className={styles.priceRange} />
+          <input type="range" min="0" max={MAX_PRICE} step="100000" value={filters.priceRange} onChange={(e) => setFilters(prev => ({ ...prev, priceRange: parseInt(e.target.value) }))} className={styles.priceRange} />
               </div>
             </aside>
           )
@@ -201,6 +277,11 @@ const HomePage = () => {
                 ))}
                 </div>
             )}
+            {!loading && nextCursor && !debouncedSearch && (
+                <button onClick={loadMore} disabled={fetching} className={styles.resetButton}>
+                    {fetching ? 'Cargando...' : 'Cargar más'}
+                </button>
+            )}
         </main>
       </section>
       